@@ -0,0 +1,56 @@
+class ActivityManager:
+    # keeps track of which objects are close enough to the player to be worth
+    # simulating and drawing. everything else is dormant: it is skipped by the
+    # turn loop and the renderer until the player comes near it again.
+    # an object is active when it lies within radius of the player, or inside
+    # the optional region (any object with x1, y1, x2, y2, such as a Rect).
+    def __init__(self, index, radius, region=None):
+        self.index = index
+        self.radius = radius
+        self.region = region
+        self.active = []
+        self.active_set = set()
+        self.wake_listeners = []
+        self.sleep_listeners = []
+
+    def on_wake(self, listener):
+        # listener(objects) is called with the list of objects that just woke up
+        self.wake_listeners.append(listener)
+
+    def on_sleep(self, listener):
+        # listener(objects) is called with the list of objects that just fell dormant
+        self.sleep_listeners.append(listener)
+
+    def is_active(self, obj):
+        return obj in self.active_set
+
+    def update(self, x, y):
+        # recompute the active set around (x, y) using the spatial index, so
+        # the cost depends on the number of nearby objects, not the total
+        nearby = self.index.query_radius(x, y, self.radius)
+        if self.region is not None:
+            seen = set(nearby)
+            for obj in self.index.query_rect(self.region.x1, self.region.y1,
+                                             self.region.x2, self.region.y2):
+                if obj not in seen:
+                    nearby.append(obj)
+
+        new_set = set(nearby)
+        woken = [obj for obj in nearby if obj not in self.active_set]
+        slept = [obj for obj in self.active if obj not in new_set]
+
+        self.active = nearby
+        self.active_set = new_set
+
+        if woken:
+            for listener in self.wake_listeners:
+                listener(woken)
+        if slept:
+            for listener in self.sleep_listeners:
+                listener(slept)
+
+    def forget(self, obj):
+        # drop an object that was removed from the game
+        if obj in self.active_set:
+            self.active_set.discard(obj)
+            self.active.remove(obj)
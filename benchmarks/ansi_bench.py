@@ -0,0 +1,73 @@
+# measures how many bytes the ANSI terminal backend writes per frame for a
+# roguelike-like screen: a static map, a few monsters walking around and a
+# message line that changes now and then. compares diffed frames with
+# redrawing the whole screen every frame.
+#   python benchmarks/ansi_bench.py [frames] [monsters]
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from libtcodpy.ansi import AnsiTerminal
+
+WIDTH = 80
+HEIGHT = 50
+
+class ByteCounter:
+    # stands in for the terminal, only counts what is written
+    def __init__(self):
+        self.count = 0
+
+    def write(self, data):
+        self.count += len(data)
+
+    def flush(self):
+        pass
+
+def make_frames(frames, monsters):
+    rnd = random.Random(1234)
+    chars = [ord('#') if rnd.random() < 0.3 else ord('.') for i in range(WIDTH * HEIGHT)]
+    back = [0x000064 if c == ord('#') else 0x141e3c for c in chars]
+    fore = [0xffffff] * (WIDTH * HEIGHT)
+    positions = [(rnd.randrange(WIDTH), rnd.randrange(HEIGHT - 5)) for i in range(monsters)]
+
+    for frame in range(frames):
+        c = list(chars)
+        f = list(fore)
+        positions = [(min(max(x + rnd.randint(-1, 1), 0), WIDTH - 1),
+                      min(max(y + rnd.randint(-1, 1), 0), HEIGHT - 6)) for x, y in positions]
+        for x, y in positions:
+            c[y * WIDTH + x] = ord('o')
+            f[y * WIDTH + x] = 0x3fbf3f
+        # a new message every few frames
+        text = 'The orc hits you for %d hit points.' % (frame // 10 % 7)
+        for i, ch in enumerate(text):
+            c[(HEIGHT - 2) * WIDTH + 1 + i] = ord(ch)
+        yield c, f, back
+
+def run(frames, monsters, diff):
+    term = AnsiTerminal(WIDTH, HEIGHT, ByteCounter())
+    first = None
+    start = time.time()
+    for chars, fore, back in make_frames(frames, monsters):
+        if not diff:
+            term.invalidate()
+        term.present(chars, fore, back)
+        if first is None:
+            first = term.bytes_last_frame
+    elapsed = (time.time() - start) * 1000.0 / frames
+    steady = (term.bytes_total - first) / float(max(frames - 1, 1))
+    print('%-4s: first frame %d bytes, then %.0f bytes/frame, %.2f ms/frame' % (
+        'diff' if diff else 'full', first, steady, elapsed))
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    monsters = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    print('%dx%d screen, %d monsters, %d frames' % (WIDTH, HEIGHT, monsters, frames))
+    run(frames, monsters, False)
+    run(frames, monsters, True)
+
+if __name__ == '__main__':
+    main()
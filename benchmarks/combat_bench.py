@@ -0,0 +1,49 @@
+# resolves a large number of simultaneous attacks per turn with combat.Combat
+#   python benchmarks/combat_bench.py [attacks per turn] [fighters] [turns]
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import combat
+from events import EventBus
+
+def run(num_attacks, num_fighters, turns, with_events):
+    rnd = random.Random(1234)
+    bus = EventBus() if with_events else None
+    fight = combat.Combat(bus)
+    for i in range(num_fighters):
+        fight.add(i, rnd.randint(200, 400), rnd.randint(0, 3), rnd.randint(2, 8))
+
+    # pre-roll the attacks so only declaring and resolving is timed
+    attackers = [rnd.randrange(num_fighters) for i in range(num_attacks)]
+    targets = [rnd.randrange(num_fighters) for i in range(num_attacks)]
+
+    declare = 0.0
+    resolve = 0.0
+    deaths = 0
+    for turn in range(turns):
+        t0 = time.time()
+        fight.declare_attacks(attackers, targets)
+        t1 = time.time()
+        deaths += len(fight.resolve())
+        if bus is not None:
+            bus.dispatch()
+        t2 = time.time()
+        declare += t1 - t0
+        resolve += t2 - t1
+
+    print('%s, events %s: declare %.2f ms/turn, resolve %.2f ms/turn, %d deaths' % (
+        'numpy' if combat.numpy_available else 'pure python',
+        'on' if with_events else 'off',
+        declare * 1000.0 / turns, resolve * 1000.0 / turns, deaths))
+
+if __name__ == '__main__':
+    num_attacks = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    num_fighters = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    turns = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    print('%d attacks per turn between %d fighters, %d turns' % (num_attacks, num_fighters, turns))
+    run(num_attacks, num_fighters, turns, False)
+    run(num_attacks, num_fighters, turns, True)
@@ -0,0 +1,99 @@
+# blits a 200x100 ConsoleBuffer to an offscreen console the way a 60 fps
+# game loop would (with everything and with almost nothing changing per
+# frame, and with every cell changing), and compares the cost of handing the planes to libtcod
+# in place with rebuilding ctypes arrays from lists on every blit.
+#   python benchmarks/consolebuffer_bench.py [frames]
+import os
+import sys
+import time
+from ctypes import c_int
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import libtcodpy as libtcod
+
+WIDTH = 200
+HEIGHT = 100
+FRAME_BUDGET = 1000.0 / 60
+
+def bench_blit(frames):
+    con = libtcod.console_new(WIDTH, HEIGHT)
+    buf = libtcod.ConsoleBuffer(WIDTH, HEIGHT)
+    start = time.time()
+    for frame in range(frames):
+        # a moving band of color plus a snapshot, like a typical effect pass
+        y = frame % HEIGHT
+        buf.set_back_rect(0, y, WIDTH, 1, frame % 256, 64, 128)
+        buf.set_fore(frame % WIDTH, y, 255, 255, 255, '@')
+        previous = buf.copy()
+        buf.blit(con)
+    elapsed = (time.time() - start) * 1000.0 / frames
+    libtcod.console_delete(con)
+    print('blit 200x100 ConsoleBuffer: %.3f ms/frame (%.0f%% of a 60 fps frame)' % (
+        elapsed, elapsed * 100.0 / FRAME_BUDGET))
+
+def bench_full(frames):
+    # every cell changes every frame, so each blit refills the whole console
+    con = libtcod.console_new(WIDTH, HEIGHT)
+    buf = libtcod.ConsoleBuffer(WIDTH, HEIGHT)
+    start = time.time()
+    for frame in range(frames):
+        buf.set_back_rect(0, 0, WIDTH, HEIGHT, frame % 256, 64, 128)
+        buf.set_fore_rect(0, 0, WIDTH, HEIGHT, 255, frame % 256, 255, '#')
+        buf.blit(con)
+    elapsed = (time.time() - start) * 1000.0 / frames
+    libtcod.console_delete(con)
+    print('blit 200x100 ConsoleBuffer, every cell changed: %.3f ms/frame (%.0f%% of a 60 fps frame)' % (
+        elapsed, elapsed * 100.0 / FRAME_BUDGET))
+
+def bench_static(frames):
+    # a mostly static screen: only a handful of cells change per frame
+    con = libtcod.console_new(WIDTH, HEIGHT)
+    buf = libtcod.ConsoleBuffer(WIDTH, HEIGHT)
+    buf.blit(con)
+    start = time.time()
+    for frame in range(frames):
+        for i in range(5):
+            buf.set_fore((frame * 7 + i) % WIDTH, (frame + i) % HEIGHT, 255, 255, 255, '*')
+        buf.blit(con)
+    elapsed = (time.time() - start) * 1000.0 / frames
+    libtcod.console_delete(con)
+    print('blit 200x100 ConsoleBuffer, 5 cells changed per frame: %.3f ms/frame' % elapsed)
+
+def bench_marshalling(frames):
+    n = WIDTH * HEIGHT
+    buf = libtcod.ConsoleBuffer(WIDTH, HEIGHT)
+    planes = [getattr(buf, name) for name in libtcod.ConsoleBuffer._planes]
+    lists = [list(plane) for plane in planes]
+
+    start = time.time()
+    for frame in range(frames):
+        for values in lists:
+            (c_int * n)(*values)
+    rebuilt = (time.time() - start) * 1000.0 / frames
+
+    start = time.time()
+    for frame in range(frames):
+        for plane in planes:
+            (c_int * n).from_buffer(plane)
+    in_place = (time.time() - start) * 1000.0 / frames
+
+    start = time.time()
+    for frame in range(frames):
+        [list(values) for values in lists]
+    list_copy = (time.time() - start) * 1000.0 / frames
+
+    start = time.time()
+    for frame in range(frames):
+        buf.copy()
+    cow_copy = (time.time() - start) * 1000.0 / frames
+
+    print('planes to ctypes: rebuilt from lists %.3f ms, in place %.4f ms' % (rebuilt, in_place))
+    print('copy: seven list copies %.3f ms, copy on write %.4f ms' % (list_copy, cow_copy))
+
+if __name__ == '__main__':
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    bench_marshalling(min(frames, 100))
+    bench_blit(frames)
+    bench_full(frames)
+    bench_static(frames)
@@ -0,0 +1,53 @@
+# reads the distance map of a dijkstra map with dijkstra_get_distance per cell
+# and with dijkstra_get_distances, then builds an auto-explore map from every
+# unexplored cell with dijkstra_compute_multi
+#   python benchmarks/dijkstra_bench.py [rounds]
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import libtcodpy as libtcod
+
+WIDTH = 80
+HEIGHT = 45
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    rnd = random.Random(1234)
+    costs = [rnd.choice((0.0, 1.0, 1.0, 1.0, 2.0)) for i in range(WIDTH * HEIGHT)]
+    costs[WIDTH // 2 + HEIGHT // 2 * WIDTH] = 1.0
+    p = libtcod.dijkstra_new_using_costs(WIDTH, HEIGHT, costs)
+    libtcod.dijkstra_compute(p, WIDTH // 2, HEIGHT // 2)
+
+    start = time.time()
+    for i in range(rounds):
+        expected = [libtcod.dijkstra_get_distance(p, x, y) for y in range(HEIGHT) for x in range(WIDTH)]
+    per_cell = (time.time() - start) / rounds
+
+    # the first call imports NumPy
+    libtcod.dijkstra_get_distances(p)
+    start = time.time()
+    for i in range(rounds):
+        distances = libtcod.dijkstra_get_distances(p)
+    bulk = (time.time() - start) / rounds
+    flat = distances.ravel().tolist() if hasattr(distances, 'ravel') else list(distances)
+    assert flat == expected
+
+    # unexplored: the right third of the map
+    xs = [x for y in range(HEIGHT) for x in range(WIDTH * 2 // 3, WIDTH) if costs[x + y * WIDTH] > 0]
+    ys = [y for y in range(HEIGHT) for x in range(WIDTH * 2 // 3, WIDTH) if costs[x + y * WIDTH] > 0]
+    start = time.time()
+    libtcod.dijkstra_compute_multi(p, xs, ys)
+    explore = libtcod.dijkstra_get_distances(p)
+    multi = time.time() - start
+
+    print('%dx%d map (%s backend, numpy %s)' % (WIDTH, HEIGHT, libtcod.backend_name(), libtcod._get_numpy()))
+    print('dijkstra_get_distance per cell: %.2f ms' % (per_cell * 1000.0))
+    print('dijkstra_get_distances:         %.2f ms (%.0fx)' % (bulk * 1000.0, per_cell / bulk))
+    print('auto-explore map from %d roots: %.2f ms' % (len(xs), multi * 1000.0))
+
+if __name__ == '__main__':
+    main()
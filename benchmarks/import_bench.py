@@ -0,0 +1,53 @@
+# measures how long "import libtcodpy" takes in a fresh interpreter, the
+# cost every short-lived headless process pays before doing any work.
+# each run is a new python process; the import time reported by
+# python -X importtime (3.7+) is used when available, wall time otherwise.
+#   python benchmarks/import_bench.py [runs]
+import os
+import re
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+def import_time(module):
+    # (microseconds for the module and everything it imports, or None,
+    # wall time of the whole process in seconds)
+    start = time.time()
+    proc = subprocess.Popen([sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+                            cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    out, err = proc.communicate()
+    wall = time.time() - start
+    if proc.returncode != 0:
+        raise RuntimeError('import %s failed:\n%s' % (module, err.decode('utf-8', 'replace')))
+    cumulative = None
+    for line in err.decode('utf-8', 'replace').splitlines():
+        match = re.match(r'import time:\s+\d+ \|\s+(\d+) \| (\S+)$', line)
+        if match and match.group(2) == module:
+            cumulative = int(match.group(1))
+    return cumulative, wall
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    # warm the file system cache first
+    import_time('libtcodpy')
+
+    imports = []
+    walls = []
+    for i in range(runs):
+        cumulative, wall = import_time('libtcodpy')
+        if cumulative is not None:
+            imports.append(cumulative / 1000.0)
+        walls.append(wall * 1000.0)
+    imports.sort()
+    walls.sort()
+    if imports:
+        print('import libtcodpy: %.1f ms median, %.1f ms best (%d runs)' % (
+            imports[len(imports) // 2], imports[0], runs))
+    print('python -c "import libtcodpy": %.1f ms median wall time' % walls[len(walls) // 2])
+    print('numpy imported: %s' % subprocess.check_output(
+        [sys.executable, '-c', 'import sys, libtcodpy; print("numpy" in sys.modules)'], cwd=ROOT).decode().strip())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+# line of sight between many monster/target pairs on a random map, checked
+# with line_iter one cell at a time and with line_of_sight_bulk
+#   python benchmarks/line_bench.py [pairs] [rounds]
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import libtcodpy as libtcod
+
+WIDTH = 80
+HEIGHT = 45
+
+def clear_iter(transparent, xo, yo, xd, yd):
+    cells = list(libtcod.line_iter(xo, yo, xd, yd))[1:-1]
+    return all(transparent[x + y * WIDTH] for x, y in cells)
+
+def main():
+    pairs = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    rnd = random.Random(1234)
+    transparent = [rnd.random() > 0.15 for i in range(WIDTH * HEIGHT)]
+    xo = [rnd.randrange(WIDTH) for i in range(pairs)]
+    yo = [rnd.randrange(HEIGHT) for i in range(pairs)]
+    xd = [rnd.randrange(WIDTH) for i in range(pairs)]
+    yd = [rnd.randrange(HEIGHT) for i in range(pairs)]
+
+    start = time.time()
+    for i in range(rounds):
+        expected = [clear_iter(transparent, *pair) for pair in zip(xo, yo, xd, yd)]
+    per_cell = (time.time() - start) / rounds
+
+    # the first call imports NumPy
+    libtcod.line_of_sight_bulk(transparent, WIDTH, xo, yo, xd, yd)
+    start = time.time()
+    for i in range(rounds):
+        clear = libtcod.line_of_sight_bulk(transparent, WIDTH, xo, yo, xd, yd)
+    bulk = (time.time() - start) / rounds
+
+    assert [bool(c) for c in clear] == expected
+    print('%d pairs (%s backend, numpy %s)' % (pairs, libtcod.backend_name(), libtcod._get_numpy()))
+    print('line_iter:          %.2f ms' % (per_cell * 1000.0))
+    print('line_of_sight_bulk: %.2f ms (%.0fx)' % (bulk * 1000.0, per_cell / bulk))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+# plans a path for many monsters towards the player on a random cave map,
+# with path_compute/path_get per monster and with one PathBatch call, then
+# with weighted terrain given as a Python callback and as a cost grid
+#   python benchmarks/path_bench.py [monsters] [turns]
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import libtcodpy as libtcod
+
+WIDTH = 80
+HEIGHT = 45
+
+def make_map(rnd):
+    m = libtcod.map_new(WIDTH, HEIGHT)
+    floor = []
+    for y in range(HEIGHT):
+        for x in range(WIDTH):
+            open_cell = rnd.random() > 0.2
+            libtcod.map_set_properties(m, x, y, open_cell, open_cell)
+            if open_cell:
+                floor.append((x, y))
+    return m, floor
+
+def weighted(rnd, m):
+    # terrain costs: impassable where the map is blocked, 1 to 3 elsewhere
+    costs = []
+    for y in range(HEIGHT):
+        for x in range(WIDTH):
+            costs.append(rnd.choice((1.0, 1.0, 2.0, 3.0)) if libtcod.map_is_walkable(m, x, y) else 0.0)
+    return costs
+
+def main():
+    monsters = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    rnd = random.Random(1234)
+    m, floor = make_map(rnd)
+    path = libtcod.path_new_using_map(m)
+    origins = [rnd.choice(floor) for i in range(monsters)]
+    ox = [x for x, y in origins]
+    oy = [y for x, y in origins]
+    players = [rnd.choice(floor) for i in range(turns)]
+
+    start = time.time()
+    expected = []
+    for px, py in players:
+        for x, y in origins:
+            libtcod.path_compute(path, x, y, px, py)
+            expected.append([libtcod.path_get(path, i) for i in range(libtcod.path_size(path))])
+    single = time.time() - start
+
+    batch = libtcod.PathBatch(path)
+    got = []
+    for px, py in players:
+        batch.compute(ox, oy, px, py)
+        got.extend(list(zip(*batch.cells(i))) for i in range(monsters))
+    stats = batch.stats()
+
+    assert got == expected
+    print('%d monsters, %d turns (%s backend)' % (monsters, turns, libtcod.backend_name()))
+    print('path_compute + path_get: %.1f ms/turn' % (single * 1000.0 / turns))
+    print('PathBatch.compute:       %.1f ms/turn, %.0f paths/s, %d of %d found, %.1f steps on average' % (
+        stats['seconds'] * 1000.0 / turns, stats['paths_per_second'], stats['found'],
+        stats['queries'], stats['mean_length']))
+
+    costs = weighted(rnd, m)
+    def cost(xf, yf, xt, yt, data):
+        return costs[xt + yt * WIDTH]
+    by_function = libtcod.path_new_using_function(WIDTH, HEIGHT, cost)
+    by_grid = libtcod.path_new_using_costs(WIDTH, HEIGHT, costs)
+    times = []
+    for p in (by_function, by_grid):
+        start = time.time()
+        for px, py in players:
+            for x, y in origins:
+                libtcod.path_compute(p, x, y, px, py)
+        times.append((time.time() - start) * 1000.0 / turns)
+    print('weighted, callback:      %.1f ms/turn' % times[0])
+    print('weighted, cost grid:     %.1f ms/turn (%.0fx)' % (times[1], times[0] / times[1]))
+
+if __name__ == '__main__':
+    main()
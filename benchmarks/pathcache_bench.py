@@ -0,0 +1,67 @@
+# monsters that keep asking for paths to a few places (the player's last
+# positions, the stairs) on a map where a door opens or closes now and then,
+# with and without a PathCache
+#   python benchmarks/pathcache_bench.py [monsters] [turns]
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import libtcodpy as libtcod
+from pathcache import PathCache
+
+WIDTH = 80
+HEIGHT = 45
+
+def main():
+    monsters = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    rnd = random.Random(1234)
+    m = libtcod.map_new(WIDTH, HEIGHT)
+    libtcod.map_clear(m, True, True)
+    # a wall across the map with a door in it
+    door = (WIDTH // 2, HEIGHT // 2)
+    for y in range(HEIGHT):
+        if y != door[1] and y != 3:
+            libtcod.map_set_properties(m, door[0], y, False, False)
+    p = libtcod.path_new_using_map(m)
+    cache = PathCache()
+    cache.add_model('walk', p)
+
+    origins = [(rnd.randrange(WIDTH // 2), rnd.randrange(HEIGHT)) for i in range(monsters)]
+    targets = [(WIDTH - 5, 5), (WIDTH - 10, HEIGHT - 5), (WIDTH - 20, HEIGHT // 2)]
+    door_open = True
+    uncached = 0.0
+    cached = 0.0
+    for turn in range(turns):
+        if turn % 10 == 9:
+            door_open = not door_open
+            libtcod.map_set_properties(m, door[0], door[1], door_open, door_open)
+            if door_open:
+                cache.map_changed('walk')
+            else:
+                cache.tiles_changed('walk', [door[0]], [door[1]])
+        target = targets[turn % len(targets)]
+        start = time.time()
+        expected = []
+        for x, y in origins:
+            if libtcod.path_compute(p, x, y, target[0], target[1]):
+                expected.append(tuple(libtcod.path_get(p, i) for i in range(libtcod.path_size(p))))
+            else:
+                expected.append(None)
+        uncached += time.time() - start
+        start = time.time()
+        got = [cache.path('walk', x, y, target[0], target[1]) for x, y in origins]
+        cached += time.time() - start
+        assert got == expected
+
+    stats = cache.stats()
+    print('%d monsters, %d turns (%s backend)' % (monsters, turns, libtcod.backend_name()))
+    print('path_compute:    %.1f ms/turn' % (uncached * 1000.0 / turns))
+    print('PathCache.path:  %.1f ms/turn, hit rate %.0f%%, %d paths dropped by map changes, %d cells kept' % (
+        cached * 1000.0 / turns, stats['hit_rate'] * 100.0, stats['invalidated'], stats['cells']))
+
+if __name__ == '__main__':
+    main()
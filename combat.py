@@ -0,0 +1,134 @@
+import array
+
+try:  #import NumPy if available
+    import numpy
+    numpy_available = True
+except ImportError:
+    numpy_available = False
+
+import events
+
+class Combat:
+    # fighter stats for every object that can fight, kept as parallel int
+    # arrays indexed by fighter slot. attacks are only declared during a turn;
+    # resolve() applies all of them at once, so everybody strikes at the same
+    # time (a fighter killed this turn still lands its own blows).
+    def __init__(self, bus=None):
+        self.bus = bus
+        self.hp = array.array('i')
+        self.max_hp = array.array('i')
+        self.defense = array.array('i')
+        self.power = array.array('i')
+        self.alive = array.array('b')
+        self.owners = []
+        self.free_slots = []
+
+        # attacks declared this turn, as pairs of fighter slots
+        self.attackers = array.array('i')
+        self.targets = array.array('i')
+
+    def add(self, owner, hp, defense, power):
+        # register a fighter and return its slot
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.hp[slot] = hp
+            self.max_hp[slot] = hp
+            self.defense[slot] = defense
+            self.power[slot] = power
+            self.alive[slot] = 1
+            self.owners[slot] = owner
+        else:
+            slot = len(self.owners)
+            self.hp.append(hp)
+            self.max_hp.append(hp)
+            self.defense.append(defense)
+            self.power.append(power)
+            self.alive.append(1)
+            self.owners.append(owner)
+        return slot
+
+    def remove(self, slot):
+        self.alive[slot] = 0
+        self.owners[slot] = None
+        self.free_slots.append(slot)
+
+    def declare_attack(self, attacker, target):
+        self.attackers.append(attacker)
+        self.targets.append(target)
+
+    def declare_attacks(self, attackers, targets):
+        # declare many attacks at once from two sequences of fighter slots
+        self.attackers.extend(attackers)
+        self.targets.extend(targets)
+
+    def resolve(self):
+        # apply every attack declared this turn. returns the list of fighter
+        # slots that died; ATTACK (attacker, target, damage) and
+        # DEATH (object, killer) events are queued on the bus if there is one.
+        if not self.attackers:
+            return []
+        if numpy_available:
+            damage, dead, killers = self._resolve_numpy()
+        else:
+            damage, dead, killers = self._resolve_python()
+
+        if self.bus is not None:
+            owners = self.owners
+            self.bus.emit_many(events.ATTACK, [
+                (owners[a], owners[t], d)
+                for a, t, d in zip(self.attackers, self.targets, damage)])
+            self.bus.emit_many(events.DEATH, [
+                (owners[slot], owners[killer])
+                for slot, killer in zip(dead, killers)])
+
+        del self.attackers[:]
+        del self.targets[:]
+        return dead
+
+    def _resolve_numpy(self):
+        attackers = numpy.frombuffer(self.attackers, dtype=numpy.int32)
+        targets = numpy.frombuffer(self.targets, dtype=numpy.int32)
+        hp = numpy.frombuffer(self.hp, dtype=numpy.int32)
+        alive = numpy.frombuffer(self.alive, dtype=numpy.int8)
+        power = numpy.frombuffer(self.power, dtype=numpy.int32)
+        defense = numpy.frombuffer(self.defense, dtype=numpy.int32)
+
+        # attacks on fighters that were already dead do nothing
+        damage = numpy.maximum(power[attackers] - defense[targets], 0)
+        damage *= alive[targets]
+
+        # the killer is the last attacker, in declaration order, to hit the victim
+        last = numpy.full(len(hp), -1, dtype=numpy.int64)
+        numpy.maximum.at(last, targets, numpy.arange(len(targets)))
+
+        total = numpy.bincount(targets, weights=damage, minlength=len(hp))
+        hp -= total.astype(numpy.int32)
+        dead = numpy.nonzero((alive != 0) & (hp <= 0) & (last >= 0))[0]
+        alive[dead] = 0
+        killers = attackers[last[dead]]
+        return damage.tolist(), dead.tolist(), killers.tolist()
+
+    def _resolve_python(self):
+        hp = self.hp
+        alive = self.alive
+        power = self.power
+        defense = self.defense
+
+        damage = []
+        last = {}
+        for a, t in zip(self.attackers, self.targets):
+            if alive[t]:
+                d = power[a] - defense[t]
+                if d < 0:
+                    d = 0
+                hp[t] -= d
+            else:
+                d = 0
+            damage.append(d)
+            last[t] = a
+
+        dead = [t for t in last if alive[t] and hp[t] <= 0]
+        dead.sort()
+        for t in dead:
+            alive[t] = 0
+        return damage, dead, [last[t] for t in dead]
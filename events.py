@@ -0,0 +1,77 @@
+# event kinds and the fields of their events
+MOVE = 'move'       # (object, old_x, old_y)
+ATTACK = 'attack'   # (attacker, target, damage)
+DEATH = 'death'     # (object, killer)
+SPAWN = 'spawn'     # (object,)
+
+class EventBus:
+    # queues events while a turn is played and hands them to subscribers in
+    # batches. a subscriber registered for a kind is called once per dispatch
+    # with the list of all events of that kind queued since the last dispatch,
+    # instead of once per event.
+    def __init__(self):
+        self.queues = {}
+        self.subscribers = {}
+        self.kinds = [] # dispatch order, in order of first use
+
+    def subscribe(self, kind, handler):
+        # handler(events) receives a list of event tuples
+        self._queue(kind)
+        self.subscribers[kind].append(handler)
+
+    def emit(self, kind, *event):
+        self._queue(kind).append(event)
+
+    def emit_many(self, kind, batch):
+        # queue a whole list of event tuples of one kind
+        self._queue(kind).extend(batch)
+
+    def emitter(self, kind):
+        # returns a function that queues one event tuple of the given kind,
+        # avoiding the lookups of emit() on hot paths
+        return self._queue(kind).append
+
+    def pending(self):
+        for kind in self.kinds:
+            if self.queues[kind]:
+                return True
+        return False
+
+    def dispatch(self):
+        # deliver everything queued so far. events emitted by subscribers
+        # while dispatching are delivered in a further round.
+        while self.pending():
+            for kind in self.kinds:
+                queue = self.queues[kind]
+                if not queue:
+                    continue
+                batch = queue[:]
+                del queue[:]
+                for handler in self.subscribers[kind]:
+                    handler(batch)
+
+    def _queue(self, kind):
+        queue = self.queues.get(kind)
+        if queue is None:
+            queue = self.queues[kind] = []
+            self.subscribers[kind] = []
+            self.kinds.append(kind)
+        return queue
+
+class EventStats:
+    # counts events per kind, both for the last turn and since the start
+    def __init__(self, bus, kinds):
+        self.turn = dict((kind, 0) for kind in kinds)
+        self.total = dict((kind, 0) for kind in kinds)
+        for kind in kinds:
+            bus.subscribe(kind, self._counter(kind))
+
+    def new_turn(self):
+        for kind in self.turn:
+            self.turn[kind] = 0
+
+    def _counter(self, kind):
+        def count(events):
+            self.turn[kind] += len(events)
+            self.total[kind] += len(events)
+        return count
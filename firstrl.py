@@ -1,4 +1,17 @@
+import zlib
+
 import libtcodpy as libtcod
+from libtcodpy.ansi import AnsiTerminal, TerminalInput, read_console
+from spatial import SpatialIndex
+from activity import ActivityManager
+from spawn import load_spawn_table
+from messages import MessageLog, MessagePanel, FileSink
+import events
+from events import EventBus, EventStats
+from combat import Combat
+from profiler import FrameProfiler
+from recording import SessionRecorder, SessionReplay
+from presenter import Presenter
 
 # window size
 SCREEN_WIDTH = 80
@@ -20,9 +33,31 @@ TORCH_RADIUS = 10
 
 # object settings
 MAX_ROOM_MONSTERS = 3
+MONSTER_DATA_FILE = 'data/monsters.json'
+
+# activity settings
+ACTIVITY_RADIUS = TORCH_RADIUS + 5 # objects further from the player than this are dormant
+
+# message log settings
+PANEL_HEIGHT = SCREEN_HEIGHT - MAP_HEIGHT
+PANEL_Y = MAP_HEIGHT
+MSG_LOG_CAPACITY = 100
+MSG_LOG_FILE = None # set to a filename to also write all messages there
 
 # misc settings
 LIMIT_FPS = 20
+TERMINAL_OUTPUT = False # play in the terminal (e.g. over ssh) instead of an SDL window
+PRESENT_THREAD = True # with terminal output, write frames to the terminal from a background thread
+
+# profiling settings
+PROFILE = False # time the phases of the main loop, F3 shows the timings
+PROFILE_FILE = None # set to a filename to save the timings as json on exit
+
+# recording settings
+RANDOM_SEED = None # seed of the game's random numbers, None picks a new one every game
+RECORD_FILE = None # set to a filename to record the session
+RECORD_FRAMES = False # also record the screen after every frame
+REPLAY_FILE = None # set to a recording to play it back as fast as possible and check it plays out the same
 
 # color definitions
 color_dark_wall = libtcod.Color(0, 0, 100) 
@@ -44,12 +79,17 @@ class Object:
         self.name = name
         self.color = color
         self.blocks = blocks
+        self.fighter = None # slot in the combat system, if it can fight
 
     def move(self, dx, dy):
         if not is_blocked(self.x + dx, self.y + dy):
             # move by the given amount
             self.x += dx
             self.y += dy
+            # the index is updated right away since blocking checks need it,
+            # everything else learns about the move when the turn's events are dispatched
+            spatial_index.update(self)
+            emit_move((self, self.x - dx, self.y - dy))
 
     def draw(self):
         # only show object if visible to player
@@ -57,10 +97,12 @@ class Object:
             # set the color and then draw the character that represents this object at its position
             libtcod.console_set_default_foreground(con, self.color)
             libtcod.console_put_char(con, self.x, self.y, self.char, libtcod.BKGND_NONE)
+            return True
+        return False
 
-    def clear(self):
-        # erase the character that represents the Object
-        libtcod.console_put_char(con, self.x, self.y, ' ', libtcod.BKGND_NONE)
+    def clear(self, x, y):
+        # erase the character that represents the Object at the place it was drawn
+        libtcod.console_put_char(con, x, y, ' ', libtcod.BKGND_NONE)
 
 class Rect:
     # rectangle on the map, represents a room
@@ -72,8 +114,8 @@ class Rect:
 
     def center(self):
         # check center coordinates of room
-        center_x = (self.x1 + self.x2) / 2
-        center_y = (self.y1 + self.y2) / 2
+        center_x = (self.x1 + self.x2) // 2
+        center_y = (self.y1 + self.y2) // 2
         return (center_x, center_y)
 
     def intersect(self, other):
@@ -118,25 +160,40 @@ def create_room(room):
             map[x][y].block_sight = False
 
 def handle_keys():
-    global fov_recompute
+    global fov_recompute, objects_dirty
 
     # misc keys
-    key = libtcod.console_wait_for_keypress(True)
+    if replay is not None:
+        key = replay.next_key()
+        if key is None:
+            return 'exit' # end of the recording
+    elif TERMINAL_OUTPUT:
+        key = terminal_input.read_key()
+    else:
+        key = libtcod.console_wait_for_keypress(True)
+    if recorder is not None:
+        recorder.key(key)
     if key.vk == libtcod.KEY_ENTER and key.lalt:
         # Alt+Enter: toggle fullscreen
-        libtcod.console_set_fullscreen(not libtcod.console_is_fullscreen())
+        if not TERMINAL_OUTPUT:
+            libtcod.console_set_fullscreen(not libtcod.console_is_fullscreen())
     elif key.vk == libtcod.KEY_ESCAPE:
         return 'exit' # exit game
+    elif key.vk == libtcod.KEY_F3 and profiler.enabled:
+        # F3: show or hide the timings, the map must be redrawn under them
+        profiler.toggle_overlay()
+        objects_dirty = True
+        return 'didnt-take-turn'
 
     if game_state == 'playing':
         # movement keys
-        if libtcod.console_is_key_pressed(libtcod.KEY_UP):
+        if key.vk == libtcod.KEY_UP:
             player_move_or_attack(0, -1)
-        elif libtcod.console_is_key_pressed(libtcod.KEY_DOWN):
+        elif key.vk == libtcod.KEY_DOWN:
             player_move_or_attack(0, 1)
-        elif libtcod.console_is_key_pressed(libtcod.KEY_LEFT):
+        elif key.vk == libtcod.KEY_LEFT:
             player_move_or_attack(-1, 0)
-        elif libtcod.console_is_key_pressed(libtcod.KEY_RIGHT):
+        elif key.vk == libtcod.KEY_RIGHT:
             player_move_or_attack(1, 0)
         else:
             return 'didnt-take-turn'
@@ -147,8 +204,8 @@ def is_blocked(x, y):
         return True
 
     # check for any blocking objects
-    for object in objects:
-        if object.blocks and object.x == x and object.y == y:
+    for object in spatial_index.at(x, y):
+        if object.blocks:
             return True
 
     return False
@@ -167,11 +224,9 @@ def make_map():
 
     for r in range(MAX_ROOMS):
         # random width and height
-        w = libtcod.random_get_int(0, ROOM_MIN_SIZE, ROOM_MAX_SIZE)
-        h = libtcod.random_get_int(0, ROOM_MIN_SIZE, ROOM_MAX_SIZE)
+        w, h = libtcod.random_get_ints(rng, ROOM_MIN_SIZE, ROOM_MAX_SIZE, 2)
         # random position without going out of bounds of the map
-        x = libtcod.random_get_int(0, 0, MAP_WIDTH - w - 1)
-        y = libtcod.random_get_int(0, 0, MAP_HEIGHT - h - 1)
+        x, y = libtcod.random_get_ints(rng, 0, [MAP_WIDTH - w - 1, MAP_HEIGHT - h - 1])
 
         new_room = Rect(x, y, w, h)
 
@@ -193,6 +248,7 @@ def make_map():
                 # the first room, where player starts
                 player.x = new_x
                 player.y = new_y
+                spatial_index.update(player)
             else:
                 # for all rooms after the first
                 # connect it to previous room with a tunnel
@@ -200,7 +256,7 @@ def make_map():
                 (prev_x, prev_y) = rooms[num_rooms-1].center()
 
                 # coin toss: horizontal or vertical first?
-                if libtcod.random_get_int(0, 0, 1) == 1:
+                if libtcod.random_get_int(rng, 0, 1) == 1:
                     # horizontal, then vertical
                     create_h_tunnel(prev_x, new_x, prev_y)
                     create_v_tunnel(prev_y, new_y, new_x)
@@ -209,66 +265,133 @@ def make_map():
                     create_v_tunnel(prev_y, new_y, prev_x)
                     create_h_tunnel(prev_x, new_x, new_y)
             
-            # add contents to room (monsters etc)
-            place_objects(new_room)
-
             # append new rooms to list
             rooms.append(new_room)
             num_rooms += 1
+
+    # add contents to rooms (monsters etc)
+    place_objects(rooms)
             
-def place_objects(room):
-    # choose random number of monsters
-    num_monsters = libtcod.random_get_int(0, 0, MAX_ROOM_MONSTERS)
-
-    for i in range(num_monsters):
-        # choose random spot for monster
-        x = libtcod.random_get_int(0, room.x1, room.x2)
-        y = libtcod.random_get_int(0, room.y1, room.y2)
-
-        # only place monster of tile is not blocked
-        if not is_blocked(x, y):
-            # choose random monster type
-            choice = libtcod.random_get_int(0, 0, 100)
-            if choice < 10: # 10%
-                # create troll
-                monster = Object(x, y, 'T', 'troll', libtcod.darker_green, blocks=True)
-            elif choice < 10+20: # 20%
-                # create gnoll
-                monster = Object(x, y, 'G', 'gnoll', libtcod.dark_amber, blocks=True)
-            elif choice < 10+20+30: # 30%
-                # create orc
-                monster = Object(x, y, 'o', 'orc', libtcod.desaturated_green, blocks=True)
-            else: # 40%
-                # create kobold
-                monster = Object(x, y, 'g', 'goblin', libtcod.desaturated_crimson, blocks=True)
-            objects.append(monster)
+def place_objects(rooms):
+    # choose random number of monsters for every room
+    counts = libtcod.random_get_ints(rng, 0, MAX_ROOM_MONSTERS, len(rooms))
+
+    # choose the monster types for the whole level in one go
+    kinds = iter(monster_table.sample_many(dungeon_level, sum(counts), rng))
+
+    # and a random spot for every monster, x then y
+    lows = []
+    highs = []
+    for room, num_monsters in zip(rooms, counts):
+        lows.extend([room.x1, room.y1] * num_monsters)
+        highs.extend([room.x2, room.y2] * num_monsters)
+    spots = iter(libtcod.random_get_ints(rng, lows, highs))
+
+    for room, num_monsters in zip(rooms, counts):
+        for i in range(num_monsters):
+            kind = next(kinds)
+            x = next(spots)
+            y = next(spots)
+
+            # only place monster of tile is not blocked
+            if not is_blocked(x, y):
+                monster = Object(x, y, kind.char, kind.name, kind.color, blocks=kind.blocks)
+                if kind.fighter is not None:
+                    hp, defense, power = kind.fighter
+                    monster.fighter = combat_system.add(monster, hp, defense, power)
+                objects.append(monster)
+                spatial_index.add(monster)
+                event_bus.emit(events.SPAWN, monster)
+
+def state_checksum():
+    # crc of everything a turn can change, to check that a replay plays out the same
+    state = [(object.name, object.x, object.y) for object in objects]
+    state.append(tuple(combat_system.hp))
+    return zlib.crc32(repr(state).encode('utf-8')) & 0xffffffff
+
+def message(new_msg, color=libtcod.white):
+    # add a message to the log shown in the bottom panel
+    message_log.add(new_msg, color)
 
 def player_move_or_attack(dx, dy):
-    global fov_recompute
-
     # the coordinates the player is moving to or attacking
     x = player.x + dx
     y = player.y + dy
 
     # try to find an attackable object there
     target = None
-    for object in objects:
-        if object.x == x and object.y == y:
+    for object in spatial_index.at(x, y):
+        if object.fighter is not None:
             target = object
-            break
 
-    # attack if target found, otherwise move
+    # attack if target found, otherwise move. attacks are resolved at the
+    # end of the turn, together with everybody else's
     if target is not None:
-        print 'The ' + target.name + ' laughs at your puny attack!'
+        combat_system.declare_attack(player.fighter, target.fighter)
     else:
         player.move(dx, dy)
-        fov_recompute = True
+
+def on_moves(moves):
+    # event subscriber: objects moved, so they need to be redrawn, and if
+    # the player was one of them the field of view changed too
+    global fov_recompute, objects_dirty
+    objects_dirty = True
+    for object, old_x, old_y in moves:
+        if object is player:
+            fov_recompute = True
+
+def on_spawns(spawns):
+    # event subscriber: objects appeared, draw them
+    global objects_dirty
+    objects_dirty = True
+
+def on_attacks(attacks):
+    # event subscriber: report attacks in the message log
+    for attacker, target, damage in attacks:
+        if damage > 0:
+            message(attacker.name.capitalize() + ' attacks ' + target.name + ' for ' + str(damage) + ' hit points.')
+        else:
+            message(attacker.name.capitalize() + ' attacks ' + target.name + ' but it has no effect!')
+
+def on_deaths(deaths):
+    # event subscriber: turn everything that died this turn into corpses
+    global game_state, objects_dirty
+    objects_dirty = True
+    for object, killer in deaths:
+        if object is player:
+            message('You died!', libtcod.red)
+            game_state = 'dead'
+        else:
+            message(object.name.capitalize() + ' is dead!', libtcod.orange)
+            object.blocks = False
+            object.name = 'remains of ' + object.name
+        object.char = '%'
+        object.color = libtcod.dark_red
+        combat_system.remove(object.fighter)
+        object.fighter = None
+        if object in awake_monsters:
+            awake_monsters.remove(object)
+
+def wake_monsters(woken):
+    # activity listener: living monsters that came near the player start acting
+    awake_monsters.extend(object for object in woken
+                          if object is not player and object.fighter is not None)
+
+def sleep_monsters(slept):
+    # activity listener: monsters that fell dormant stop acting
+    for object in slept:
+        if object in awake_monsters:
+            awake_monsters.remove(object)
 
 def render_all():
     global fov_map, color_dark_wall, color_light_wall
     global color_dark_ground, color_light_ground
-    global fov_recompute
-    
+    global fov_recompute, objects_dirty, drawn_objects
+
+    # nothing moved and the view didn't change, the map console is still current
+    if not fov_recompute and not objects_dirty:
+        return
+
     if fov_recompute:
         # recompute FOV if needed (such as player moving)
         fov_recompute = False
@@ -295,63 +418,181 @@ def render_all():
                         libtcod.console_set_char_background(con, x, y, color_light_ground, libtcod.BKGND_SET)
                     map[x][y].explored = True
 
-    # draw all objects in list
-    for object in objects:
-        object.draw()
+    # erase objects from the places they were drawn last time
+    objects_dirty = False
+    with profiler.span('clear'):
+        xs, ys = drawn_objects
+        libtcod.console_put_char_bulk(con, xs, ys, ' ', libtcod.BKGND_NONE)
+
+    # draw all objects near the player in one batch, dormant ones can't be in view
+    visible = [object for object in activity.active
+               if libtcod.map_is_in_fov(fov_map, object.x, object.y)]
+    xs = [object.x for object in visible]
+    ys = [object.y for object in visible]
+    libtcod.console_put_char_ex_bulk(con, xs, ys, [object.char for object in visible],
+                                     [object.color for object in visible])
+    drawn_objects = (xs, ys)
 
     # blit the contents of the new offscreen console to the root console
-    libtcod.console_blit(con, 0, 0, SCREEN_WIDTH, SCREEN_HEIGHT, 0, 0, 0)
+    libtcod.console_blit(con, 0, 0, MAP_WIDTH, MAP_HEIGHT, root, 0, 0)
 
 ##################
 ### GAME LOGIC ###
 ##################
 
 # Initialization
-libtcod.console_set_custom_font('arial10x10.png', libtcod.FONT_TYPE_GRAYSCALE | libtcod.FONT_LAYOUT_TCOD)
-libtcod.console_init_root(SCREEN_WIDTH, SCREEN_HEIGHT, 'python/libtcod tutorial', False) # Screen size, title, fullscreen
+replay = SessionReplay(REPLAY_FILE) if REPLAY_FILE else None
+if replay is not None:
+    # replays run without a window and without the frame limiter
+    root = libtcod.console_new(SCREEN_WIDTH, SCREEN_HEIGHT)
+elif TERMINAL_OUTPUT:
+    # draw into an offscreen console that is sent to the terminal after every frame
+    root = libtcod.console_new(SCREEN_WIDTH, SCREEN_HEIGHT)
+    terminal = AnsiTerminal(SCREEN_WIDTH, SCREEN_HEIGHT)
+    terminal_input = TerminalInput()
+    presenter = Presenter(SCREEN_WIDTH, SCREEN_HEIGHT, terminal.present_console) if PRESENT_THREAD else None
+else:
+    libtcod.console_set_custom_font('arial10x10.png', libtcod.FONT_TYPE_GRAYSCALE | libtcod.FONT_LAYOUT_TCOD)
+    libtcod.console_init_root(SCREEN_WIDTH, SCREEN_HEIGHT, 'python/libtcod tutorial', False) # Screen size, title, fullscreen
+    libtcod.sys_set_fps(LIMIT_FPS) # Limits FPS if the game is in real time
+    root = 0
 con = libtcod.console_new(SCREEN_WIDTH, SCREEN_HEIGHT)
-libtcod.sys_set_fps(LIMIT_FPS) # Limits FPS if the game is in real time
+
+# all game randomness comes from one seeded generator, so sessions can be replayed
+if replay is not None:
+    seed = replay.seed
+elif RANDOM_SEED is not None:
+    seed = RANDOM_SEED
+else:
+    seed = libtcod.random_get_int(0, 0, 0x7fffffff)
+rng = libtcod.random_new_from_seed(seed)
+recorder = SessionRecorder(RECORD_FILE, seed, SCREEN_WIDTH, SCREEN_HEIGHT) if RECORD_FILE else None
+check_frames = replay is not None and replay.has_frames()
+
+# timings of the main loop
+profiler = FrameProfiler(enabled=PROFILE)
+profiler.count_ffi(libtcod)
+
+# message log and the panel it is shown in
+message_log = MessageLog(MSG_LOG_CAPACITY, FileSink(MSG_LOG_FILE) if MSG_LOG_FILE else None)
+message_panel = MessagePanel(message_log, SCREEN_WIDTH, PANEL_HEIGHT)
+
+# game events are queued during a turn and handed out in batches
+event_bus = EventBus()
+emit_move = event_bus.emitter(events.MOVE)
+event_bus.subscribe(events.MOVE, on_moves)
+event_bus.subscribe(events.SPAWN, on_spawns)
+event_bus.subscribe(events.DEATH, on_deaths)
+event_bus.subscribe(events.ATTACK, on_attacks)
+event_stats = EventStats(event_bus, [events.MOVE, events.ATTACK, events.DEATH, events.SPAWN])
+
+# fighter stats live in arrays, all attacks of a turn are resolved together
+combat_system = Combat(event_bus)
+
+# monster types and how often they spawn at each depth
+monster_table = load_spawn_table(MONSTER_DATA_FILE)
+dungeon_level = 1
 
 # Create player
 player = Object(0, 0, '@', 'player', libtcod.white, blocks=True)
+player.fighter = combat_system.add(player, hp=30, defense=2, power=5)
 
 # list of objects starting with player
 objects = [player] 
+spatial_index = SpatialIndex()
+spatial_index.add(player)
 
 # Construct the map
 make_map()
 
+# only objects around the player are simulated and drawn
+activity = ActivityManager(spatial_index, ACTIVITY_RADIUS)
+# living monsters near the player, the only objects the turn loop visits
+awake_monsters = []
+activity.on_wake(wake_monsters)
+activity.on_sleep(sleep_monsters)
+activity.update(player.x, player.y)
+
 # Create field of vision map
 fov_map = libtcod.map_new(MAP_WIDTH, MAP_HEIGHT)
 for y in range(MAP_HEIGHT):
     for x in range(MAP_WIDTH):
         libtcod.map_set_properties(fov_map, x, y, not map[x][y].block_sight, not map[x][y].blocked)
 
+event_bus.dispatch()
 fov_recompute = True
+objects_dirty = True
+drawn_objects = ([], []) # coordinates of the glyphs drawn last frame
 game_state = 'playing'
 player_action = None
 
 # Main Loop
-while not libtcod.console_is_window_closed():
+while replay is not None or TERMINAL_OUTPUT or not libtcod.console_is_window_closed():
     # render all objects
-    render_all()
-    
-    # present changes to the screen
-    libtcod.console_flush()
+    with profiler.span('render_all'):
+        render_all()
 
-    # erase objects from previous locations
-    for object in objects:
-        object.clear()
+    # the message panel only redraws when there are new messages
+    with profiler.span('panel'):
+        message_panel.render(root, 0, PANEL_Y)
+    profiler.draw_overlay(root, 0, 0)
+
+    # present changes to the screen
+    with profiler.span('flush'):
+        if recorder is not None and RECORD_FRAMES:
+            recorder.frame(*read_console(root, SCREEN_WIDTH, SCREEN_HEIGHT))
+        if replay is not None:
+            if check_frames:
+                replay.check_frame(*read_console(root, SCREEN_WIDTH, SCREEN_HEIGHT))
+        elif TERMINAL_OUTPUT:
+            if presenter is not None:
+                presenter.submit(root)
+            else:
+                terminal.present_console(root)
+        else:
+            libtcod.console_flush()
 
     # handle keys and exit game if needed
-    player_action = handle_keys()
+    with profiler.span('handle_keys'):
+        player_action = handle_keys()
     if player_action == 'exit':
         break
 
     # let monsters take their turn
     if game_state == 'playing' and player_action != 'didnt-take-turn':
-        for object in objects:
-            if object != player:
-                print 'The ' + object.name + ' growls!'
-            
-
+        with profiler.span('monster_turn'):
+            event_stats.new_turn()
+            # deliver what the player did before the monsters act
+            event_bus.dispatch()
+
+            # wake up monsters the player got close to, put far away ones to sleep
+            activity.update(player.x, player.y)
+            for object in awake_monsters:
+                message('The ' + object.name + ' growls!')
+
+            # resolve all attacks declared this turn in one go, then deliver what the monsters did
+            combat_system.resolve()
+            event_bus.dispatch()
+
+        if recorder is not None:
+            recorder.turn(state_checksum())
+        if replay is not None:
+            replay.check_turn(state_checksum())
+    profiler.frame()
+
+# make sure everything reached the message log file
+message_log.close()
+if PROFILE_FILE:
+    profiler.export_json(PROFILE_FILE)
+if recorder is not None:
+    recorder.close()
+if replay is not None:
+    report = replay.report()
+    print('replayed %d turns in %.2f s, %.0f turns/s, %s' % (
+        report['turns'], report['seconds'], report['turns_per_second'],
+        'deterministic' if report['deterministic'] else 'NOT deterministic, first mismatch: %s %d' % report['first_mismatch']))
+if TERMINAL_OUTPUT:
+    if presenter is not None:
+        presenter.close()
+    terminal_input.close()
+    terminal.close()
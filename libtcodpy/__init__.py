@@ -29,11 +29,18 @@
 from __future__ import print_function
 import os
 import sys
+import array
+import collections
 import ctypes
+import math
 import struct
+import time
 import warnings
+import zlib
 from ctypes import *
 
+from libtcodpy import pathing as _pathing
+
 # We do not have a fully unicode API on libtcod, so all unicode strings have to
 # be implicitly converted to ascii, and any unicode specific operations have to
 # be explicitly made by users
@@ -83,22 +90,81 @@ else: # Python 3
         return string
 
 
+class _LRUCache:
+    # small least recently used cache, for values that are computed again
+    # and again with the same arguments (such as labels printed every frame)
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = collections.OrderedDict()
+
+    def get(self, key):
+        value = self.entries.pop(key, None)
+        if value is not None:
+            # move it to the most recently used end
+            self.entries[key] = value
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+_fmt_cache = _LRUCache(512)
+
+# the keys say which function made the entry and the type of the string, as
+# equal bytes and text strings (all of them on Python 2) hash the same
 def _fmt_bytes(string):
-    return _bytes(string).replace(b'%', b'%%')
+    key = ('b', type(string), string)
+    result = _fmt_cache.get(key)
+    if result is None:
+        result = _bytes(string).replace(b'%', b'%%')
+        _fmt_cache.put(key, result)
+    return result
 
 def _fmt_unicode(string):
-    return _unicode(string).replace(u'%', u'%%')
+    # returns a ready made wchar buffer, so printing the same text again
+    # skips both the escaping and ctypes' conversion of the string
+    key = ('u', type(string), string)
+    result = _fmt_cache.get(key)
+    if result is None:
+        result = create_unicode_buffer(_unicode(string).replace(u'%', u'%%'))
+        _fmt_cache.put(key, result)
+    return result
 
 if not hasattr(ctypes, "c_bool"):   # for Python < 2.6
     c_bool = c_uint8
 
 c_void = None
 
-try:  #import NumPy if available
-    import numpy
-    numpy_available = True
-except ImportError:
-    numpy_available = False
+# NumPy is only imported when an array path needs it, see _get_numpy.
+# numpy_available is set by the first _get_numpy call; reading it before
+# that imports NumPy through the module __getattr__ (Python 3.7+), older
+# Pythons resolve it when libtcodpy is imported.
+numpy = None
+_numpy_available = None
+
+def _get_numpy():
+    # returns whether NumPy is available, importing it on the first call
+    global numpy, numpy_available, _numpy_available
+    if _numpy_available is None:
+        try:
+            import numpy
+            _numpy_available = True
+        except ImportError:
+            _numpy_available = False
+        numpy_available = _numpy_available
+    return _numpy_available
+
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        if name == 'numpy_available':
+            return _get_numpy()
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+else:
+    _get_numpy()
 
 LINUX=False
 MAC=False
@@ -172,18 +238,21 @@ def _get_cdll(libname):
 
     raise Exception("unable to locate: "+ libname)
 
+# names of the functions that have to be called through their _wrapper
+# version, see _load_library
+_WRAPPED_FUNCTIONS = {}
+
 if sys.platform.find('linux') != -1:
-    _lib = _get_cdll('libtcod.so')
+    _LIBNAME = 'libtcod.so'
     LINUX=True
 elif sys.platform.find('darwin') != -1:
-    _lib = _get_cdll('libtcod.dylib')
+    _LIBNAME = 'libtcod.dylib'
     MAC = True
 elif sys.platform.find('haiku') != -1:
-    _lib = _get_cdll('libtcod.so')
+    _LIBNAME = 'libtcod.so'
     HAIKU = True
 else:
-    _get_cdll('SDL2.dll')
-    _lib = _get_cdll('libtcod.dll')
+    _LIBNAME = 'libtcod.dll'
     MSVC=True
     # On Windows, ctypes doesn't work well with function returning structs,
     # so we have to user the _wrapper functions instead
@@ -218,11 +287,107 @@ else:
         "TCOD_parser_get_color_property",
         "TCOD_console_set_key_color",
     ]:
-        wrapper_func = getattr(_lib, function_name +"_wrapper", None)
-        if wrapper_func is not None:
-            setattr(_lib, function_name, wrapper_func)
-        else:
-            raise Exception("unable to find wrapper", function_name)
+        _WRAPPED_FUNCTIONS[function_name] = function_name + "_wrapper"
+
+def _load_library():
+    # LIBTCODPY_BACKEND picks the implementation: "native" for the libtcod
+    # library, "python" for the pure-Python one in pybackend.py, or "auto"
+    # (the default) for the library if it can be loaded and Python otherwise
+    backend = os.environ.get('LIBTCODPY_BACKEND', 'auto')
+    if backend not in ('auto', 'native', 'python'):
+        raise ValueError('LIBTCODPY_BACKEND must be auto, native or python, not %r.' % backend)
+    if backend != 'python':
+        try:
+            if MSVC:
+                _get_cdll('SDL2.dll')
+            return _get_cdll(_LIBNAME)
+        except Exception:
+            if backend == 'native':
+                raise
+    from libtcodpy.pybackend import PythonBackend
+    return PythonBackend()
+
+class _Prototype:
+    # stands in for a libtcod function until it is first called. restype,
+    # argtypes and errcheck assigned to it are only recorded, and applied to
+    # the real function when it is looked up on the first call.
+    def __init__(self, lib, name):
+        self._lazy_lib = lib
+        self._name = name
+        self._func = None
+
+    def __call__(self, *args):
+        func = self._func
+        if func is None:
+            func = self._lazy_lib._resolve(self)
+        return func(*args)
+
+class _LazyLib:
+    # stands in for the libtcod CDLL. nothing is loaded at import time: the
+    # library is opened on the first call into it, and each function is
+    # looked up and gets its prototype on its own first call. after that the
+    # real ctypes function replaces the placeholder, so calls cost the same
+    # as with an eagerly bound library.
+    def __init__(self, loader):
+        self._loader = loader
+        self._cdll = None
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        proto = _Prototype(self, name)
+        setattr(self, name, proto)
+        return proto
+
+    def _load(self):
+        if self._cdll is None:
+            self._cdll = self._loader()
+        return self._cdll
+
+    def _resolve(self, proto):
+        cdll = self._load()
+        name = proto._name
+        if not isinstance(cdll, CDLL):
+            # the Python backend takes and returns Python values
+            func = getattr(cdll, name, None)
+            if func is None:
+                raise AttributeError('python backend: %s is not implemented' % name)
+            proto._func = func
+            setattr(self, name, func)
+            return func
+        wrapper = _WRAPPED_FUNCTIONS.get(name)
+        func = getattr(cdll, wrapper or name, None)
+        if func is None:
+            if wrapper is not None:
+                raise Exception("unable to find wrapper", name)
+            raise AttributeError('%s: undefined symbol %s' % (_LIBNAME, name))
+        for attr in ('restype', 'argtypes', 'errcheck'):
+            if attr in proto.__dict__:
+                setattr(func, attr, proto.__dict__[attr])
+        proto._func = func
+        setattr(self, name, func)
+        return func
+
+_lib = _LazyLib(_load_library)
+_lazy_lib = _lib # _lib may get wrapped, see profiler.py
+
+def backend_name():
+    # "native" or "python", whichever implementation _load_library picked.
+    # loads it if that hasn't happened yet.
+    return 'native' if isinstance(_lazy_lib._load(), CDLL) else 'python'
+
+def _private_function(name, restype):
+    # a function pointer of our own on the native library, without argtypes,
+    # for loops that convert their arguments once, or None on the Python
+    # backend. while _lib is wrapped its calls are counted like the others.
+    lib = _lazy_lib._load()
+    if not isinstance(lib, CDLL):
+        return None
+    func = lib[name]
+    func.restype = restype
+    if _lib is not _lazy_lib:
+        func = _lib._count_calls(name, func)
+    return func
 
 HEXVERSION = 0x010604
 STRVERSION = "1.6.4"
@@ -233,6 +398,26 @@ TECHVERSION = 0x01060400
 ############################
 
 
+# color arithmetic is done in Python, following libtcod's color.c: channels
+# are clamped to 0..255, and float math is rounded to single precision at the
+# same steps as the C code so the results are identical.
+def _f32(values):
+    # round a list of floats to single precision
+    return struct.unpack('%df' % len(values), struct.pack('%df' % len(values), *values))
+
+def _scale_channels(channels, value):
+    # (uint8)CLAMP(0.0f, 255.0f, c * value) for a list of channels
+    value = c_float(value).value
+    # clamping before rounding keeps huge values packable and can't change the result
+    scaled = _f32([min(max(c * value, -1.0), 256.0) for c in channels])
+    return [int(min(max(c, 0.0), 255.0)) for c in scaled]
+
+def _lerp_channels(a, b, coef):
+    # (uint8)(a + (b - a) * coef) for lists of channels and coefficients
+    products = _f32([(y - x) * k for x, y, k in zip(a, b, coef)])
+    sums = _f32([x + p for x, p in zip(a, products)])
+    return [int(v) & 0xff for v in sums]
+
 class Color(Structure):
     _fields_ = [('r', c_uint8),
                 ('g', c_uint8),
@@ -240,19 +425,26 @@ class Color(Structure):
                 ]
 
     def __eq__(self, c):
-        return _lib.TCOD_color_equals(self, c)
+        if not isinstance(c, Color):
+            return NotImplemented
+        return self.r == c.r and self.g == c.g and self.b == c.b
+
+    def __ne__(self, c):
+        if not isinstance(c, Color):
+            return NotImplemented
+        return self.r != c.r or self.g != c.g or self.b != c.b
 
     def __mul__(self, c):
         if isinstance(c,Color):
-            return _lib.TCOD_color_multiply(self, c)
+            return Color(self.r * c.r // 255, self.g * c.g // 255, self.b * c.b // 255)
         else:
-            return _lib.TCOD_color_multiply_scalar(self, c_float(c))
+            return Color(*_scale_channels((self.r, self.g, self.b), c))
 
     def __add__(self, c):
-        return _lib.TCOD_color_add(self, c)
+        return Color(min(self.r + c.r, 255), min(self.g + c.g, 255), min(self.b + c.b, 255))
 
     def __sub__(self, c):
-        return _lib.TCOD_color_subtract(self, c)
+        return Color(max(self.r - c.r, 0), max(self.g - c.g, 0), max(self.b - c.b, 0))
 
     def __repr__(self):
         return "Color(%d,%d,%d)" % (self.r, self.g, self.b)
@@ -521,7 +713,8 @@ peach=Color(255,159,127)
 # color functions
 _lib.TCOD_color_lerp.restype = Color
 def color_lerp(c1, c2, a):
-    return _lib.TCOD_color_lerp(c1, c2, c_float(a))
+    a = c_float(a).value
+    return Color(*_lerp_channels((c1.r, c1.g, c1.b), (c2.r, c2.g, c2.b), (a, a, a)))
 
 _lib.TCOD_color_set_HSV.restype=c_void
 _lib.TCOD_color_set_HSV.argtypes=[POINTER(Color),c_float , c_float , c_float ]
@@ -542,14 +735,216 @@ _lib.TCOD_color_scale_HSV.argtypes=[POINTER(Color), c_float , c_float ]
 def color_scale_HSV(c, scoef, vcoef) :
     _lib.TCOD_color_scale_HSV(byref(c),c_float(scoef),c_float(vcoef))
 
-_lib.TCOD_color_gen_map.restype=c_void
-_lib.TCOD_color_gen_map.argtypes=[POINTER(Color), c_int, POINTER(Color), POINTER(c_int)]
 def color_gen_map(colors, indexes):
-    ccolors = (Color * len(colors))(*colors)
-    cindexes = (c_int * len(indexes))(*indexes)
-    cres = (Color * (max(indexes) + 1))()
-    _lib.TCOD_color_gen_map(cres, len(colors), ccolors, cindexes)
-    return cres
+    # same steps as TCOD_color_gen_map: the colors between two keys are
+    # interpolated with color_lerp
+    res = ColorArray(max(indexes) + 1)
+    for i in range(len(colors) - 1):
+        start = indexes[i]
+        end = indexes[i + 1]
+        for idx in range(start, end + 1):
+            res[idx] = color_lerp(colors[i], colors[i + 1], float(idx - start) / (end - start))
+    return res
+
+class ColorArray:
+    # n colors packed in a bytearray as r, g, b bytes, which is also the
+    # memory layout of a ctypes Color array, so it can be handed to libtcod
+    # without copying. indexing returns Color copies.
+    def __init__(self, colors=0):
+        if isinstance(colors, int):
+            self.data = bytearray(3 * colors)
+        elif isinstance(colors, (bytes, bytearray)):
+            if len(colors) % 3:
+                raise ValueError('ColorArray: data length must be a multiple of 3.')
+            self.data = bytearray(colors)
+        else:
+            self.data = bytearray()
+            for col in colors:
+                self.data.extend(bytearray(col))
+
+    def __len__(self):
+        return len(self.data) // 3
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        return Color(*self.data[3 * i:3 * i + 3])
+
+    def __setitem__(self, i, col):
+        if i < 0:
+            i += len(self)
+        self.data[3 * i:3 * i + 3] = bytearray(col)
+
+    def __iter__(self):
+        data = self.data
+        for i in range(0, len(data), 3):
+            yield Color(data[i], data[i + 1], data[i + 2])
+
+    def __eq__(self, other):
+        return isinstance(other, ColorArray) and self.data == other.data
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'ColorArray(%r)' % list(self)
+
+    def as_ctypes(self):
+        # a (Color * n) array sharing the memory of this one
+        return (Color * len(self)).from_buffer(self.data)
+
+    def planes(self):
+        # the r, g and b channels as three lists, e.g. for console_fill_*
+        data = self.data
+        return list(data[0::3]), list(data[1::3]), list(data[2::3])
+
+    def packed(self):
+        # the colors as 0xRRGGBB ints
+        data = self.data
+        return [(r << 16) | (g << 8) | b for r, g, b in zip(data[0::3], data[1::3], data[2::3])]
+
+# bulk color operations. they work on whole ColorArrays at once and return a
+# new ColorArray; wherever a ColorArray is expected a single Color may be
+# given instead, and coefficients may be a number or one number per color.
+# add, multiply and lerp give the same results as the Color operations. the
+# HSV scaling follows libtcod's algorithm in double precision, with or
+# without NumPy, so it can be one off from color_scale_HSV now and then.
+
+def _bulk_size(*args):
+    n = None
+    for arg in args:
+        if isinstance(arg, (ColorArray, list, tuple)):
+            if n is not None and len(arg) != n:
+                raise TypeError('color arrays and coefficients must have the same size.')
+            n = len(arg)
+    if n is None:
+        raise TypeError('at least one argument must be a ColorArray.')
+    return n
+
+def _bulk_channels(col, n):
+    # a ColorArray or Color as a flat list of 3 * n channels
+    if isinstance(col, ColorArray):
+        return list(col.data)
+    return [col.r, col.g, col.b] * n
+
+def _bulk_coefs(coef, n):
+    # a number or sequence of numbers as a flat list of 3 * n floats
+    if isinstance(coef, (list, tuple)):
+        return [c_float(k).value for k in coef for i in range(3)]
+    return [c_float(coef).value] * (3 * n)
+
+def _numpy_channels(col, n):
+    if isinstance(col, ColorArray):
+        return numpy.frombuffer(col.data, dtype=numpy.uint8).reshape(n, 3)
+    return numpy.array([[col.r, col.g, col.b]], dtype=numpy.uint8)
+
+def _numpy_coefs(coef):
+    return numpy.asarray(coef, dtype=numpy.float32).reshape(-1, 1)
+
+def _from_numpy(channels):
+    return ColorArray(bytearray(numpy.ascontiguousarray(channels, dtype=numpy.uint8).tobytes()))
+
+def color_add_bulk(a, b):
+    n = _bulk_size(a, b)
+    if _get_numpy():
+        total = _numpy_channels(a, n).astype(numpy.int32) + _numpy_channels(b, n)
+        return _from_numpy(numpy.broadcast_to(numpy.minimum(total, 255), (n, 3)))
+    return ColorArray(bytearray([min(x + y, 255) for x, y in zip(_bulk_channels(a, n), _bulk_channels(b, n))]))
+
+def color_multiply_bulk(a, b):
+    # b is a Color or ColorArray (channel by channel product), or a number or
+    # sequence of numbers (scaling)
+    n = _bulk_size(a, b)
+    if isinstance(b, (Color, ColorArray)):
+        if _get_numpy():
+            product = _numpy_channels(a, n).astype(numpy.int32) * _numpy_channels(b, n) // 255
+            return _from_numpy(numpy.broadcast_to(product, (n, 3)))
+        return ColorArray(bytearray([x * y // 255 for x, y in zip(_bulk_channels(a, n), _bulk_channels(b, n))]))
+    if _get_numpy():
+        scaled = _numpy_channels(a, n).astype(numpy.float32) * _numpy_coefs(b)
+        return _from_numpy(numpy.broadcast_to(numpy.clip(scaled, 0.0, 255.0), (n, 3)))
+    a = _bulk_channels(a, n)
+    scaled = _f32([min(max(x * k, -1.0), 256.0) for x, k in zip(a, _bulk_coefs(b, n))])
+    return ColorArray(bytearray([int(min(max(x, 0.0), 255.0)) for x in scaled]))
+
+def color_lerp_bulk(a, b, coef):
+    n = _bulk_size(a, b, coef)
+    if _get_numpy():
+        a = _numpy_channels(a, n).astype(numpy.float32)
+        b = _numpy_channels(b, n).astype(numpy.float32)
+        result = (a + (b - a) * _numpy_coefs(coef)).astype(numpy.int32) & 0xff
+        return _from_numpy(numpy.broadcast_to(result, (n, 3)))
+    return ColorArray(bytearray(_lerp_channels(_bulk_channels(a, n), _bulk_channels(b, n),
+                                               _bulk_coefs(coef, n))))
+
+def color_scale_HSV_bulk(colors, scoef, vcoef):
+    # like color_scale_HSV on every color: saturation and value are scaled
+    # and clamped to 0..1, the hue is kept
+    n = _bulk_size(colors, scoef, vcoef)
+    if _get_numpy():
+        # the same operations in the same order as _rgb_to_hsv and
+        # _hsv_to_rgb, in float64, so both paths give the same colors
+        rgb = numpy.broadcast_to(_numpy_channels(colors, n).astype(numpy.int64), (n, 3))
+        r, g, b = rgb[:, 0], rgb[:, 1], rgb[:, 2]
+        top = rgb.max(axis=1)
+        hi = top / 255.0
+        delta = hi - rgb.min(axis=1) / 255.0
+        safe = numpy.where(delta > 0, delta, 1.0)
+        h = numpy.where(r == top, (g - b) / 255.0 / safe,
+                        numpy.where(g == top, 2.0 + (b - r) / 255.0 / safe, 4.0 + (r - g) / 255.0 / safe))
+        h = numpy.where(delta > 0, numpy.mod(h * 60.0, 360.0), 0.0)
+        s = numpy.where(delta > 0, delta / numpy.where(hi > 0, hi, 1.0), 0.0)
+        v = hi
+        s = numpy.clip(s * numpy.asarray(scoef, dtype=numpy.float64), 0.0, 1.0)
+        v = numpy.clip(v * numpy.asarray(vcoef, dtype=numpy.float64), 0.0, 1.0)
+        h = numpy.mod(h, 360.0) / 60.0
+        i = numpy.floor(h).astype(numpy.int32) % 6
+        f = h - numpy.floor(h)
+        p = v * (1 - s)
+        q = v * (1 - s * f)
+        t = v * (1 - s * (1 - f))
+        out = numpy.choose(i[:, None], [numpy.stack(x, axis=1) for x in
+                                        ((v, t, p), (q, v, p), (p, v, t), (p, q, v), (t, p, v), (v, p, q))])
+        return _from_numpy((out * 255.0 + 0.5).astype(numpy.int32))
+    result = ColorArray(n)
+    colors = colors if isinstance(colors, ColorArray) else [colors] * n
+    scoefs = scoef if isinstance(scoef, (list, tuple)) else [scoef] * n
+    vcoefs = vcoef if isinstance(vcoef, (list, tuple)) else [vcoef] * n
+    for i, (col, sk, vk) in enumerate(zip(colors, scoefs, vcoefs)):
+        h, s, v = _rgb_to_hsv(col.r, col.g, col.b)
+        result[i] = _hsv_to_rgb(h, min(max(s * sk, 0.0), 1.0), min(max(v * vk, 0.0), 1.0))
+    return result
+
+def _rgb_to_hsv(r, g, b):
+    # same steps as TCOD_color_get_HSV
+    hi = max(r, g, b) / 255.0
+    lo = min(r, g, b) / 255.0
+    delta = hi - lo
+    if hi == 0.0:
+        return 0.0, 0.0, 0.0
+    if delta == 0.0:
+        return 0.0, 0.0, hi
+    if r / 255.0 == hi:
+        h = (g - b) / 255.0 / delta
+    elif g / 255.0 == hi:
+        h = 2.0 + (b - r) / 255.0 / delta
+    else:
+        h = 4.0 + (r - g) / 255.0 / delta
+    return (h * 60.0) % 360.0, delta / hi, hi
+
+def _hsv_to_rgb(h, s, v):
+    # same steps as TCOD_color_set_HSV
+    if s == 0.0:
+        c = int(v * 255.0 + 0.5)
+        return c, c, c
+    h = (h % 360.0) / 60.0
+    i = int(math.floor(h))
+    f = h - i
+    p = v * (1.0 - s)
+    q = v * (1.0 - s * f)
+    t = v * (1.0 - s * (1.0 - f))
+    r, g, b = ((v, t, p), (q, v, p), (p, v, t), (p, q, v), (t, p, v), (v, p, q))[i % 6]
+    return int(r * 255.0 + 0.5), int(g * 255.0 + 0.5), int(b * 255.0 + 0.5)
 
 ############################
 # console module
@@ -568,13 +963,56 @@ class Key(Structure):
               ('shift', c_bool)
               ]
 
-class ConsoleBuffer:
+def _plane_property(name):
+    private = '_' + name
+    def get(self):
+        # the caller may write to the plane: take it out of the planes shared
+        # with copies, and make the next blit send every cell
+        if self._sharers[0] > 1:
+            self._unshare()
+        self._dirty_all = True
+        return getattr(self, private)
+    def set(self, values):
+        # replace the plane's values with width * height new ones
+        values = array.array('i', values)
+        if len(values) != self.width * self.height:
+            raise ValueError('ConsoleBuffer: a plane must have width * height values.')
+        if self._sharers[0] > 1:
+            self._unshare()
+        self._dirty_all = True
+        setattr(self, private, values)
+    return property(get, set)
+
+class ConsoleBuffer(object):
     # simple console that allows direct (fast) access to cells. simplifies
     # use of the "fill" functions.
+    # the seven planes (back_r ... char) are contiguous int32 arrays that are
+    # handed to libtcod without copying. copies share their planes until one
+    # of them is written to (copy on write). the planes can be written to
+    # directly, but the set_* methods are faster to blit afterwards: getting
+    # a plane makes the next blit refill the whole console.
+    # the buffer remembers which cells changed since the last blit. when few
+    # did, blit() only updates those cells of the destination; once more
+    # than diff_threshold of the cells changed it refills the whole console.
+    # "still holds" is tracked per destination, so blitting another buffer to
+    # the same console makes the next blit of this one a full refill. drawing
+    # on the destination with the console_* functions is not tracked: call
+    # invalidate() afterwards.
+    _planes = ('back_r', 'back_g', 'back_b', 'fore_r', 'fore_g', 'fore_b', 'char')
+    diff_threshold = 0.02
+    _blits = {}  # destination console -> _last_blit of the buffer that last filled it
+
+    back_r = _plane_property('back_r')
+    back_g = _plane_property('back_g')
+    back_b = _plane_property('back_b')
+    fore_r = _plane_property('fore_r')
+    fore_g = _plane_property('fore_g')
+    fore_b = _plane_property('fore_b')
+    char = _plane_property('char')
+
     def __init__(self, width, height, back_r=0, back_g=0, back_b=0, fore_r=0, fore_g=0, fore_b=0, char=' '):
         # initialize with given width and height. values to fill the buffer
         # are optional, defaults to black with no characters.
-        n = width * height
         self.width = width
         self.height = height
         self.clear(back_r, back_g, back_b, fore_r, fore_g, fore_b, char)
@@ -583,68 +1021,198 @@ class ConsoleBuffer:
         # clears the console. values to fill it with are optional, defaults
         # to black with no characters.
         n = self.width * self.height
-        self.back_r = [back_r] * n
-        self.back_g = [back_g] * n
-        self.back_b = [back_b] * n
-        self.fore_r = [fore_r] * n
-        self.fore_g = [fore_g] * n
-        self.fore_b = [fore_b] * n
-        self.char = [ord(char)] * n
+        if getattr(self, '_sharers', None) is not None:
+            # leave the planes shared with copies to them
+            self._sharers[0] -= 1
+        self._back_r = array.array('i', [back_r]) * n
+        self._back_g = array.array('i', [back_g]) * n
+        self._back_b = array.array('i', [back_b]) * n
+        self._fore_r = array.array('i', [fore_r]) * n
+        self._fore_g = array.array('i', [fore_g]) * n
+        self._fore_b = array.array('i', [fore_b]) * n
+        self._char = array.array('i', [ord(char)]) * n
+        self._sharers = [1]  # number of buffers sharing these planes
+        self._dirty = set()  # indexes of cells changed since the last blit
+        self._dirty_all = True
+        self._last_blit = None  # (dest, fill_fore, fill_back) of the last blit
 
     def copy(self):
-        # returns a copy of this ConsoleBuffer.
+        # returns a copy of this ConsoleBuffer. the planes are only really
+        # copied once either buffer is modified.
         other = ConsoleBuffer(0, 0)
         other.width = self.width
         other.height = self.height
-        other.back_r = list(self.back_r)  # make explicit copies of all lists
-        other.back_g = list(self.back_g)
-        other.back_b = list(self.back_b)
-        other.fore_r = list(self.fore_r)
-        other.fore_g = list(self.fore_g)
-        other.fore_b = list(self.fore_b)
-        other.char = list(self.char)
+        for name in self._planes:
+            setattr(other, '_' + name, getattr(self, '_' + name))
+        self._sharers[0] += 1
+        other._sharers = self._sharers
         return other
 
+    def _read_planes(self):
+        # the seven planes, for reading only: nothing is marked dirty
+        return [getattr(self, '_' + name) for name in self._planes]
+
+    def invalidate(self):
+        # make the next blit refill the whole destination, e.g. because
+        # something else drew over it in the meantime
+        self._dirty_all = True
+
+    def _mark_dirty(self, first, count, step=1, rows=1):
+        # mark rows runs of count cells dirty, the runs starting step apart
+        if self._dirty_all:
+            return
+        if count * rows > self.diff_threshold * self.width * self.height:
+            self._dirty_all = True
+            self._dirty.clear()
+            return
+        for start in range(first, first + step * rows, step):
+            self._dirty.update(range(start, start + count))
+
+    def _unshare(self):
+        # take a private copy of the planes before the first write
+        self._sharers[0] -= 1
+        self._sharers = [1]
+        for name in self._planes:
+            setattr(self, '_' + name, array.array('i', getattr(self, '_' + name)))
+
     def set_fore(self, x, y, r, g, b, char):
         # set the character and foreground color of one cell.
+        if self._sharers[0] > 1:
+            self._unshare()
         i = self.width * y + x
-        self.fore_r[i] = int(r)
-        self.fore_g[i] = int(g)
-        self.fore_b[i] = int(b)
-        self.char[i] = ord(char)
+        self._fore_r[i] = int(r)
+        self._fore_g[i] = int(g)
+        self._fore_b[i] = int(b)
+        self._char[i] = ord(char)
+        self._dirty.add(i)
 
     def set_back(self, x, y, r, g, b):
         # set the background color of one cell.
+        if self._sharers[0] > 1:
+            self._unshare()
         i = self.width * y + x
-        self.back_r[i] = int(r)
-        self.back_g[i] = int(g)
-        self.back_b[i] = int(b)
+        self._back_r[i] = int(r)
+        self._back_g[i] = int(g)
+        self._back_b[i] = int(b)
+        self._dirty.add(i)
 
     def set(self, x, y, back_r, back_g, back_b, fore_r, fore_g, fore_b, char):
         # set the background color, foreground color and character of one cell.
+        if self._sharers[0] > 1:
+            self._unshare()
         i = self.width * y + x
-        self.back_r[i] = int(back_r)
-        self.back_g[i] = int(back_g)
-        self.back_b[i] = int(back_b)
-        self.fore_r[i] = int(fore_r)
-        self.fore_g[i] = int(fore_g)
-        self.fore_b[i] = int(fore_b)
-        self.char[i] = ord(char)
+        self._back_r[i] = int(back_r)
+        self._back_g[i] = int(back_g)
+        self._back_b[i] = int(back_b)
+        self._fore_r[i] = int(fore_r)
+        self._fore_g[i] = int(fore_g)
+        self._fore_b[i] = int(fore_b)
+        self._char[i] = ord(char)
+        self._dirty.add(i)
+
+    def _fill_rect(self, x, y, w, h, values):
+        # fill a rectangle of some planes, values maps plane name -> int
+        if self._sharers[0] > 1:
+            self._unshare()
+        x0 = max(x, 0)
+        x1 = min(x + w, self.width)
+        y0 = max(y, 0)
+        y1 = min(y + h, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        span = x1 - x0
+        self._mark_dirty(self.width * y0 + x0, span, self.width, y1 - y0)
+        for name, value in values:
+            plane = getattr(self, '_' + name)
+            row = array.array('i', [int(value)]) * span
+            for i in range(self.width * y0 + x0, self.width * (y1 - 1) + x0 + 1, self.width):
+                plane[i:i + span] = row
+
+    def set_fore_rect(self, x, y, w, h, r, g, b, char):
+        # set the character and foreground color of a rectangle of cells.
+        self._fill_rect(x, y, w, h, (('fore_r', r), ('fore_g', g), ('fore_b', b), ('char', ord(char))))
+
+    def set_back_rect(self, x, y, w, h, r, g, b):
+        # set the background color of a rectangle of cells.
+        self._fill_rect(x, y, w, h, (('back_r', r), ('back_g', g), ('back_b', b)))
+
+    def set_rect(self, x, y, w, h, back_r, back_g, back_b, fore_r, fore_g, fore_b, char):
+        # set background, foreground and character of a rectangle of cells.
+        self._fill_rect(x, y, w, h, (('back_r', back_r), ('back_g', back_g), ('back_b', back_b),
+                                     ('fore_r', fore_r), ('fore_g', fore_g), ('fore_b', fore_b),
+                                     ('char', ord(char))))
+
+    def set_slice(self, start, back_r=None, back_g=None, back_b=None, fore_r=None, fore_g=None, fore_b=None, char=None):
+        # copy runs of values into the planes, starting at cell index start
+        # (width * y + x). each argument is a sequence of ints (for char, a
+        # string is accepted too); planes given as None are left alone.
+        if isinstance(char, bytes):
+            char = list(bytearray(char))
+        elif isinstance(char, str):
+            char = [ord(c) for c in char]
+        n = self.width * self.height
+        for values in (back_r, back_g, back_b, fore_r, fore_g, fore_b, char):
+            if values is not None and (start < 0 or start + len(values) > n):
+                raise ValueError('ConsoleBuffer.set_slice: the values go past the buffer.')
+        if self._sharers[0] > 1:
+            self._unshare()
+        for name, values in (('back_r', back_r), ('back_g', back_g), ('back_b', back_b),
+                             ('fore_r', fore_r), ('fore_g', fore_g), ('fore_b', fore_b),
+                             ('char', char)):
+            if values is not None:
+                if not isinstance(values, array.array) or values.typecode != 'i':
+                    values = array.array('i', values)
+                getattr(self, '_' + name)[start:start + len(values)] = values
+                self._mark_dirty(start, len(values))
 
     def blit(self, dest, fill_fore=True, fill_back=True):
         # use libtcod's "fill" functions to write the buffer to a console.
+        # the planes are passed to libtcod in place, nothing is copied.
+        # if the destination still holds the previous blit, only cells that
+        # changed since then are written.
+        if (self._last_blit == (dest, fill_fore, fill_back) and
+                ConsoleBuffer._blits.get(dest) is self._last_blit and not self._dirty_all and
+                len(self._dirty) <= self.diff_threshold * self.width * self.height):
+            if self._dirty:
+                self._blit_cells(dest, fill_fore, fill_back)
+            return
+
         if (console_get_width(dest) != self.width or
             console_get_height(dest) != self.height):
             raise ValueError('ConsoleBuffer.blit: Destination console has an incorrect size.')
 
-        s = struct.Struct('%di' % len(self.back_r))
-
+        n = self.width * self.height
         if fill_back:
-            _lib.TCOD_console_fill_background(c_void_p(dest), (c_int * len(self.back_r))(*self.back_r), (c_int * len(self.back_g))(*self.back_g), (c_int * len(self.back_b))(*self.back_b))
+            _lib.TCOD_console_fill_background(c_void_p(dest), (c_int * n).from_buffer(self._back_r), (c_int * n).from_buffer(self._back_g), (c_int * n).from_buffer(self._back_b))
 
         if fill_fore:
-            _lib.TCOD_console_fill_foreground(c_void_p(dest), (c_int * len(self.fore_r))(*self.fore_r), (c_int * len(self.fore_g))(*self.fore_g), (c_int * len(self.fore_b))(*self.fore_b))
-            _lib.TCOD_console_fill_char(c_void_p(dest), (c_int * len(self.char))(*self.char))
+            _lib.TCOD_console_fill_foreground(c_void_p(dest), (c_int * n).from_buffer(self._fore_r), (c_int * n).from_buffer(self._fore_g), (c_int * n).from_buffer(self._fore_b))
+            _lib.TCOD_console_fill_char(c_void_p(dest), (c_int * n).from_buffer(self._char))
+
+        self._last_blit = (dest, fill_fore, fill_back)
+        ConsoleBuffer._blits[dest] = self._last_blit
+        self._dirty_all = False
+        self._dirty.clear()
+
+    def _blit_cells(self, dest, fill_fore, fill_back):
+        # write only the dirty cells, one call per cell
+        width = self.width
+        con = c_void_p(dest)
+        for i in self._dirty:
+            y, x = divmod(i, width)
+            if fill_fore and fill_back:
+                _lib.TCOD_console_put_char_ex(con, x, y, self._char[i],
+                                              Color(self._fore_r[i], self._fore_g[i], self._fore_b[i]),
+                                              Color(self._back_r[i], self._back_g[i], self._back_b[i]))
+            elif fill_back:
+                _lib.TCOD_console_set_char_background(con, x, y,
+                                                      Color(self._back_r[i], self._back_g[i], self._back_b[i]),
+                                                      BKGND_SET)
+            elif fill_fore:
+                _lib.TCOD_console_set_char_foreground(con, x, y,
+                                                      Color(self._fore_r[i], self._fore_g[i], self._fore_b[i]))
+                _lib.TCOD_console_set_char(con, x, y, self._char[i])
+        self._dirty.clear()
 
 _lib.TCOD_console_is_fullscreen.restype = c_bool
 _lib.TCOD_console_is_window_closed.restype = c_bool
@@ -872,6 +1440,7 @@ _lib.TCOD_console_init_root.restype=c_void
 _lib.TCOD_console_init_root.argtypes=[c_int, c_int, c_char_p , c_bool , c_uint ]
 def console_init_root(w, h, title, fullscreen=False, renderer=RENDERER_SDL):
     _lib.TCOD_console_init_root(w, h, convert_to_ascii(title), fullscreen, renderer)
+    _height_cache.clear()
 
 _lib.TCOD_console_set_custom_font.restype=c_void
 _lib.TCOD_console_set_custom_font.argtypes=[c_char_p, c_int,c_int, c_int]
@@ -1010,6 +1579,92 @@ def console_set_char(con, x, y, c):
     else:
         _lib.TCOD_console_set_char(con, x, y, c)
 
+# bulk drawing. each of these applies one change to many cells: xs and ys are
+# parallel sequences of coordinates, and the char and color arguments are
+# either a single value used for every cell or a sequence of the same length.
+# libtcod has no multi-cell entry point, so there is still one native call per
+# cell, but the argument conversion and function lookups are done once per
+# batch instead of once per cell.
+
+def _bulk_chars(c, n):
+    if type(c) == int or ((type(c) == str or type(c) == bytes) and len(c) == 1):
+        c = [c]
+    if len(c) == 1:
+        c = list(c) * n
+    elif len(c) != n:
+        raise TypeError('chars and coordinates must have the same size.')
+    return [ord(ch) if type(ch) == str or type(ch) == bytes else ch for ch in c]
+
+def _bulk_colors(col, n):
+    # a Color or (r, g, b) for every cell, or a sequence of one color per cell
+    if isinstance(col, Color):
+        return [col] * n
+    if len(col) and not isinstance(col[0], Color) and not hasattr(col[0], '__len__'):
+        return [Color(*col)] * n
+    if len(col) != n:
+        raise TypeError('colors and coordinates must have the same size.')
+    return [ch if isinstance(ch, Color) else Color(*ch) for ch in col]
+
+def _bulk_coords(xs, ys):
+    if len(xs) != len(ys):
+        raise TypeError('xs and ys must have the same size.')
+    return len(xs)
+
+def console_put_char_bulk(con, xs, ys, c, flag=BKGND_DEFAULT):
+    n = _bulk_coords(xs, ys)
+    put = _lib.TCOD_console_put_char
+    con = c_void_p(con)
+    for x, y, ch in zip(xs, ys, _bulk_chars(c, n)):
+        put(con, x, y, ch, flag)
+
+def console_put_char_ex_bulk(con, xs, ys, c, fore, back=None, flag=BKGND_SET):
+    # with back=None the background of the cells is left untouched, like
+    # console_put_char with BKGND_NONE but with a color per cell. otherwise
+    # back is applied with flag, BKGND_SET like console_put_char_ex.
+    n = _bulk_coords(xs, ys)
+    con = c_void_p(con)
+    chars = _bulk_chars(c, n)
+    fores = _bulk_colors(fore, n)
+    if back is None:
+        set_fore = _lib.TCOD_console_set_char_foreground
+        set_char = _lib.TCOD_console_set_char
+        for x, y, ch, f in zip(xs, ys, chars, fores):
+            set_fore(con, x, y, f)
+            set_char(con, x, y, ch)
+    elif flag == BKGND_SET:
+        put = _lib.TCOD_console_put_char_ex
+        for x, y, ch, f, b in zip(xs, ys, chars, fores, _bulk_colors(back, n)):
+            put(con, x, y, ch, f, b)
+    else:
+        set_back = _lib.TCOD_console_set_char_background
+        set_fore = _lib.TCOD_console_set_char_foreground
+        set_char = _lib.TCOD_console_set_char
+        for x, y, ch, f, b in zip(xs, ys, chars, fores, _bulk_colors(back, n)):
+            set_back(con, x, y, b, flag)
+            set_fore(con, x, y, f)
+            set_char(con, x, y, ch)
+
+def console_set_char_bulk(con, xs, ys, c):
+    n = _bulk_coords(xs, ys)
+    set_char = _lib.TCOD_console_set_char
+    con = c_void_p(con)
+    for x, y, ch in zip(xs, ys, _bulk_chars(c, n)):
+        set_char(con, x, y, ch)
+
+def console_set_char_foreground_bulk(con, xs, ys, col):
+    n = _bulk_coords(xs, ys)
+    set_fore = _lib.TCOD_console_set_char_foreground
+    con = c_void_p(con)
+    for x, y, f in zip(xs, ys, _bulk_colors(col, n)):
+        set_fore(con, x, y, f)
+
+def console_set_char_background_bulk(con, xs, ys, col, flag=BKGND_SET):
+    n = _bulk_coords(xs, ys)
+    set_back = _lib.TCOD_console_set_char_background
+    con = c_void_p(con)
+    for x, y, b in zip(xs, ys, _bulk_colors(col, n)):
+        set_back(con, x, y, b, flag)
+
 _lib.TCOD_console_set_background_flag.restype=c_void
 _lib.TCOD_console_set_background_flag.argtypes=[c_void_p ,c_int ]
 def console_set_background_flag(con, flag):
@@ -1051,11 +1706,21 @@ _lib.TCOD_console_print_rect_ex_utf.argtypes=[c_void_p, c_int, c_int, c_int, c_i
 def console_print_rect_ex(con, x, y, w, h, flag, alignment, fmt):
     return _lib.TCOD_console_print_rect_ex_utf(con, x, y, w, h, flag, alignment, _fmt_unicode(fmt))
 
+# measured heights by (con, x, y, w, h, text). the result only depends on
+# these and the console's size, so entries are dropped when a console is
+# deleted (its handle may be reused) and when the root console is created.
+_height_cache = _LRUCache(256)
+
 _lib.TCOD_console_get_height_rect.argtypes=[c_void_p, c_int, c_int, c_int, c_int, c_char_p]
 _lib.TCOD_console_get_height_rect_utf.argtypes=[c_void_p, c_int, c_int, c_int, c_int, c_wchar_p]
 def console_get_height_rect(con, x, y, w, h, fmt):
-    return _lib.TCOD_console_get_height_rect_utf(con, x, y, w, h,
-                                                 _fmt_unicode(fmt))
+    key = (con, x, y, w, h, type(fmt), fmt)
+    height = _height_cache.get(key)
+    if height is None:
+        height = _lib.TCOD_console_get_height_rect_utf(con, x, y, w, h,
+                                                       _fmt_unicode(fmt))
+        _height_cache.put(key, height)
+    return height
 
 _lib.TCOD_console_rect.argtypes=[ c_void_p, c_int, c_int, c_int, c_int, c_bool, c_int ]
 def console_rect(con, x, y, w, h, clr, flag=BKGND_DEFAULT):
@@ -1182,66 +1847,73 @@ def console_set_dirty(x, y, w, h):
 _lib.TCOD_console_delete.argtypes=[c_void_p ]
 def console_delete(con):
     _lib.TCOD_console_delete(con)
+    for key in [key for key in _height_cache.entries if key[0] == con]:
+        del _height_cache.entries[key]
+    ConsoleBuffer._blits.pop(con, None)
 
 # fast color filling
-_lib.TCOD_console_fill_foreground.restype=c_void
-_lib.TCOD_console_fill_foreground.argtypes=[c_void_p , POINTER(c_int), POINTER(c_int), POINTER(c_int)]
-def console_fill_foreground(con,r,g,b) :
-    if len(r) != len(g) or len(r) != len(b):
-        raise TypeError('R, G and B must all have the same size.')
 
-    if (numpy_available and isinstance(r, numpy.ndarray) and
-        isinstance(g, numpy.ndarray) and isinstance(b, numpy.ndarray)):
+# buffer formats that hold a native 4 byte int
+_INT32_FORMATS = ('i', '@i', '=i', 'l', '@l', '=l', '<i' if sys.byteorder == 'little' else '>i')
+
+def _int_buffer(values):
+    # returns (ctypes int array, length) for values. C-contiguous int32
+    # buffers (array.array('i'), memoryviews cast to 'i', numpy int32 arrays)
+    # are passed through without copying; anything else is converted.
+    # an ndarray can only be passed in if NumPy was already imported
+    np = sys.modules.get('numpy')
+    if np is not None and isinstance(values, np.ndarray):
         #numpy arrays, use numpy's ctypes functions
-        r = numpy.ascontiguousarray(r, dtype=numpy.int32)
-        g = numpy.ascontiguousarray(g, dtype=numpy.int32)
-        b = numpy.ascontiguousarray(b, dtype=numpy.int32)
-        cr = r.ctypes.data_as(POINTER(c_int))
-        cg = g.ctypes.data_as(POINTER(c_int))
-        cb = b.ctypes.data_as(POINTER(c_int))
-    else:
-        # otherwise convert using ctypes arrays
-        cr = (c_int * len(r))(*r)
-        cg = (c_int * len(g))(*g)
-        cb = (c_int * len(b))(*b)
+        values = np.ascontiguousarray(values, dtype=np.int32)
+        return values.ctypes.data_as(POINTER(c_int)), values.size
+
+    try:
+        view = memoryview(values)
+    except TypeError:
+        view = None
+    if (view is not None and view.itemsize == 4 and view.c_contiguous and
+        view.format in _INT32_FORMATS):
+        n = view.nbytes // 4
+        if view.readonly:
+            # can't share read-only memory, but a copy is still a single memcpy
+            return (c_int * n).from_buffer_copy(view), n
+        return (c_int * n).from_buffer(view), n
+
+    # otherwise convert using ctypes arrays
+    return (c_int * len(values))(*values), len(values)
+
+def _fill_planes(con, planes):
+    # check that the planes (r, g and b, or char alone) have the same size
+    # and cover the console
+    arrays = [_int_buffer(plane) for plane in planes]
+    n = arrays[0][1]
+    for carr, size in arrays:
+        if size != n:
+            raise TypeError('R, G and B must all have the same size.')
+    if n < console_get_width(con) * console_get_height(con):
+        if len(arrays) == 1:
+            raise TypeError('The char array is smaller than the console.')
+        raise TypeError('The R, G and B arrays are smaller than the console.')
+    return [carr for carr, size in arrays]
 
+_lib.TCOD_console_fill_foreground.restype=c_void
+_lib.TCOD_console_fill_foreground.argtypes=[c_void_p , POINTER(c_int), POINTER(c_int), POINTER(c_int)]
+def console_fill_foreground(con,r,g,b) :
+    cr, cg, cb = _fill_planes(con, (r, g, b))
     _lib.TCOD_console_fill_foreground(c_void_p(con), cr, cg, cb)
 
 _lib.TCOD_console_fill_background.restype=c_void
 _lib.TCOD_console_fill_background.argtypes=[c_void_p , POINTER(c_int), POINTER(c_int), POINTER(c_int)]
 
 def console_fill_background(con,r,g,b) :
-    if len(r) != len(g) or len(r) != len(b):
-        raise TypeError('R, G and B must all have the same size.')
-
-    if (numpy_available and isinstance(r, numpy.ndarray) and
-        isinstance(g, numpy.ndarray) and isinstance(b, numpy.ndarray)):
-        #numpy arrays, use numpy's ctypes functions
-        r = numpy.ascontiguousarray(r, dtype=numpy.int32)
-        g = numpy.ascontiguousarray(g, dtype=numpy.int32)
-        b = numpy.ascontiguousarray(b, dtype=numpy.int32)
-        cr = r.ctypes.data_as(POINTER(c_int))
-        cg = g.ctypes.data_as(POINTER(c_int))
-        cb = b.ctypes.data_as(POINTER(c_int))
-    else:
-        # otherwise convert using ctypes arrays
-        cr = (c_int * len(r))(*r)
-        cg = (c_int * len(g))(*g)
-        cb = (c_int * len(b))(*b)
-
+    cr, cg, cb = _fill_planes(con, (r, g, b))
     _lib.TCOD_console_fill_background(c_void_p(con), cr, cg, cb)
 
 
 _lib.TCOD_console_fill_char.restype=c_void
 _lib.TCOD_console_fill_char.argtypes=[c_void_p , POINTER(c_int)]
 def console_fill_char(con,arr) :
-    if (numpy_available and isinstance(arr, numpy.ndarray) ):
-        #numpy arrays, use numpy's ctypes functions
-        arr = numpy.ascontiguousarray(arr, dtype=numpy.int32)
-        carr = arr.ctypes.data_as(POINTER(c_int))
-    else:
-        carr = (c_int * len(arr))(*arr)
-
+    carr, = _fill_planes(con, (arr,))
     _lib.TCOD_console_fill_char(c_void_p(con), carr)
 
 _lib.TCOD_console_load_asc.restype=c_bool
@@ -1484,6 +2156,111 @@ def line_iter(xo, yo, xd, yd):
         yield x.value, y.value
         done = _lib.TCOD_line_step_mt(byref(x), byref(y), data)
 
+# bulk lines. xo, yo, xd and yd are parallel sequences (or NumPy arrays) with
+# one line per index, a single number is used for every line. the cells are
+# the ones line_iter gives, computed in closed form instead of stepping:
+# after k steps along the longer axis (y when both are as long) the shorter
+# one has moved max(0, ceil((2k*minor - major) / (2*major))) cells.
+# results are NumPy arrays when NumPy is available, array.array otherwise.
+
+def _coord_count(*args):
+    n = None
+    for arg in args:
+        if hasattr(arg, '__len__'):
+            if n is not None and len(arg) != n:
+                raise TypeError('coordinate sequences must have the same size.')
+            n = len(arg)
+    return 1 if n is None else n
+
+def _coord_args(xo, yo, xd, yd):
+    # the four coordinates as lists of the same size
+    n = _coord_count(xo, yo, xd, yd)
+    return [[int(v) for v in arg] if hasattr(arg, '__len__') else [int(arg)] * n
+            for arg in (xo, yo, xd, yd)]
+
+def _numpy_lines(xo, yo, xd, yd):
+    # (xs, ys, line index of each cell, step of each cell, starts) as arrays
+    n = _coord_count(xo, yo, xd, yd)
+    xo, yo, xd, yd = [numpy.broadcast_to(numpy.asarray(a, dtype=numpy.int64).ravel(), (n,))
+                      for a in (xo, yo, xd, yd)]
+    dx = xd - xo
+    dy = yd - yo
+    adx = numpy.abs(dx)
+    ady = numpy.abs(dy)
+    x_major = adx > ady
+    major = numpy.where(x_major, adx, ady)
+    minor = numpy.where(x_major, ady, adx)
+    lengths = major + 1
+    starts = numpy.zeros(n + 1, dtype=numpy.int64)
+    numpy.cumsum(lengths, out=starts[1:])
+    line = numpy.repeat(numpy.arange(n), lengths)
+    k = numpy.arange(starts[-1]) - starts[line]
+    # ceil(a / b) is -(-a // b); major is 0 only for single cell lines
+    m_major = major[line]
+    a = 2 * k * minor[line] - m_major
+    moved = numpy.maximum(0, -(-a // numpy.maximum(2 * m_major, 1)))
+    along = numpy.where(x_major[line], k, moved)
+    across = numpy.where(x_major[line], moved, k)
+    xs = xo[line] + numpy.sign(dx)[line] * along
+    ys = yo[line] + numpy.sign(dy)[line] * across
+    return xs, ys, line, k, starts
+
+def _python_line(xo, yo, xd, yd):
+    # the cells of one line as two lists
+    dx = xd - xo
+    dy = yd - yo
+    sx = (dx > 0) - (dx < 0)
+    sy = (dy > 0) - (dy < 0)
+    major, minor = (abs(dx), abs(dy)) if abs(dx) > abs(dy) else (abs(dy), abs(dx))
+    moved = [max(0, -(-(2 * k * minor - major) // (2 * major))) if major else 0
+             for k in range(major + 1)]
+    if abs(dx) > abs(dy):
+        return ([xo + sx * k for k in range(major + 1)], [yo + sy * m for m in moved])
+    return ([xo + sx * m for m in moved], [yo + sy * k for k in range(major + 1)])
+
+def line_bulk(xo, yo, xd, yd):
+    # the cells of many lines at once: returns (xs, ys, starts) where the
+    # cells of line i are xs[starts[i]:starts[i + 1]], ys[...], from the
+    # origin to the destination, both included
+    if _get_numpy():
+        xs, ys, line, k, starts = _numpy_lines(xo, yo, xd, yd)
+        return xs.astype(numpy.int32), ys.astype(numpy.int32), starts.astype(numpy.int32)
+    xs = array.array('i')
+    ys = array.array('i')
+    starts = array.array('i', [0])
+    for args in zip(*_coord_args(xo, yo, xd, yd)):
+        lxs, lys = _python_line(*args)
+        xs.extend(lxs)
+        ys.extend(lys)
+        starts.append(len(xs))
+    return xs, ys, starts
+
+def line_of_sight_bulk(transparent, width, xo, yo, xd, yd):
+    # whether each line is clear: every cell between the origin and the
+    # destination, both excluded, is transparent. transparent is row major
+    # (cell x, y at x + y * width), e.g. a flat list of bools or a NumPy
+    # array of shape (height, width). returns a bool per line, as 0 or 1 in
+    # an array('b') without NumPy.
+    if _get_numpy():
+        grid = numpy.asarray(transparent, dtype=bool).ravel()
+        xs, ys, line, k, starts = _numpy_lines(xo, yo, xd, yd)
+        offsets = xs + ys * width
+        if len(offsets) and (xs.min() < 0 or xs.max() >= width or
+                             offsets.min() < 0 or offsets.max() >= grid.size):
+            raise ValueError('lines must be inside the grid.')
+        inner = (k > 0) & (k < (starts[1:] - starts[:-1] - 1)[line])
+        blocked = numpy.bincount(line[inner & ~grid[offsets]], minlength=len(starts) - 1)
+        return blocked == 0
+    clear = array.array('b')
+    size = len(transparent)
+    for args in zip(*_coord_args(xo, yo, xd, yd)):
+        lxs, lys = _python_line(*args)
+        for x, y in zip(lxs, lys):
+            if not 0 <= x < width or not 0 <= x + y * width < size:
+                raise ValueError('lines must be inside the grid.')
+        clear.append(all(transparent[x + y * width] for x, y in zip(lxs[1:-1], lys[1:-1])))
+    return clear
+
 ############################
 # image module
 ############################
@@ -1974,6 +2751,97 @@ _lib.TCOD_random_delete.argtypes=[c_void_p ]
 def random_delete(rnd):
     _lib.TCOD_random_delete(rnd)
 
+# many draws in one call, e.g. every position of a level's monsters. the
+# draws come out of rnd in the same order as with one random_get_* call per
+# draw, so switching to them keeps seeded games the same. mi and ma are
+# numbers, or sequences with a range per draw; count is needed when both are
+# numbers. the results are an array('i') (array('f') for floats, which
+# numpy.frombuffer gives a view of) or are written to out, an array.array,
+# list or NumPy array of count items.
+
+def _random_args(mi, ma, count):
+    n = count
+    for arg in (mi, ma):
+        if hasattr(arg, '__len__'):
+            if n is not None and len(arg) != n:
+                raise TypeError('mi, ma and count must give the same number of draws.')
+            n = len(arg)
+    if n is None:
+        raise TypeError('count is needed when mi and ma are numbers.')
+    return [list(arg) if hasattr(arg, '__len__') else [arg] * n for arg in (mi, ma)]
+
+def _random_out(values, out):
+    if out is None:
+        return values
+    size = out.size if hasattr(out, 'size') else len(out)
+    if size != len(values):
+        raise TypeError('out must have one item per draw.')
+    if isinstance(out, array.array):
+        out[:] = array.array(out.typecode, values)
+    else:
+        out[:] = values.tolist()
+    return out
+
+def random_get_ints(rnd, mi, ma, count=None, out=None):
+    mi, ma = _random_args(mi, ma, count)
+    get = _private_function('TCOD_random_get_int', c_int)
+    if get is not None:
+        rnd = c_void_p(rnd)
+        values = array.array('i', [get(rnd, int(a), int(b)) for a, b in zip(mi, ma)])
+    else:
+        gen = _lazy_lib._load()._random(rnd)
+        values = array.array('i', [gen.get_int(int(a), int(b)) for a, b in zip(mi, ma)])
+    return _random_out(values, out)
+
+def random_get_floats(rnd, mi, ma, count=None, out=None):
+    mi, ma = _random_args(mi, ma, count)
+    get = _private_function('TCOD_random_get_float', c_float)
+    if get is not None:
+        rnd = c_void_p(rnd)
+        values = array.array('f', [get(rnd, c_float(a), c_float(b)) for a, b in zip(mi, ma)])
+    else:
+        gen = _lazy_lib._load()._random(rnd)
+        values = array.array('f', [gen.get_double(a, b) for a, b in zip(mi, ma)])
+    return _random_out(values, out)
+
+def random_dice_rolls(rnd, s, count, out=None):
+    # count rolls of the dice string s, such as '3d6+1'
+    get = _private_function('TCOD_random_dice_roll_s', c_int)
+    if get is not None:
+        rnd = c_void_p(rnd)
+        s = c_char_p(convert_to_ascii(s))
+        values = array.array('i', [get(rnd, s) for i in range(count)])
+    else:
+        from libtcodpy.pybackend import _dice_new
+        gen = _lazy_lib._load()._random(rnd)
+        dice = _dice_new(s)
+        values = array.array('i', [gen.dice_roll(dice) for i in range(count)])
+    return _random_out(values, out)
+
+# independent generators, for map generation split between workers or kept
+# apart from the rest of the game's draws
+
+def random_split(rnd, count, algo=RNG_CMWC):
+    # count new generators, seeded with count draws from rnd
+    return [random_new_from_seed(seed, algo)
+            for seed in random_get_ints(rnd, 0, 0x7fffffff, count)]
+
+def random_stream_seed(seed, key):
+    # the seed of stream key (an int or a string) of a game seeded with seed.
+    # it depends on nothing else, so a worker given seed and key recreates
+    # the same stream without drawing from any generator.
+    if not isinstance(key, int):
+        key = zlib.crc32(key.encode('utf-8'))
+    x = ((seed & 0xffffffff) << 32 | (key & 0xffffffff)) + 0x9e3779b97f4a7c15
+    # splitmix64's finalizer
+    x &= 0xffffffffffffffff
+    x = ((x ^ (x >> 30)) * 0xbf58476d1ce4e5b9) & 0xffffffffffffffff
+    x = ((x ^ (x >> 27)) * 0x94d049bb133111eb) & 0xffffffffffffffff
+    return (x ^ (x >> 31)) & 0xffffffff
+
+def random_new_stream(seed, key, algo=RNG_CMWC):
+    return random_new_from_seed(random_stream_seed(seed, key), algo)
+
 
 ############################
 # noise module
@@ -2033,6 +2901,79 @@ _lib.TCOD_noise_delete.argtypes=[c_void_p ]
 def noise_delete(n):
     _lib.TCOD_noise_delete(n)
 
+# noise over many points at once. coords holds one point per row: a list of
+# tuples, or a NumPy array of shape (..., dim) such as the one noise_grid
+# returns. the result has one value per point, with the shape of coords
+# without its last axis (a flat array('f') without NumPy), or it is written
+# to out, a NumPy float array, array.array or list of the same size. the
+# library samples one point per call, so this saves the packing of each
+# point into a new float array and the conversion of the arguments rather
+# than the calls themselves.
+
+def noise_grid(origin, step, shape):
+    # the points of a regular 2D grid: shape is (h, w) and point (i, j) is
+    # (origin[0] + j * step[0], origin[1] + i * step[1]). a NumPy array of
+    # shape (h, w, 2), or a list of h * w tuples, row by row, without NumPy.
+    h, w = shape
+    if _get_numpy():
+        grid = numpy.empty((h, w, 2), dtype=numpy.float32)
+        grid[..., 0] = origin[0] + numpy.arange(w) * step[0]
+        grid[..., 1] = (origin[1] + numpy.arange(h) * step[1])[:, numpy.newaxis]
+        return grid
+    return [(origin[0] + j * step[0], origin[1] + i * step[1])
+            for i in range(h) for j in range(w)]
+
+def _noise_bulk(name, n, coords, args, out):
+    if _get_numpy():
+        coords = numpy.asarray(coords, dtype=numpy.float32)
+        if coords.ndim == 1:
+            coords = coords[:, numpy.newaxis]
+        shape = coords.shape[:-1]
+        points = coords.reshape(-1, coords.shape[-1]).tolist()
+    else:
+        points = [tuple(f) if hasattr(f, '__len__') else (f,) for f in coords]
+        shape = (len(points),)
+    dim = len(points[0]) if points else 1
+    if out is not None:
+        size = out.size if hasattr(out, 'size') else len(out)
+        if size != len(points):
+            raise TypeError('out must have one item per point.')
+    f = _NOISE_PACKER_FUNC[dim]()
+    get = _private_function(name, c_float)
+    if get is not None:
+        n = c_void_p(n)
+        args = tuple(c_float(a) if isinstance(a, float) else c_int(a) for a in args)
+    else:
+        get = getattr(_lib, name)
+    values = array.array('f', [0.0]) * len(points)
+    for i, point in enumerate(points):
+        f[:] = point
+        values[i] = get(n, f, *args)
+    if _get_numpy():
+        values = numpy.frombuffer(values, dtype=numpy.float32).reshape(shape)
+        if out is None:
+            return values
+        if hasattr(out, 'shape'):
+            out[...] = values.reshape(out.shape)
+            return out
+        values = values.ravel().tolist()
+    elif out is None:
+        return values
+    if isinstance(out, array.array):
+        out[:] = array.array(out.typecode, values)
+    else:
+        out[:] = values
+    return out
+
+def noise_get_bulk(n, coords, typ=NOISE_DEFAULT, out=None):
+    return _noise_bulk('TCOD_noise_get_ex', n, coords, (typ,), out)
+
+def noise_get_fbm_bulk(n, coords, oc, typ=NOISE_DEFAULT, out=None):
+    return _noise_bulk('TCOD_noise_get_fbm_ex', n, coords, (float(oc), typ), out)
+
+def noise_get_turbulence_bulk(n, coords, oc, typ=NOISE_DEFAULT, out=None):
+    return _noise_bulk('TCOD_noise_get_turbulence_ex', n, coords, (float(oc), typ), out)
+
 ############################
 # fov module
 ############################
@@ -2129,6 +3070,23 @@ def map_get_nb_cells(map):
 
 PATH_CBK_FUNC = CFUNCTYPE(c_float, c_int, c_int, c_int, c_int, py_object)
 
+# paths and dijkstra maps made from a cost grid are searched in Python by the
+# classes in pathing.py, whatever the backend; the path_* and dijkstra_*
+# functions hand them to their search object instead of the library
+
+def _cost_grid(w, h, costs):
+    size = costs.size if hasattr(costs, 'size') else len(costs)
+    if size != w * h:
+        raise TypeError('the cost grid must have w * h cells.')
+    return costs
+
+def path_new_using_costs(w, h, costs, dcost=1.41):
+    # costs is row major (cell x, y at x + y * w), the cost of moving into
+    # each cell, 0 or less for impassable cells. a list, array.array or NumPy
+    # array may be given, it is read again at each path_compute so it can be
+    # updated in place (e.g. for cells occupied by monsters).
+    return (_pathing.AStar(w, h, None, dcost, _cost_grid(w, h, costs)), costs)
+
 _lib.TCOD_path_new_using_map.restype=c_void_p
 _lib.TCOD_path_new_using_map.argtypes=[c_void_p , c_float ]
 def path_new_using_map(m, dcost=1.41):
@@ -2145,11 +3103,15 @@ def path_new_using_function(w, h, func, userdata=0, dcost=1.41):
 _lib.TCOD_path_compute.restype = c_bool
 _lib.TCOD_path_compute.argtypes=[c_void_p , c_int,c_int, c_int, c_int]
 def path_compute(p, ox, oy, dx, dy):
+    if isinstance(p[0], _pathing.AStar):
+        return p[0].compute(ox, oy, dx, dy)
     return _lib.TCOD_path_compute(p[0], ox, oy, dx, dy)
 
 _lib.TCOD_path_get_origin.restype=c_void
 _lib.TCOD_path_get_origin.argtypes=[c_void_p , POINTER(c_int), POINTER(c_int)]
 def path_get_origin(p):
+    if isinstance(p[0], _pathing.AStar):
+        return p[0].ox, p[0].oy
     x = c_int()
     y = c_int()
     _lib.TCOD_path_get_origin(p[0], byref(x), byref(y))
@@ -2158,6 +3120,8 @@ def path_get_origin(p):
 _lib.TCOD_path_get_destination.restype=c_void
 _lib.TCOD_path_get_destination.argtypes=[c_void_p , POINTER(c_int), POINTER(c_int)]
 def path_get_destination(p):
+    if isinstance(p[0], _pathing.AStar):
+        return p[0].dx, p[0].dy
     x = c_int()
     y = c_int()
     _lib.TCOD_path_get_destination(p[0], byref(x), byref(y))
@@ -2166,16 +3130,22 @@ def path_get_destination(p):
 _lib.TCOD_path_size.restype=c_int
 _lib.TCOD_path_size.argtypes=[c_void_p ]
 def path_size(p):
+    if isinstance(p[0], _pathing.AStar):
+        return len(p[0].steps)
     return _lib.TCOD_path_size(p[0])
 
 _lib.TCOD_path_reverse.restype=c_void
 _lib.TCOD_path_reverse.argtypes=[c_void_p ]
 def path_reverse(p):
+    if isinstance(p[0], _pathing.AStar):
+        return p[0].reverse()
     _lib.TCOD_path_reverse(p[0])
 
 _lib.TCOD_path_get.restype=c_void
 _lib.TCOD_path_get.argtypes=[c_void_p , c_int, POINTER(c_int), POINTER(c_int)]
 def path_get(p, idx):
+    if isinstance(p[0], _pathing.AStar):
+        return p[0].get(idx)
     x = c_int()
     y = c_int()
     _lib.TCOD_path_get(p[0], idx, byref(x), byref(y))
@@ -2184,11 +3154,15 @@ def path_get(p, idx):
 _lib.TCOD_path_is_empty.restype = c_bool
 _lib.TCOD_path_is_empty.argtypes=[c_void_p ]
 def path_is_empty(p):
+    if isinstance(p[0], _pathing.AStar):
+        return not p[0].steps
     return _lib.TCOD_path_is_empty(p[0])
 
 _lib.TCOD_path_walk.restype = c_bool
 _lib.TCOD_path_walk.argtypes=[c_void_p , POINTER(c_int), POINTER(c_int), c_bool]
 def path_walk(p, recompute):
+    if isinstance(p[0], _pathing.AStar):
+        return p[0].walk(recompute) or (None, None)
     x = c_int()
     y = c_int()
     if _lib.TCOD_path_walk(p[0], byref(x), byref(y), c_int(recompute)):
@@ -2198,8 +3172,123 @@ def path_walk(p, recompute):
 _lib.TCOD_path_delete.restype=c_void
 _lib.TCOD_path_delete.argtypes=[c_void_p ]
 def path_delete(p):
+    if isinstance(p[0], _pathing.AStar):
+        return
     _lib.TCOD_path_delete(p[0])
 
+def _path_engine(p):
+    # the pathing.AStar or Dijkstra behind p when it was made from a cost grid
+    # or by the Python backend, None for the native library
+    if isinstance(p[0], (_pathing.AStar, _pathing.Dijkstra)):
+        return p[0]
+    lib = _lazy_lib._load()
+    if isinstance(lib, CDLL):
+        return None
+    return lib._get(p[0])
+
+class _CList(Structure):
+    # TCOD_list_int_t in list_c.c
+    _fields_ = [('array', POINTER(c_size_t)),
+                ('fillSize', c_int),
+                ('allocSize', c_int),
+                ]
+
+class _CPath(Structure):
+    # the start of TCOD_path_data_t in path_c.c. path holds the direction of
+    # each step as a pointer sized int, the last step first.
+    _fields_ = [('ox', c_int),
+                ('oy', c_int),
+                ('dx', c_int),
+                ('dy', c_int),
+                ('path', POINTER(_CList)),
+                ]
+
+class PathBatch:
+    # computes the paths between many (origin, destination) pairs on one path
+    # (from path_new_using_map, _function or _costs) in a single call,
+    # e.g. for every monster once a turn. after compute(), the cells of path
+    # i, without the origin and with the destination, are
+    # xs[starts[i]:starts[i + 1]] and ys[starts[i]:starts[i + 1]], and
+    # found[i] is 0 if there was no path. the arrays are array('i') (and
+    # array('b')) reused from call to call, numpy.frombuffer gives views of
+    # them without copying.
+    def __init__(self, p):
+        self.path = p
+        self.xs = array.array('i')
+        self.ys = array.array('i')
+        self.starts = array.array('i', [0])
+        self.found = array.array('b')
+        # totals over all calls
+        self.queries = 0
+        self.paths_found = 0
+        self.steps = 0
+        self.seconds = 0.0
+
+    def compute(self, ox, oy, dx, dy):
+        # ox, oy, dx and dy are parallel sequences, a single number is used
+        # for every pair. returns the number of paths found.
+        start = time.time()
+        ox, oy, dx, dy = _coord_args(ox, oy, dx, dy)
+        n = len(ox)
+        engine = _path_engine(self.path)
+        xs, ys, starts, found = self.xs, self.ys, self.starts, self.found
+        del starts[1:]
+        del found[:]
+        pos = 0
+        for i in range(n):
+            if engine is not None:
+                ok = engine.compute(ox[i], oy[i], dx[i], dy[i])
+                path_xs, path_ys = engine.cells()
+            else:
+                ok = self._compute_native(ox[i], oy[i], dx[i], dy[i])
+                path_xs, path_ys = self._cells_native()
+            end = pos + len(path_xs)
+            xs[pos:end] = array.array('i', path_xs)
+            ys[pos:end] = array.array('i', path_ys)
+            pos = end
+            starts.append(pos)
+            found.append(1 if ok else 0)
+        del xs[pos:]
+        del ys[pos:]
+        count = sum(found)
+        self.queries += n
+        self.paths_found += count
+        self.steps += pos
+        self.seconds += time.time() - start
+        return count
+
+    def _compute_native(self, ox, oy, dx, dy):
+        return _lib.TCOD_path_compute(self.path[0], ox, oy, dx, dy)
+
+    def _cells_native(self):
+        # reads the steps from the path's own list, as path_get does but
+        # without a call per step
+        data = cast(self.path[0], POINTER(_CPath)).contents
+        steps = data.path.contents
+        x, y = data.ox, data.oy
+        xs = []
+        ys = []
+        for step in reversed(steps.array[:steps.fillSize]):
+            x += _pathing.DIR_X[step]
+            y += _pathing.DIR_Y[step]
+            xs.append(x)
+            ys.append(y)
+        return xs, ys
+
+    def cells(self, i):
+        # the cells of path i as (xs, ys)
+        start, end = self.starts[i], self.starts[i + 1]
+        return self.xs[start:end], self.ys[start:end]
+
+    def stats(self):
+        return {'queries': self.queries,
+                'found': self.paths_found,
+                'failed': self.queries - self.paths_found,
+                'steps': self.steps,
+                'mean_length': self.steps / float(self.paths_found) if self.paths_found else 0.0,
+                'seconds': self.seconds,
+                'paths_per_second': self.queries / self.seconds if self.seconds > 0 else 0.0}
+
 
 
 _lib.TCOD_dijkstra_new .restype=c_void_p
@@ -2215,34 +3304,50 @@ def dijkstra_new_using_function(w, h, func, userdata=0, dcost=1.41):
     return (_lib.TCOD_dijkstra_new_using_function(w, h, cbk_func,
                                                   userdata, dcost), cbk_func)
 
+def dijkstra_new_using_costs(w, h, costs, dcost=1.41):
+    # costs as for path_new_using_costs
+    return (_pathing.Dijkstra(w, h, None, dcost, _cost_grid(w, h, costs)), costs)
+
 _lib.TCOD_dijkstra_compute.restype=c_void
 _lib.TCOD_dijkstra_compute.argtypes=[c_void_p , c_int, c_int]
 def dijkstra_compute(p, ox, oy):
+    if isinstance(p[0], _pathing.Dijkstra):
+        return p[0].compute(ox, oy)
     _lib.TCOD_dijkstra_compute(p[0], c_int(ox), c_int(oy))
 
 _lib.TCOD_dijkstra_path_set.restype = c_bool
 _lib.TCOD_dijkstra_path_set .argtypes=[c_void_p , c_int, c_int]
 def dijkstra_path_set(p, x, y):
+    if isinstance(p[0], _pathing.Dijkstra):
+        return p[0].path_set(x, y)
     return _lib.TCOD_dijkstra_path_set(p[0], c_int(x), c_int(y))
 
 _lib.TCOD_dijkstra_get_distance.restype = c_float
 _lib.TCOD_dijkstra_get_distance.argtypes=[c_void_p , c_int, c_int]
 def dijkstra_get_distance(p, x, y):
+    if isinstance(p[0], _pathing.Dijkstra):
+        return p[0].get_distance(x, y)
     return _lib.TCOD_dijkstra_get_distance(p[0], c_int(x), c_int(y))
 
 _lib.TCOD_dijkstra_size.restype=c_int
 _lib.TCOD_dijkstra_size.argtypes=[c_void_p ]
 def dijkstra_size(p):
+    if isinstance(p[0], _pathing.Dijkstra):
+        return len(p[0].path)
     return _lib.TCOD_dijkstra_size(p[0])
 
 _lib.TCOD_dijkstra_reverse.restype=c_void
 _lib.TCOD_dijkstra_reverse.argtypes=[c_void_p ]
 def dijkstra_reverse(p):
+    if isinstance(p[0], _pathing.Dijkstra):
+        return p[0].reverse()
     _lib.TCOD_dijkstra_reverse(p[0])
 
 _lib.TCOD_dijkstra_get.restype=c_void
 _lib.TCOD_dijkstra_get.argtypes=[c_void_p , c_int, POINTER(c_int), POINTER(c_int)]
 def dijkstra_get(p, idx):
+    if isinstance(p[0], _pathing.Dijkstra):
+        return p[0].get(idx)
     x = c_int()
     y = c_int()
     _lib.TCOD_dijkstra_get(p[0], c_int(idx), byref(x), byref(y))
@@ -2251,11 +3356,15 @@ def dijkstra_get(p, idx):
 _lib.TCOD_dijkstra_is_empty.restype = c_bool
 _lib.TCOD_dijkstra_is_empty.argtypes=[c_void_p ]
 def dijkstra_is_empty(p):
+    if isinstance(p[0], _pathing.Dijkstra):
+        return not p[0].path
     return _lib.TCOD_dijkstra_is_empty(p[0])
 
 _lib.TCOD_dijkstra_path_walk.restype = c_bool
 _lib.TCOD_dijkstra_path_walk.argtypes=[c_void_p , POINTER(c_int), POINTER(c_int)]
 def dijkstra_path_walk(p):
+    if isinstance(p[0], _pathing.Dijkstra):
+        return p[0].walk() or (None, None)
     x = c_int()
     y = c_int()
     if _lib.TCOD_dijkstra_path_walk(p[0], byref(x), byref(y)):
@@ -2265,8 +3374,85 @@ def dijkstra_path_walk(p):
 _lib.TCOD_dijkstra_delete .restype=c_void
 _lib.TCOD_dijkstra_delete.argtypes=[c_void_p ]
 def dijkstra_delete(p):
+    if isinstance(p[0], _pathing.Dijkstra):
+        return
     _lib.TCOD_dijkstra_delete(p[0])
 
+def dijkstra_compute_multi(p, xs, ys):
+    # distances from the nearest of several roots, e.g. every unexplored cell
+    # for auto-explore or every monster for a threat map. dijkstra_path_set
+    # then leads to the nearest root. only for dijkstra maps made with
+    # dijkstra_new_using_costs, or on the Python backend.
+    engine = _path_engine(p)
+    if engine is None:
+        raise TypeError('dijkstra_compute_multi needs a dijkstra map from dijkstra_new_using_costs.')
+    n = _coord_count(xs, ys)
+    xs, ys = [[int(v) for v in arg] if hasattr(arg, '__len__') else [int(arg)] * n
+              for arg in (xs, ys)]
+    w, h = engine.width, engine.height
+    for x, y in zip(xs, ys):
+        if not (0 <= x < w and 0 <= y < h):
+            raise ValueError('roots must be inside the map.')
+    engine.compute_many([x + y * w for x, y in zip(xs, ys)])
+
+class _CDijkstra(Structure):
+    # the start of dijkstra_t in path_c.c
+    _fields_ = [('diagonal_cost', c_int),
+                ('width', c_int),
+                ('height', c_int),
+                ('nodes_max', c_int),
+                ('map', c_void_p),
+                ('func', c_void_p),
+                ('user_data', c_void_p),
+                ('distances', POINTER(c_uint)),
+                ]
+
+def _dijkstra_raw(p):
+    # the distances of the last compute in hundredths of a step, UNREACHED
+    # where no root could be reached, with the width and height of the map
+    engine = _path_engine(p)
+    if engine is not None:
+        return engine.distances, engine.width, engine.height
+    d = cast(p[0], POINTER(_CDijkstra)).contents
+    size = d.width * d.height
+    if _get_numpy():
+        return numpy.ctypeslib.as_array(d.distances, shape=(size,)), d.width, d.height
+    return d.distances[:size], d.width, d.height
+
+def dijkstra_get_distances(p, out=None):
+    # every value dijkstra_get_distance would return, row major (cell x, y at
+    # x + y * w), -1.0 for cells no root reached. out may be a NumPy float
+    # array (of shape (h, w) or flat), an array.array or a list of w * h
+    # items, filled in place. without out, a new float32 NumPy array of shape
+    # (h, w) is returned, or an array('f') without NumPy.
+    raw, w, h = _dijkstra_raw(p)
+    if out is not None:
+        size = out.size if hasattr(out, 'size') else len(out)
+        if size != w * h:
+            raise TypeError('out must have w * h items.')
+    if _get_numpy():
+        raw = numpy.asarray(raw, dtype=numpy.uint32)
+        values = raw.astype(numpy.float32) * numpy.float32(_pathing.HUNDREDTH)
+        values[raw == _pathing.UNREACHED] = -1.0
+        if out is None:
+            return values.reshape(h, w)
+        if hasattr(out, 'shape'):
+            out[...] = values.reshape(out.shape)
+            return out
+        values = values.tolist()
+    else:
+        # storing in an array('f') rounds to single precision, as the library
+        rounded = array.array('f', raw)
+        values = array.array('f', [-1.0 if d == _pathing.UNREACHED else f * _pathing.HUNDREDTH
+                                   for d, f in zip(raw, rounded)])
+        if out is None:
+            return values
+    if isinstance(out, array.array):
+        out[:] = array.array(out.typecode, values)
+    else:
+        out[:] = values
+    return out
+
 ############################
 # bsp module
 ############################
@@ -2632,6 +3818,50 @@ _lib.TCOD_heightmap_delete.argtypes=[c_void_p]
 def heightmap_delete(hm):
     _lib.TCOD_heightmap_delete(hm.p)
 
+def heightmap_view(hm):
+    # the heightmap's own values, without copying: a float32 NumPy array of
+    # shape (h, w), or a ctypes array of w * h floats (cell x, y at
+    # x + y * w) without NumPy. changes to it are seen by the heightmap_*
+    # functions and the other way round. it must not be used after
+    # heightmap_delete.
+    c = hm.p.contents
+    if _get_numpy():
+        return numpy.ctypeslib.as_array(c.values, shape=(c.h, c.w))
+    return cast(c.values, POINTER(c_float * (c.w * c.h))).contents
+
+def heightmap_get_values(hm, out=None):
+    # a copy of the values, row major. out may be a NumPy float array (of
+    # shape (h, w) or flat), an array.array or a list of w * h items, filled
+    # in place. without out, a new float32 NumPy array of shape (h, w) is
+    # returned, or an array('f') without NumPy.
+    view = heightmap_view(hm)
+    if out is None:
+        if _get_numpy():
+            return view.copy()
+        return array.array('f', view)
+    size = out.size if hasattr(out, 'size') else len(out)
+    if size != hm.w * hm.h:
+        raise TypeError('out must have w * h items.')
+    if hasattr(out, 'shape'):
+        out[...] = view.reshape(out.shape)
+    elif isinstance(out, array.array):
+        out[:] = array.array(out.typecode, view.ravel().tolist() if _get_numpy() else view)
+    else:
+        out[:] = view.ravel().tolist() if _get_numpy() else view[:]
+    return out
+
+def heightmap_set_values(hm, values):
+    # replaces every value with values, w * h numbers in row major order:
+    # a NumPy array (of shape (h, w) or flat), an array.array or a list
+    view = heightmap_view(hm)
+    size = values.size if hasattr(values, 'size') else len(values)
+    if size != hm.w * hm.h:
+        raise TypeError('values must have w * h items.')
+    if _get_numpy():
+        view[...] = numpy.asarray(values, dtype=numpy.float32).reshape(view.shape)
+    else:
+        view[:] = [float(v) for v in values]
+
 
 ############################
 # name generator module
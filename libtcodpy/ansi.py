@@ -0,0 +1,310 @@
+#
+# ANSI/VT100 terminal output for libtcodpy consoles
+#
+# lets a game run without an SDL window, e.g. over ssh. AnsiTerminal keeps a
+# copy of the last frame it wrote and only sends the cells that changed since,
+# skipping the cursor and color escapes that are already in effect.
+#
+import codecs
+import os
+import sys
+
+try:  #terminal input is only available on unix
+    import select
+    import termios
+    import tty
+    terminal_input_available = True
+except ImportError:
+    terminal_input_available = False
+
+ESC = '\x1b['
+
+def _glyph(c):
+    # libtcod character code to the unicode character shown for it. the tcod
+    # font layouts put the box drawing characters at their code page 437 codes.
+    if c < 32 or c == 127:
+        return ' '
+    if c < 127:
+        return chr(c)
+    if c < 256:
+        return bytearray([c]).decode('cp437')
+    return ' '
+
+_GLYPHS = [_glyph(c) for c in range(256)]
+
+def pack_color(col):
+    # Color (or any r, g, b sequence) to a 0xRRGGBB int
+    r, g, b = col
+    return (r << 16) | (g << 8) | b
+
+def _sgr_truecolor(fore, back):
+    parts = []
+    if fore is not None:
+        parts.append('38;2;%d;%d;%d' % (fore >> 16, (fore >> 8) & 0xff, fore & 0xff))
+    if back is not None:
+        parts.append('48;2;%d;%d;%d' % (back >> 16, (back >> 8) & 0xff, back & 0xff))
+    return ESC + ';'.join(parts) + 'm'
+
+def _cube(c):
+    # 0-255 channel to a level of the xterm 6x6x6 color cube
+    return 0 if c < 48 else (c - 35) // 40
+
+def _sgr_256(fore, back):
+    parts = []
+    if fore is not None:
+        parts.append('38;5;%d' % (16 + 36 * _cube(fore >> 16) + 6 * _cube((fore >> 8) & 0xff) + _cube(fore & 0xff)))
+    if back is not None:
+        parts.append('48;5;%d' % (16 + 36 * _cube(back >> 16) + 6 * _cube((back >> 8) & 0xff) + _cube(back & 0xff)))
+    return ESC + ';'.join(parts) + 'm'
+
+def read_console(con, width, height):
+    # the contents of a console as (chars, fore, back) flat lists in the
+    # format AnsiTerminal.present takes, read back cell by cell
+    import libtcodpy
+    get_char = libtcodpy.console_get_char
+    get_fore = libtcodpy.console_get_char_foreground
+    get_back = libtcodpy.console_get_char_background
+    chars = []
+    fore = []
+    back = []
+    for y in range(height):
+        for x in range(width):
+            chars.append(get_char(con, x, y))
+            fore.append(pack_color(get_fore(con, x, y)))
+            back.append(pack_color(get_back(con, x, y)))
+    return chars, fore, back
+
+class AnsiTerminal:
+    # writes frames to a terminal. a frame is given as three flat, row major
+    # sequences of width * height values: character codes, and foreground and
+    # background colors packed as 0xRRGGBB ints.
+    # set truecolor=False for terminals that only know the 256 color palette.
+    def __init__(self, width, height, stream=None, truecolor=True):
+        self.width = width
+        self.height = height
+        if stream is None:
+            stream = sys.stdout
+        # write bytes when we can, so the byte counts are exact
+        self.stream = getattr(stream, 'buffer', stream)
+        self.sgr = _sgr_truecolor if truecolor else _sgr_256
+
+        self.frames = 0
+        self.bytes_total = 0
+        self.bytes_last_frame = 0
+        self.cells_last_frame = 0
+        self.invalidate()
+
+    def invalidate(self):
+        # forget what is on the screen, the next frame is drawn in full
+        self.chars = None
+        self.fore = None
+        self.back = None
+        # colors in effect on the terminal, None if unknown
+        self.cur_fore = None
+        self.cur_back = None
+
+    def present(self, chars, fore, back):
+        width = self.width
+        n = width * self.height
+        if len(chars) != n or len(fore) != n or len(back) != n:
+            raise ValueError('AnsiTerminal.present: frame has an incorrect size.')
+        chars = list(chars)
+        fore = list(fore)
+        back = list(back)
+
+        out = []
+        if self.chars is None:
+            # first frame: hide the cursor, reset colors and clear the screen
+            out.append(ESC + '?25l' + ESC + '0m' + ESC + '2J')
+            old_chars = [-1] * n
+            old_fore = old_back = old_chars
+            self.cur_fore = self.cur_back = None
+        else:
+            old_chars = self.chars
+            old_fore = self.fore
+            old_back = self.back
+
+        glyphs = _GLYPHS
+        sgr = self.sgr
+        cur_fore = self.cur_fore
+        cur_back = self.cur_back
+        cursor = None # offset of the cell the cursor is on, None if unknown
+        cells = 0
+        for start in range(0, n, width):
+            end = start + width
+            # whole rows are compared at C speed, only changed rows are scanned
+            if (chars[start:end] == old_chars[start:end] and fore[start:end] == old_fore[start:end] and
+                back[start:end] == old_back[start:end]):
+                continue
+            for i in range(start, end):
+                c = chars[i]
+                f = fore[i]
+                b = back[i]
+                if c == old_chars[i] and f == old_fore[i] and b == old_back[i]:
+                    continue
+                cells += 1
+
+                if cursor != i:
+                    if cursor is not None and start <= cursor < i:
+                        # same row, move right over the unchanged cells
+                        out.append(ESC + '%dC' % (i - cursor))
+                    else:
+                        out.append(ESC + '%d;%dH' % (i // width + 1, i - start + 1))
+
+                glyph = glyphs[c] if 0 <= c < 256 else ' '
+                # the foreground of a blank doesn't show, don't switch to it
+                new_fore = f if f != cur_fore and glyph != ' ' else None
+                new_back = b if b != cur_back else None
+                if new_fore is not None or new_back is not None:
+                    out.append(sgr(new_fore, new_back))
+                    if new_fore is not None:
+                        cur_fore = new_fore
+                    if new_back is not None:
+                        cur_back = new_back
+                out.append(glyph)
+
+                # the cursor stays on the last column instead of wrapping
+                cursor = i + 1 if i + 1 < end else None
+
+        self.chars = chars
+        self.fore = fore
+        self.back = back
+        self.cur_fore = cur_fore
+        self.cur_back = cur_back
+
+        if out:
+            data = ''.join(out).encode('utf-8')
+            self.stream.write(data)
+            self.stream.flush()
+        else:
+            data = b''
+        self.frames += 1
+        self.bytes_last_frame = len(data)
+        self.bytes_total += len(data)
+        self.cells_last_frame = cells
+        return len(data)
+
+    def present_buffer(self, buf):
+        # draw a ConsoleBuffer of the terminal's size
+        back_r, back_g, back_b, fore_r, fore_g, fore_b, char = buf._read_planes()
+        fore = [(r << 16) | (g << 8) | b for r, g, b in zip(fore_r, fore_g, fore_b)]
+        back = [(r << 16) | (g << 8) | b for r, g, b in zip(back_r, back_g, back_b)]
+        return self.present(char, fore, back)
+
+    def present_console(self, con):
+        # draw a console of the terminal's size
+        return self.present(*read_console(con, self.width, self.height))
+
+    def stats(self):
+        return {'frames': self.frames,
+                'bytes_total': self.bytes_total,
+                'bytes_last_frame': self.bytes_last_frame,
+                'cells_last_frame': self.cells_last_frame,
+                'bytes_per_frame': self.bytes_total / float(self.frames) if self.frames else 0.0}
+
+    def close(self):
+        # restore the colors and the cursor, and move below the frame
+        self.stream.write((ESC + '0m' + ESC + '?25h' + ESC + '%d;1H\n' % self.height).encode('utf-8'))
+        self.stream.flush()
+
+# escape sequences sent by the keys we understand
+_KEY_SEQUENCES = {
+    '\x1b[A': 'UP', '\x1b[B': 'DOWN', '\x1b[C': 'RIGHT', '\x1b[D': 'LEFT',
+    '\x1bOA': 'UP', '\x1bOB': 'DOWN', '\x1bOC': 'RIGHT', '\x1bOD': 'LEFT',
+    '\x1b[H': 'HOME', '\x1b[F': 'END', '\x1b[1~': 'HOME', '\x1b[4~': 'END',
+    '\x1b[2~': 'INSERT', '\x1b[3~': 'DELETE', '\x1b[5~': 'PAGEUP', '\x1b[6~': 'PAGEDOWN',
+    '\x1b': 'ESCAPE', '\r': 'ENTER', '\n': 'ENTER', '\t': 'TAB',
+    '\x7f': 'BACKSPACE', '\x08': 'BACKSPACE', ' ': 'SPACE',
+    # function keys, as xterm, rxvt and the linux console send them
+    '\x1bOP': 'F1', '\x1bOQ': 'F2', '\x1bOR': 'F3', '\x1bOS': 'F4',
+    '\x1b[11~': 'F1', '\x1b[12~': 'F2', '\x1b[13~': 'F3', '\x1b[14~': 'F4',
+    '\x1b[[A': 'F1', '\x1b[[B': 'F2', '\x1b[[C': 'F3', '\x1b[[D': 'F4', '\x1b[[E': 'F5',
+    '\x1b[15~': 'F5', '\x1b[17~': 'F6', '\x1b[18~': 'F7', '\x1b[19~': 'F8',
+    '\x1b[20~': 'F9', '\x1b[21~': 'F10', '\x1b[23~': 'F11', '\x1b[24~': 'F12',
+    }
+
+def _split_key(data):
+    # (the first key of data, the rest), or (None, data) if data ends in
+    # the middle of an escape sequence
+    if not data.startswith('\x1b'):
+        return data[:1], data[1:]
+    if len(data) == 1:
+        # escape, or the start of a sequence whose rest is still on its way
+        return None, data
+    if data[1] == 'O':
+        # SS3: one more character
+        if len(data) < 3:
+            return None, data
+        return data[:3], data[3:]
+    if data[1] != '[':
+        # escape followed by a key, e.g. alt+enter
+        return data[:2], data[2:]
+    if data.startswith('\x1b[['):
+        # the linux console's F1 to F5
+        if len(data) < 4:
+            return None, data
+        return data[:4], data[4:]
+    # CSI: parameters, then a final character from @ to ~
+    for i in range(2, len(data)):
+        if '@' <= data[i] <= '~':
+            return data[:i + 1], data[i + 1:]
+    return None, data
+
+class TerminalInput:
+    # reads keys from a unix terminal and returns them as libtcodpy Key
+    # structures, so handle_keys works the same with either backend.
+    # the terminal is put in cbreak mode until close() is called.
+    def __init__(self, fd=None):
+        if not terminal_input_available:
+            raise RuntimeError('TerminalInput: terminal input needs termios.')
+        self.fd = sys.stdin.fileno() if fd is None else fd
+        self.saved = termios.tcgetattr(self.fd)
+        tty.setcbreak(self.fd)
+        # what was read but not returned yet: keys typed quickly or pasted
+        # arrive together, and a read may end inside a character or sequence
+        self.pending = ''
+        self.decoder = codecs.getincrementaldecoder('utf-8')('replace')
+
+    def _read(self, timeout):
+        # add what is waiting on the terminal to pending, returns False if
+        # nothing came within timeout seconds
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return False
+        self.pending += self.decoder.decode(os.read(self.fd, 1024))
+        return True
+
+    def read_key(self, timeout=None):
+        # returns the next Key, or None if nothing was typed within timeout
+        # seconds (timeout=None waits for a key)
+        import libtcodpy
+        data, rest = _split_key(self.pending)
+        while not data:
+            if data is None:
+                # the rest of an escape sequence follows right away, if at all
+                if not self._read(0.05):
+                    data, rest = self.pending, ''
+                    break
+            elif not self._read(timeout):
+                return None
+            data, rest = _split_key(self.pending)
+        self.pending = rest
+
+        key = libtcodpy.Key()
+        key.pressed = True
+        if data.startswith('\x1b') and len(data) == 2 and data[1] in '\r\n':
+            # alt+enter arrives as escape followed by enter
+            data = '\r'
+            key.lalt = True
+        name = _KEY_SEQUENCES.get(data)
+        if name is not None:
+            key.vk = getattr(libtcodpy, 'KEY_' + name)
+            if len(data) == 1:
+                key.c = ord(data)
+        elif data and not data.startswith('\x1b') and ord(data[0]) < 256:
+            key.vk = libtcodpy.KEY_CHAR
+            key.c = ord(data[0])
+        return key
+
+    def close(self):
+        termios.tcsetattr(self.fd, termios.TCSADRAIN, self.saved)
@@ -0,0 +1,288 @@
+#
+# pure-Python A* and Dijkstra searches
+#
+# these follow libtcod's path.c: same step costs, same neighbour order, same
+# way of storing and walking a path, so code written against the native path_*
+# and dijkstra_* functions behaves the same on top of them. paths of equal
+# cost may still be chosen differently, as ties are broken in another order.
+#
+# the cost of a step comes from walk_cost(x_from, y_from, x_to, y_to), which
+# returns 0 for a step that can't be taken, or from a grid of costs: a row
+# major sequence (list, array.array or NumPy array) with the cost of moving
+# into each cell, 0 or less for impassable ones. a grid is read directly by
+# the search, without a Python call per step, and it is read again by every
+# search, so changing it in place is seen by the next one.
+#
+import heapq
+import math
+from ctypes import c_float
+
+# libtcod's directions and their offsets
+NORTH_WEST, NORTH, NORTH_EAST, WEST, NONE, EAST, SOUTH_WEST, SOUTH, SOUTH_EAST = range(9)
+DIR_X = (-1, 0, 1, -1, 0, 1, -1, 0, 1)
+DIR_Y = (-1, -1, -1, 0, 0, 0, 1, 1, 1)
+# the opposite of each direction is at the mirrored index
+INV_DIR = tuple(range(8, -1, -1))
+
+# neighbours in the order A* expands them, the diagonals last
+_ASTAR_NEIGHBOURS = ((0, -1, NORTH), (-1, 0, WEST), (1, 0, EAST), (0, 1, SOUTH),
+                     (-1, -1, NORTH_WEST), (1, -1, NORTH_EAST), (-1, 1, SOUTH_WEST), (1, 1, SOUTH_EAST))
+
+# neighbours in the order Dijkstra expands them, the diagonals last
+_DIJKSTRA_DX = (-1, 0, 1, 0, -1, 1, 1, -1)
+_DIJKSTRA_DY = (0, -1, 0, 1, -1, -1, 1, 1)
+
+# distance of a cell Dijkstra didn't reach
+UNREACHED = 0xFFFFFFFF
+
+# distances are turned into steps as the library does, 0.01f * distance in
+# single precision
+HUNDREDTH = c_float(0.01).value
+
+def distance_value(distance):
+    if distance == UNREACHED:
+        return -1.0
+    return c_float(c_float(distance).value * HUNDREDTH).value
+
+class _CostGrid:
+    # a cost grid as something cheap to index. lists and array.arrays are
+    # used as they are; a NumPy array is copied to a list, and copied again
+    # only when its contents changed since, which a comparison of its bytes
+    # finds much faster than a new copy would take.
+    def __init__(self, costs):
+        self.is_array = hasattr(costs, 'ravel')
+        self.array = costs
+        self.data = None
+        self.list = None
+
+    def values(self):
+        if not self.is_array:
+            return self.array
+        data = self.array.tobytes()
+        if data != self.data:
+            self.data = data
+            self.list = self.array.ravel().tolist()
+        return self.list
+
+    def value(self, offset):
+        # one cell, without converting the grid
+        if self.is_array:
+            return float(self.array.flat[offset])
+        return self.array[offset]
+
+def map_walk_cost(m):
+    # the walk_cost of a path made from a map m with w and a flat walkable
+    # sequence: 1 into walkable cells. the flags are read at every step, so
+    # changes to the map are seen by later searches.
+    def walk_cost(xf, yf, xt, yt):
+        return 1.0 if m.walkable[xt + yt * m.w] else 0.0
+    return walk_cost
+
+class AStar:
+    # path between two cells, as TCOD_path_t. the step costs come from
+    # walk_cost, or from costs when walk_cost is None.
+    def __init__(self, width, height, walk_cost, diagonal_cost=1.41, costs=None):
+        self.width = width
+        self.height = height
+        self.walk_cost = walk_cost
+        self.costs = costs
+        self.grid = _CostGrid(costs) if costs is not None else None
+        self.diagonal_cost = c_float(diagonal_cost).value
+        self.ox = self.oy = self.dx = self.dy = 0
+        # directions of the steps, the last step first
+        self.steps = []
+
+    def compute(self, ox, oy, dx, dy):
+        self.ox, self.oy, self.dx, self.dy = ox, oy, dx, dy
+        self.steps = []
+        if ox == dx and oy == dy:
+            return True
+        w, h = self.width, self.height
+        if not (0 <= ox < w and 0 <= oy < h and 0 <= dx < w and 0 <= dy < h):
+            return False
+
+        walk_cost = self.walk_cost
+        grid = self.grid.values() if walk_cost is None else None
+        diagonal_cost = self.diagonal_cost
+        neighbours = _ASTAR_NEIGHBOURS if diagonal_cost != 0.0 else _ASTAR_NEIGHBOURS[:4]
+        covered = [0.0] * (w * h) # distance walked to each cell, 0 for not reached
+        prev = bytearray([NONE]) * (w * h)
+        origin = ox + oy * w
+        dest = dx + dy * w
+        heap = [(0.0, 0, origin, 0.0)]
+        pushed = 1
+        while heap and covered[dest] == 0.0:
+            heur, order, offset, distance = heapq.heappop(heap)
+            if distance != covered[offset]:
+                continue # a shorter way to this cell was found after it was pushed
+            x = offset % w
+            y = offset // w
+            for i, (ix, iy, direction) in enumerate(neighbours):
+                cx = x + ix
+                cy = y + iy
+                if 0 <= cx < w and 0 <= cy < h:
+                    coffset = cx + cy * w
+                    cost = grid[coffset] if grid is not None else walk_cost(x, y, cx, cy)
+                    if cost > 0.0:
+                        total = distance + cost * (diagonal_cost if i >= 4 else 1.0)
+                        previous = covered[coffset]
+                        if coffset != origin and (previous == 0.0 or previous > total):
+                            covered[coffset] = total
+                            prev[coffset] = direction
+                            remaining = math.sqrt((cx - dx) * (cx - dx) + (cy - dy) * (cy - dy))
+                            heapq.heappush(heap, (total + remaining, pushed, coffset, total))
+                            pushed += 1
+        if covered[dest] == 0.0:
+            return False
+        # walk back from the destination
+        x, y = dx, dy
+        while x != ox or y != oy:
+            step = prev[x + y * w]
+            self.steps.append(step)
+            x -= DIR_X[step]
+            y -= DIR_Y[step]
+        return True
+
+    def walk(self, recalculate):
+        # the next cell of the path, which becomes the new origin, or None
+        if not self.steps:
+            return None
+        step = self.steps.pop()
+        x = self.ox + DIR_X[step]
+        y = self.oy + DIR_Y[step]
+        if self.step_cost(self.ox, self.oy, x, y) == 0.0:
+            # the path is blocked now
+            if not recalculate or not self.compute(self.ox, self.oy, self.dx, self.dy):
+                return None
+            return self.walk(True)
+        self.ox, self.oy = x, y
+        return x, y
+
+    def step_cost(self, xf, yf, xt, yt):
+        if self.walk_cost is None:
+            return max(self.grid.value(xt + yt * self.width), 0.0)
+        return self.walk_cost(xf, yf, xt, yt)
+
+    def cells(self):
+        # the cells of the path as two lists, the origin excluded
+        xs = []
+        ys = []
+        x, y = self.ox, self.oy
+        for step in reversed(self.steps):
+            x += DIR_X[step]
+            y += DIR_Y[step]
+            xs.append(x)
+            ys.append(y)
+        return xs, ys
+
+    def get(self, index):
+        x, y = self.ox, self.oy
+        for step in self.steps[len(self.steps) - 1 - index:][::-1]:
+            x += DIR_X[step]
+            y += DIR_Y[step]
+        return x, y
+
+    def reverse(self):
+        # like path.c this swaps the ends and turns each step around, but
+        # keeps the order of the steps
+        self.ox, self.dx = self.dx, self.ox
+        self.oy, self.dy = self.dy, self.oy
+        self.steps = [INV_DIR[step] for step in self.steps]
+
+class Dijkstra:
+    # distances from one root cell to every cell, as TCOD_dijkstra_t, or from
+    # the nearest of several roots with compute_many().
+    # distances are kept in hundredths of a step, as integers. the step costs
+    # come from walk_cost, or from costs when walk_cost is None.
+    def __init__(self, width, height, walk_cost, diagonal_cost=1.41, costs=None):
+        self.width = width
+        self.height = height
+        self.walk_cost = walk_cost
+        self.costs = costs
+        self.grid = _CostGrid(costs) if costs is not None else None
+        self.diagonal_cost = int(c_float(diagonal_cost).value * 100.0 + 0.1)
+        self.distances = [UNREACHED] * (width * height)
+        self.roots = set()
+        # cell offsets of the path, the first step last
+        self.path = []
+
+    def compute(self, rx, ry):
+        self.compute_many([rx + ry * self.width])
+
+    def compute_many(self, roots):
+        # roots are cell offsets, all at distance 0
+        w, h = self.width, self.height
+        walk_cost = self.walk_cost
+        grid = self.grid.values() if walk_cost is None else None
+        costs = (100, 100, 100, 100) + (self.diagonal_cost,) * 4
+        count = 8 if self.diagonal_cost != 0 else 4
+        distances = [UNREACHED] * (w * h)
+        self.distances = distances
+        self.roots = set(roots)
+        for offset in self.roots:
+            distances[offset] = 0
+        heap = [(0, offset) for offset in self.roots]
+        heapq.heapify(heap)
+        while heap:
+            distance, offset = heapq.heappop(heap)
+            if distance != distances[offset]:
+                continue
+            x = offset % w
+            y = offset // w
+            for i in range(count):
+                tx = x + _DIJKSTRA_DX[i]
+                ty = y + _DIJKSTRA_DY[i]
+                if 0 <= tx < w and 0 <= ty < h:
+                    toffset = tx + ty * w
+                    cost = grid[toffset] if grid is not None else walk_cost(x, y, tx, ty)
+                    if cost > 0.0:
+                        total = distance + int(cost * costs[i])
+                        if distances[toffset] > total:
+                            distances[toffset] = total
+                            heapq.heappush(heap, (total, toffset))
+
+    def get_distance(self, x, y):
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return -1.0
+        return distance_value(self.distances[x + y * self.width])
+
+    def path_set(self, x, y):
+        # follow the distances down from x, y to a root
+        w, h = self.width, self.height
+        if not (0 <= x < w and 0 <= y < h):
+            return False
+        distances = self.distances
+        if distances[x + y * w] == UNREACHED:
+            return False
+        count = 8 if self.diagonal_cost != 0 else 4
+        path = []
+        offset = x + y * w
+        roots = self.roots
+        while offset not in roots:
+            path.append(offset)
+            px = offset % w
+            py = offset // w
+            lowest = offset
+            for i in range(count):
+                cx = px + _DIJKSTRA_DX[i]
+                cy = py + _DIJKSTRA_DY[i]
+                if 0 <= cx < w and 0 <= cy < h and distances[cx + cy * w] < distances[lowest]:
+                    lowest = cx + cy * w
+            if lowest == offset:
+                return False # steps too cheap to show up in the distances
+            offset = lowest
+        self.path = path
+        return True
+
+    def walk(self):
+        if not self.path:
+            return None
+        offset = self.path.pop()
+        return offset % self.width, offset // self.width
+
+    def get(self, index):
+        offset = self.path[len(self.path) - 1 - index]
+        return offset % self.width, offset // self.width
+
+    def reverse(self):
+        self.path.reverse()
@@ -0,0 +1,1153 @@
+#
+# pure-Python stand-in for the libtcod library
+#
+# used in place of the native library when it can't be loaded (the repository
+# only ships Windows builds) or when LIBTCODPY_BACKEND=python is set, see
+# _load_library in __init__.py. it implements the TCOD_* functions libtcodpy
+# calls for the part of libtcod a game's logic needs: offscreen consoles and
+# the root console, map and field of view, random numbers and dice, lines,
+# path and dijkstra. the root console is shown on the terminal when stdout is one,
+# and keys are read from stdin; without a terminal nothing is shown and the
+# window counts as closed once the game waits for a key.
+#
+# the functions take the same arguments as the C functions, after libtcodpy's
+# wrappers have converted them, so ctypes values and byref()s are unwrapped
+# here. handles of consoles, maps, paths and generators are small ints.
+#
+# what differs from the native library:
+#  - FOV_BASIC and FOV_SHADOW follow libtcod's algorithms, the other FOV
+#    algorithms use FOV_SHADOW
+#  - random numbers are CMWC as in libtcod, so integers from a seeded
+#    generator match the native ones; floats may differ in the last bits,
+#    and RNG_MT generators are CMWC as well
+#  - there are no fonts, images, mouse, fading or sound, and anything not
+#    listed here raises an AttributeError when it is called
+#
+import atexit
+import math
+import re
+import sys
+import time
+from ctypes import c_float
+
+from libtcodpy import pathing
+
+BKGND_NONE = 0
+BKGND_SET = 1
+BKGND_MULTIPLY = 2
+BKGND_LIGHTEN = 3
+BKGND_DARKEN = 4
+BKGND_SCREEN = 5
+BKGND_COLOR_DODGE = 6
+BKGND_COLOR_BURN = 7
+BKGND_ADD = 8
+BKGND_ADDA = 9
+BKGND_BURN = 10
+BKGND_OVERLAY = 11
+BKGND_ALPH = 12
+BKGND_DEFAULT = 13
+
+LEFT = 0
+RIGHT = 1
+CENTER = 2
+
+FOV_BASIC = 0
+FOV_SHADOW = 2
+
+COLCTRL_NUMBER = 5
+COLCTRL_FORE_RGB = 6
+COLCTRL_BACK_RGB = 7
+COLCTRL_STOP = 8
+
+DISTRIBUTION_LINEAR = 0
+DISTRIBUTION_GAUSSIAN = 1
+DISTRIBUTION_GAUSSIAN_RANGE = 2
+DISTRIBUTION_GAUSSIAN_INVERSE = 3
+DISTRIBUTION_GAUSSIAN_RANGE_INVERSE = 4
+
+def _value(arg):
+    # the plain Python value of an argument the wrappers may have put in a
+    # ctypes object (c_int, c_void_p, c_float, a unicode buffer...)
+    return getattr(arg, 'value', arg)
+
+def _rgb(col):
+    return (col.r, col.g, col.b)
+
+def _div(a, b):
+    # C integer division, which truncates towards zero
+    q = abs(a) // b
+    return q if a >= 0 else -q
+
+def _clamp(v):
+    return 0 if v < 0 else 255 if v > 255 else v
+
+def _blend(back, col, flag):
+    # the new background of a cell, as TCOD_console_set_char_background
+    mode = flag & 0xff
+    if mode == BKGND_SET:
+        return col
+    if mode == BKGND_NONE:
+        return back
+    if mode == BKGND_ALPH or mode == BKGND_ADDA:
+        alpha = flag >> 8
+        if mode == BKGND_ALPH:
+            return tuple(b + _div((c - b) * alpha, 255) for b, c in zip(back, col))
+        return tuple(min(255, b + _div(alpha * c, 255)) for b, c in zip(back, col))
+    if mode == BKGND_MULTIPLY:
+        return tuple(b * c // 255 for b, c in zip(back, col))
+    if mode == BKGND_LIGHTEN:
+        return tuple(max(b, c) for b, c in zip(back, col))
+    if mode == BKGND_DARKEN:
+        return tuple(min(b, c) for b, c in zip(back, col))
+    if mode == BKGND_SCREEN:
+        return tuple(255 - (255 - b) * (255 - c) // 255 for b, c in zip(back, col))
+    if mode == BKGND_COLOR_DODGE:
+        return tuple(min(255, 255 * c // (255 - b)) if b != 255 else 255 for b, c in zip(back, col))
+    if mode == BKGND_COLOR_BURN:
+        return tuple(_clamp(255 - _div(255 * (255 - b), c)) if c > 0 else 0 for b, c in zip(back, col))
+    if mode == BKGND_ADD:
+        return tuple(min(255, b + c) for b, c in zip(back, col))
+    if mode == BKGND_BURN:
+        return tuple(_clamp(b + c - 255) for b, c in zip(back, col))
+    if mode == BKGND_OVERLAY:
+        return tuple(_clamp(2 * c * b // 255 if c <= 128 else 255 - 2 * (255 - c) * (255 - b) // 255)
+                     for b, c in zip(back, col))
+    return back
+
+def _lerp(a, b, coef):
+    return tuple(int(x + (y - x) * coef) for x, y in zip(a, b))
+
+class _Console:
+    # cells are kept in flat lists, colors as (r, g, b) tuples
+    def __init__(self, w, h):
+        self.w = w
+        self.h = h
+        self.fore_default = (255, 255, 255)
+        self.back_default = (0, 0, 0)
+        self.bkgnd_flag = BKGND_NONE
+        self.alignment = LEFT
+        self.key_color = None
+        self.chars = [ord(' ')] * (w * h)
+        self.fore = [self.fore_default] * (w * h)
+        self.back = [self.back_default] * (w * h)
+
+    def clear(self):
+        n = self.w * self.h
+        self.chars = [ord(' ')] * n
+        self.fore = [self.fore_default] * n
+        self.back = [self.back_default] * n
+
+    def offset(self, x, y):
+        # the index of cell x, y, or None when it is outside the console
+        if 0 <= x < self.w and 0 <= y < self.h:
+            return x + y * self.w
+        return None
+
+    def set_back(self, i, col, flag):
+        if flag == BKGND_DEFAULT:
+            flag = self.bkgnd_flag
+        self.back[i] = _blend(self.back[i], col, flag)
+
+class _Map:
+    def __init__(self, w, h):
+        self.w = w
+        self.h = h
+        self.transparent = bytearray(w * h)
+        self.walkable = bytearray(w * h)
+        self.fov = bytearray(w * h)
+
+class _Random:
+    # complementary multiply with carry, as in libtcod's mersenne.c
+    def __init__(self, seed):
+        s = seed & 0xffffffff
+        self.Q = []
+        for i in range(4096):
+            s = (s * 1103515245 + 12345) & 0xffffffff
+            self.Q.append(s)
+        self.c = ((s * 1103515245 + 12345) & 0xffffffff) % 809430660
+        self.cur = 0
+        self.distribution = 0
+
+    def copy(self):
+        other = _Random.__new__(_Random)
+        other.Q = list(self.Q)
+        other.c = self.c
+        other.cur = self.cur
+        other.distribution = self.distribution
+        return other
+
+    def number(self):
+        self.cur = cur = (self.cur + 1) & 4095
+        t = 18782 * self.Q[cur] + self.c
+        c = t >> 32
+        x = (t + c) & 0xffffffff
+        if x < c:
+            x += 1
+            c += 1
+        if x + 1 == 0x100000000:
+            c += 1
+            x = 0
+        self.c = c
+        self.Q[cur] = q = 0xfffffffe - x
+        return q
+
+    def get_int(self, mi, ma):
+        if ma == mi:
+            return mi
+        if ma < mi:
+            mi, ma = ma, mi
+        return self.number() % (ma - mi + 1) + mi
+
+    def get_double(self, mi, ma):
+        if ma == mi:
+            return mi
+        if ma < mi:
+            mi, ma = ma, mi
+        return mi + (ma - mi) * self.number() / 4294967295.0
+
+    def gaussian(self, mean, std_deviation):
+        # Marsaglia's polar method. as in libtcod, the second value of each
+        # pair is kept for the next call, whichever generator makes it
+        if _gaussian_spare:
+            return mean + _gaussian_spare.pop() * std_deviation
+        while True:
+            x1 = self.number() / 4294967295.0 * 2.0 - 1.0
+            x2 = self.number() / 4294967295.0 * 2.0 - 1.0
+            w = x1 * x1 + x2 * x2
+            if 0.0 < w < 1.0:
+                break
+        w = math.sqrt(-2.0 * math.log(w) / w)
+        _gaussian_spare.append(x2 * w)
+        return mean + x1 * w * std_deviation
+
+    def get_double_distributed(self, a, b):
+        # a draw following the generator's distribution. for GAUSSIAN and
+        # GAUSSIAN_INVERSE, a and b are the mean and standard deviation; the
+        # _RANGE ones take the range and keep 99.7% of the draws in it
+        dist = self.distribution
+        if dist == DISTRIBUTION_LINEAR:
+            return self.get_double(a, b)
+        ranged = dist in (DISTRIBUTION_GAUSSIAN_RANGE, DISTRIBUTION_GAUSSIAN_RANGE_INVERSE)
+        if ranged:
+            mi, ma = min(a, b), max(a, b)
+            mean, std_deviation = (mi + ma) / 2.0, (ma - mi) / 6.0
+        else:
+            mean, std_deviation = float(a), float(b)
+        num = self.gaussian(mean, std_deviation)
+        if dist in (DISTRIBUTION_GAUSSIAN_INVERSE, DISTRIBUTION_GAUSSIAN_RANGE_INVERSE):
+            # moves the peaks to the ends of the range
+            num = num - 3 * std_deviation if num >= mean else num + 3 * std_deviation
+        if ranged:
+            num = min(max(num, mi), ma)
+        return num
+
+    def get_int_distributed(self, mi, ma):
+        if self.distribution == DISTRIBUTION_LINEAR:
+            return self.get_int(mi, ma)
+        num = self.get_double_distributed(mi, ma)
+        num = int(num + 0.5) if num >= 0.0 else int(num - 0.5)
+        if self.distribution in (DISTRIBUTION_GAUSSIAN_RANGE, DISTRIBUTION_GAUSSIAN_RANGE_INVERSE):
+            num = min(max(num, min(mi, ma)), max(mi, ma))
+        return num
+
+    def dice_roll(self, dice):
+        rolls, faces, multiplier, addsub = dice
+        result = 0
+        for i in range(rolls):
+            result += self.get_int(1, faces)
+        return int(c_float(c_float(result + addsub).value * multiplier).value)
+
+_gaussian_spare = []  # the unused value of the last gaussian pair
+
+_NUMBER = re.compile(r'\s*[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?')
+
+def _atof(s):
+    # the leading number of s, 0 if there is none, as C's atof
+    match = _NUMBER.match(s)
+    return float(match.group(0)) if match else 0.0
+
+def _atoi(s):
+    match = re.match(r'\s*[-+]?\d+', s)
+    return int(match.group(0)) if match else 0
+
+def _dice_new(s):
+    # (rolls, faces, multiplier, addsub) from a dice string such as
+    # '3d6+1' or '2x1d4', as TCOD_random_dice_new
+    if isinstance(s, bytes):
+        s = s.decode('ascii')
+    multiplier = 1.0
+    addsub = 0.0
+    match = re.search('[*x]', s)
+    if match:
+        multiplier = c_float(_atof(s[:match.start()])).value
+        s = s[match.end():]
+    match = re.search('[dD]', s)
+    rolls = _atoi(s[:match.start()] if match else s)
+    s = s[match.end():] if match else ''
+    match = re.search('[-+]', s)
+    faces = _atoi(s[:match.start()] if match else s)
+    if match:
+        sign = 1 if match.group(0) == '+' else -1
+        addsub = c_float(_atof(s[match.end():]) * sign).value
+    return rolls, faces, multiplier, addsub
+
+class PythonBackend:
+    name = 'python'
+
+    def __init__(self):
+        self.objects = {} # handle -> console, map, path or generator
+        self.next_handle = 1
+        self.root = None
+        self.closed = False
+        self.fullscreen = False
+        self.renderer = 0
+        self.fps = 0
+        self.start_time = time.time()
+        self.last_flush = None
+        self.last_frame_length = 0.0
+        self.frame_times = []
+        self.terminal = None
+        self.input = None
+        self.random_instance = None
+        self.line_data = [0] * 9
+        self.color_controls = [((255, 255, 255), (0, 0, 0))] * COLCTRL_NUMBER
+
+    # handles
+
+    def _new(self, obj):
+        handle = self.next_handle
+        self.next_handle += 1
+        self.objects[handle] = obj
+        return handle
+
+    def _get(self, handle):
+        handle = _value(handle)
+        try:
+            return self.objects[handle]
+        except KeyError:
+            raise ValueError('python backend: invalid handle %r' % (handle,))
+
+    def _delete(self, handle):
+        self.objects.pop(_value(handle), None)
+
+    def _console(self, con):
+        con = _value(con)
+        if not con:
+            if self.root is None:
+                raise RuntimeError('python backend: the root console is used before console_init_root.')
+            return self.root
+        return self._get(con)
+
+    def _random(self, rnd):
+        rnd = _value(rnd)
+        if not rnd:
+            return self._get(self.TCOD_random_get_instance())
+        return self._get(rnd)
+
+    # root console and window
+
+    def TCOD_console_init_root(self, w, h, title, fullscreen, renderer):
+        self.root = _Console(w, h)
+        self.closed = False
+        self.fullscreen = bool(fullscreen)
+        self.renderer = renderer
+        if self.terminal is not None:
+            self.terminal.close()
+            self.terminal = None
+
+    def TCOD_console_set_custom_font(self, fontFile, flags, nb_char_horiz, nb_char_vertic):
+        pass # glyphs are whatever the terminal shows
+
+    def TCOD_console_map_ascii_code_to_font(self, asciiCode, fontCharX, fontCharY):
+        pass
+
+    def TCOD_console_map_ascii_codes_to_font(self, firstAsciiCode, nbCodes, fontCharX, fontCharY):
+        pass
+
+    def TCOD_console_map_string_to_font_utf(self, s, fontCharX, fontCharY):
+        pass
+
+    def TCOD_console_is_fullscreen(self):
+        return self.fullscreen
+
+    def TCOD_console_set_fullscreen(self, fullscreen):
+        self.fullscreen = bool(_value(fullscreen))
+
+    def TCOD_console_is_window_closed(self):
+        return self.closed
+
+    def TCOD_console_has_mouse_focus(self):
+        return True
+
+    def TCOD_console_is_active(self):
+        return True
+
+    def TCOD_console_set_window_title(self, title):
+        pass
+
+    def TCOD_console_flush(self):
+        # show the root console on the terminal, if there is one
+        now = time.time()
+        if self.fps > 0 and self.last_flush is not None:
+            wait = 1.0 / self.fps - (now - self.last_flush)
+            if wait > 0:
+                time.sleep(wait)
+                now = time.time()
+        if self.last_flush is not None:
+            self.last_frame_length = now - self.last_flush
+        self.last_flush = now
+        self.frame_times.append(now)
+        while self.frame_times[0] < now - 1.0:
+            del self.frame_times[0]
+
+        root = self.root
+        if root is None or not sys.stdout.isatty():
+            return
+        if self.terminal is None:
+            from libtcodpy.ansi import AnsiTerminal
+            self.terminal = AnsiTerminal(root.w, root.h)
+            atexit.register(self._close_terminal)
+        self.terminal.present(root.chars,
+                              [(r << 16) | (g << 8) | b for r, g, b in root.fore],
+                              [(r << 16) | (g << 8) | b for r, g, b in root.back])
+
+    def _close_terminal(self):
+        if self.terminal is not None:
+            self.terminal.close()
+            self.terminal = None
+        if self.input is not None:
+            self.input.close()
+            self.input = None
+
+    # keyboard
+
+    def _read_key(self, k, timeout):
+        # fill in the Key k from the terminal. returns False when there is
+        # no terminal to read from.
+        if self.input is None:
+            from libtcodpy import ansi
+            if not ansi.terminal_input_available or not sys.stdin.isatty():
+                return False
+            self.input = ansi.TerminalInput()
+            atexit.register(self._close_terminal)
+        key = self.input.read_key(timeout)
+        if key is not None:
+            for name, ctype in key._fields_:
+                setattr(k, name, getattr(key, name))
+        return True
+
+    def TCOD_console_wait_for_keypress_wrapper(self, k, flush):
+        if not self._read_key(k._obj, None):
+            # nobody can press a key, so the game should stop waiting
+            self.closed = True
+
+    def TCOD_console_check_for_keypress_wrapper(self, k, flags):
+        self._read_key(k._obj, 0)
+
+    def TCOD_console_is_key_pressed(self, key):
+        return False
+
+    # console state
+
+    def TCOD_console_new(self, w, h):
+        return self._new(_Console(w, h))
+
+    def TCOD_console_delete(self, con):
+        if not _value(con):
+            self.root = None
+            self._close_terminal()
+        else:
+            self._delete(con)
+
+    def TCOD_console_get_width(self, con):
+        return self._console(con).w
+
+    def TCOD_console_get_height(self, con):
+        return self._console(con).h
+
+    def TCOD_console_set_default_background(self, con, col):
+        self._console(con).back_default = _rgb(col)
+
+    def TCOD_console_set_default_foreground(self, con, col):
+        self._console(con).fore_default = _rgb(col)
+
+    def TCOD_console_get_default_background(self, con):
+        return self._color(self._console(con).back_default)
+
+    def TCOD_console_get_default_foreground(self, con):
+        return self._color(self._console(con).fore_default)
+
+    def TCOD_console_set_background_flag(self, con, flag):
+        self._console(con).bkgnd_flag = flag
+
+    def TCOD_console_get_background_flag(self, con):
+        return self._console(con).bkgnd_flag
+
+    def TCOD_console_set_alignment(self, con, alignment):
+        self._console(con).alignment = alignment
+
+    def TCOD_console_get_alignment(self, con):
+        return self._console(con).alignment
+
+    def TCOD_console_set_key_color(self, con, col):
+        self._console(con).key_color = _rgb(col)
+
+    def TCOD_console_set_color_control(self, con, fore, back):
+        self.color_controls[_value(con) - 1] = (_rgb(fore), _rgb(back))
+
+    def _color(self, rgb):
+        from libtcodpy import Color
+        return Color(*rgb)
+
+    # cells
+
+    def TCOD_console_clear(self, con):
+        self._console(con).clear()
+
+    def TCOD_console_put_char(self, con, x, y, c, flag):
+        con = self._console(con)
+        i = con.offset(x, y)
+        if i is not None:
+            con.chars[i] = c
+            con.fore[i] = con.fore_default
+            con.set_back(i, con.back_default, flag)
+
+    def TCOD_console_put_char_ex(self, con, x, y, c, fore, back):
+        con = self._console(con)
+        i = con.offset(x, y)
+        if i is not None:
+            con.chars[i] = c
+            con.fore[i] = _rgb(fore)
+            con.back[i] = _rgb(back)
+
+    def TCOD_console_set_char(self, con, x, y, c):
+        con = self._console(con)
+        i = con.offset(x, y)
+        if i is not None:
+            con.chars[i] = c
+
+    def TCOD_console_set_char_foreground(self, con, x, y, col):
+        con = self._console(con)
+        i = con.offset(x, y)
+        if i is not None:
+            con.fore[i] = _rgb(col)
+
+    def TCOD_console_set_char_background(self, con, x, y, col, flag):
+        con = self._console(con)
+        i = con.offset(x, y)
+        if i is not None:
+            con.set_back(i, _rgb(col), flag)
+
+    def TCOD_console_get_char(self, con, x, y):
+        con = self._console(con)
+        i = con.offset(x, y)
+        return con.chars[i] if i is not None else 0
+
+    def TCOD_console_get_char_foreground(self, con, x, y):
+        con = self._console(con)
+        i = con.offset(x, y)
+        return self._color(con.fore[i] if i is not None else (0, 0, 0))
+
+    def TCOD_console_get_char_background(self, con, x, y):
+        con = self._console(con)
+        i = con.offset(x, y)
+        return self._color(con.back[i] if i is not None else (0, 0, 0))
+
+    def TCOD_console_fill_foreground(self, con, r, g, b):
+        con = self._console(con)
+        con.fore = [(r[i], g[i], b[i]) for i in range(con.w * con.h)]
+
+    def TCOD_console_fill_background(self, con, r, g, b):
+        con = self._console(con)
+        con.back = [(r[i], g[i], b[i]) for i in range(con.w * con.h)]
+
+    def TCOD_console_fill_char(self, con, arr):
+        con = self._console(con)
+        con.chars = [arr[i] for i in range(con.w * con.h)]
+
+    def TCOD_console_rect(self, con, x, y, w, h, clear, flag):
+        con = self._console(con)
+        for cy in range(max(y, 0), min(y + h, con.h)):
+            for cx in range(max(x, 0), min(x + w, con.w)):
+                i = cx + cy * con.w
+                con.set_back(i, con.back_default, flag)
+                if clear:
+                    con.chars[i] = ord(' ')
+
+    def TCOD_console_hline(self, con, x, y, l, flag):
+        for cx in range(x, x + l):
+            self.TCOD_console_put_char(con, cx, y, 196, flag)
+
+    def TCOD_console_vline(self, con, x, y, l, flag):
+        for cy in range(y, y + l):
+            self.TCOD_console_put_char(con, x, cy, 179, flag)
+
+    def TCOD_console_blit(self, src, xs, ys, w, h, dst, xd, yd, ffade, bfade):
+        src = self._console(src)
+        dst = self._console(dst)
+        ffade = _value(ffade)
+        bfade = _value(bfade)
+        if w == 0:
+            w = src.w
+        if h == 0:
+            h = src.h
+        key = src.key_color
+        opaque = ffade == 1.0 and bfade == 1.0
+        for cy in range(ys, ys + h):
+            dy = cy - ys + yd
+            if not (0 <= cy < src.h and 0 <= dy < dst.h):
+                continue
+            for cx in range(xs, xs + w):
+                dx = cx - xs + xd
+                if not (0 <= cx < src.w and 0 <= dx < dst.w):
+                    continue
+                i = cx + cy * src.w
+                j = dx + dy * dst.w
+                back = src.back[i]
+                if key is not None and back == key:
+                    continue
+                if opaque:
+                    dst.chars[j] = src.chars[i]
+                    dst.fore[j] = src.fore[i]
+                    dst.back[j] = back
+                    continue
+                # fading, as console_c.c
+                c = src.chars[i]
+                dst_back = dst.back[j]
+                dst.back[j] = _lerp(dst_back, back, bfade)
+                if c == ord(' '):
+                    dst.fore[j] = _lerp(dst.fore[j], back, bfade)
+                elif dst.chars[j] == ord(' '):
+                    dst.chars[j] = c
+                    dst.fore[j] = _lerp(dst_back, src.fore[i], ffade)
+                elif dst.chars[j] == c:
+                    dst.fore[j] = _lerp(dst.fore[j], src.fore[i], ffade)
+                elif ffade < 0.5:
+                    dst.fore[j] = _lerp(dst.fore[j], dst_back, ffade * 2)
+                else:
+                    dst.chars[j] = c
+                    dst.fore[j] = _lerp(dst_back, src.fore[i], (ffade - 0.5) * 2)
+
+    # printing
+
+    def _lines(self, text, width, wrap):
+        # text as lines of (char, fore, back) cells, fore and back None for
+        # the console's defaults. with wrap, lines are broken at spaces so
+        # that they fit in width.
+        text = _value(text).replace(u'%%', u'%')
+        fore = back = None
+        lines = [[]]
+        line = lines[0]
+        i = 0
+        while i < len(text):
+            c = ord(text[i])
+            i += 1
+            if 1 <= c <= COLCTRL_NUMBER:
+                fore, back = self.color_controls[c - 1]
+            elif c == COLCTRL_FORE_RGB or c == COLCTRL_BACK_RGB:
+                rgb = tuple(ord(ch) for ch in text[i:i + 3])
+                i += 3
+                if c == COLCTRL_FORE_RGB:
+                    fore = rgb
+                else:
+                    back = rgb
+            elif c == COLCTRL_STOP:
+                fore = back = None
+            elif c == ord('\n'):
+                line = []
+                lines.append(line)
+            else:
+                if wrap and len(line) >= width:
+                    # move the last word down, or cut it if it's the whole line
+                    cut = len(line)
+                    while cut > 0 and line[cut - 1][0] != ord(' '):
+                        cut -= 1
+                    rest = line[cut:] if cut > 0 else []
+                    del line[cut if cut > 0 else len(line):]
+                    while line and line[-1][0] == ord(' '):
+                        line.pop()
+                    line = rest
+                    lines.append(line)
+                    if c == ord(' ') and not line:
+                        continue
+                line.append((c, fore, back))
+        return lines
+
+    def _print(self, con, x, y, w, h, flag, alignment, text, wrap, count_only):
+        con = self._console(con)
+        if h == 0:
+            h = con.h - y
+        if w == 0:
+            w = con.w - x if alignment == LEFT else x + 1 if alignment == RIGHT else con.w
+        lines = self._lines(text, w, wrap)
+        if h > 0:
+            lines = lines[:h]
+        if count_only:
+            return len(lines)
+        for row, line in enumerate(lines):
+            if alignment == LEFT:
+                cx = x
+            elif alignment == RIGHT:
+                cx = x - len(line) + 1
+            else:
+                cx = x - len(line) // 2
+            for c, fore, back in line:
+                i = con.offset(cx, y + row)
+                if i is not None:
+                    con.chars[i] = c
+                    con.fore[i] = fore or con.fore_default
+                    con.set_back(i, back or con.back_default, flag)
+                cx += 1
+        return len(lines)
+
+    def TCOD_console_print_utf(self, con, x, y, fmt):
+        c = self._console(con)
+        self._print(con, x, y, 0, 0, c.bkgnd_flag, c.alignment, fmt, False, False)
+
+    def TCOD_console_print_ex_utf(self, con, x, y, flag, alignment, fmt):
+        self._print(con, x, y, 0, 0, flag, alignment, fmt, False, False)
+
+    def TCOD_console_print_rect_utf(self, con, x, y, w, h, fmt):
+        c = self._console(con)
+        return self._print(con, x, y, w, h, c.bkgnd_flag, c.alignment, fmt, True, False)
+
+    def TCOD_console_print_rect_ex_utf(self, con, x, y, w, h, flag, alignment, fmt):
+        return self._print(con, x, y, w, h, flag, alignment, fmt, True, False)
+
+    def TCOD_console_get_height_rect_utf(self, con, x, y, w, h, fmt):
+        return self._print(con, x, y, w, h, BKGND_NONE, LEFT, fmt, True, True)
+
+    # system
+
+    def TCOD_sys_startup(self):
+        pass
+
+    def TCOD_sys_shutdown(self):
+        self._close_terminal()
+
+    def TCOD_sys_set_fps(self, fps):
+        self.fps = fps
+
+    def TCOD_sys_get_fps(self):
+        return len(self.frame_times)
+
+    def TCOD_sys_get_last_frame_length(self):
+        return self.last_frame_length
+
+    def TCOD_sys_sleep_milli(self, val):
+        time.sleep(val / 1000.0)
+
+    def TCOD_sys_elapsed_milli(self):
+        return int((time.time() - self.start_time) * 1000)
+
+    def TCOD_sys_elapsed_seconds(self):
+        return time.time() - self.start_time
+
+    def TCOD_sys_set_renderer(self, renderer):
+        self.renderer = renderer
+
+    def TCOD_sys_get_renderer(self):
+        return self.renderer
+
+    # line
+
+    def TCOD_line_init_mt(self, xFrom, yFrom, xTo, yTo, data):
+        _line_init(data, xFrom, yFrom, xTo, yTo)
+
+    def TCOD_line_step_mt(self, xCur, yCur, data):
+        if _line_step(data):
+            return True
+        xCur._obj.value = data[5]
+        yCur._obj.value = data[6]
+        return False
+
+    def TCOD_line_init(self, xFrom, yFrom, xTo, yTo):
+        self.TCOD_line_init_mt(xFrom, yFrom, xTo, yTo, self.line_data)
+
+    def TCOD_line_step(self, xCur, yCur):
+        return self.TCOD_line_step_mt(xCur, yCur, self.line_data)
+
+    def TCOD_line(self, xo, yo, xd, yd, listener):
+        data = [0] * 9
+        _line_init(data, xo, yo, xd, yd)
+        x, y = xo, yo
+        while True:
+            if not listener(x, y):
+                return False
+            if _line_step(data):
+                return True
+            x, y = data[5], data[6]
+
+    # map and field of view
+
+    def TCOD_map_new(self, w, h):
+        return self._new(_Map(w, h))
+
+    def TCOD_map_delete(self, m):
+        self._delete(m)
+
+    def TCOD_map_copy(self, source, dest):
+        source = self._get(source)
+        dest = self._get(dest)
+        dest.w, dest.h = source.w, source.h
+        dest.transparent = bytearray(source.transparent)
+        dest.walkable = bytearray(source.walkable)
+        dest.fov = bytearray(source.fov)
+
+    def TCOD_map_clear(self, m, transparent, walkable):
+        m = self._get(m)
+        n = m.w * m.h
+        m.transparent = bytearray([1 if _value(transparent) else 0]) * n
+        m.walkable = bytearray([1 if _value(walkable) else 0]) * n
+        m.fov = bytearray(n)
+
+    def TCOD_map_set_properties(self, m, x, y, isTrans, isWalk):
+        m = self._get(m)
+        i = x + y * m.w
+        m.transparent[i] = 1 if _value(isTrans) else 0
+        m.walkable[i] = 1 if _value(isWalk) else 0
+
+    def TCOD_map_is_transparent(self, m, x, y):
+        m = self._get(m)
+        return bool(m.transparent[x + y * m.w])
+
+    def TCOD_map_is_walkable(self, m, x, y):
+        m = self._get(m)
+        return bool(m.walkable[x + y * m.w])
+
+    def TCOD_map_is_in_fov(self, m, x, y):
+        m = self._get(m)
+        if 0 <= x < m.w and 0 <= y < m.h:
+            return bool(m.fov[x + y * m.w])
+        return False
+
+    def TCOD_map_set_in_fov(self, m, x, y, fov):
+        m = self._get(m)
+        m.fov[x + y * m.w] = 1 if _value(fov) else 0
+
+    def TCOD_map_get_width(self, m):
+        return self._get(m).w
+
+    def TCOD_map_get_height(self, m):
+        return self._get(m).h
+
+    def TCOD_map_get_nb_cells(self, m):
+        m = self._get(m)
+        return m.w * m.h
+
+    def TCOD_map_compute_fov(self, m, x, y, radius, light_walls, algo):
+        m = self._get(m)
+        radius = _value(radius)
+        light_walls = bool(_value(light_walls))
+        m.fov = bytearray(m.w * m.h)
+        if not (0 <= x < m.w and 0 <= y < m.h):
+            return
+        if _value(algo) == FOV_BASIC:
+            _fov_circular_raycasting(m, x, y, radius, light_walls)
+        else:
+            _fov_shadowcasting(m, x, y, radius, light_walls)
+
+    # random
+
+    def TCOD_random_get_instance(self):
+        if self.random_instance is None:
+            self.random_instance = self.TCOD_random_new(1)
+        return self.random_instance
+
+    def TCOD_random_new(self, algo):
+        return self.TCOD_random_new_from_seed(algo, int(time.time()))
+
+    def TCOD_random_new_from_seed(self, algo, seed):
+        return self._new(_Random(seed))
+
+    def TCOD_random_delete(self, rnd):
+        self._delete(rnd)
+
+    def TCOD_random_save(self, rnd):
+        return self._new(self._random(rnd).copy())
+
+    def TCOD_random_restore(self, rnd, backup):
+        self._random(rnd).__dict__.update(self._random(backup).copy().__dict__)
+
+    def TCOD_random_set_distribution(self, rnd, dist):
+        self._random(rnd).distribution = _value(dist)
+
+    def TCOD_random_get_int(self, rnd, mi, ma):
+        return self._random(rnd).get_int_distributed(mi, ma)
+
+    def TCOD_random_get_float(self, rnd, mi, ma):
+        return c_float(self._random(rnd).get_double_distributed(mi, ma)).value
+
+    def TCOD_random_get_double(self, rnd, mi, ma):
+        return self._random(rnd).get_double_distributed(mi, ma)
+
+    def TCOD_random_dice_roll_s(self, rnd, s):
+        return self._random(rnd).dice_roll(_dice_new(s))
+
+    # path and dijkstra
+
+    def _map_walk_cost(self, m):
+        m = self._get(m)
+        return m.w, m.h, pathing.map_walk_cost(m)
+
+    def _function_walk_cost(self, func, userdata):
+        def walk_cost(xf, yf, xt, yt):
+            return func(xf, yf, xt, yt, userdata)
+        return walk_cost
+
+    def TCOD_path_new_using_map(self, m, dcost):
+        w, h, walk_cost = self._map_walk_cost(m)
+        return self._new(pathing.AStar(w, h, walk_cost, _value(dcost)))
+
+    def TCOD_path_new_using_function(self, w, h, func, userdata, dcost):
+        return self._new(pathing.AStar(w, h, self._function_walk_cost(func, userdata), _value(dcost)))
+
+    def TCOD_path_compute(self, p, ox, oy, dx, dy):
+        return self._get(p).compute(ox, oy, dx, dy)
+
+    def TCOD_path_get_origin(self, p, x, y):
+        p = self._get(p)
+        x._obj.value = p.ox
+        y._obj.value = p.oy
+
+    def TCOD_path_get_destination(self, p, x, y):
+        p = self._get(p)
+        x._obj.value = p.dx
+        y._obj.value = p.dy
+
+    def TCOD_path_size(self, p):
+        return len(self._get(p).steps)
+
+    def TCOD_path_reverse(self, p):
+        self._get(p).reverse()
+
+    def TCOD_path_get(self, p, idx, x, y):
+        x._obj.value, y._obj.value = self._get(p).get(_value(idx))
+
+    def TCOD_path_is_empty(self, p):
+        return not self._get(p).steps
+
+    def TCOD_path_walk(self, p, x, y, recalculate_when_needed):
+        step = self._get(p).walk(_value(recalculate_when_needed))
+        if step is None:
+            return False
+        x._obj.value, y._obj.value = step
+        return True
+
+    def TCOD_path_delete(self, p):
+        self._delete(p)
+
+    def TCOD_dijkstra_new(self, m, dcost):
+        w, h, walk_cost = self._map_walk_cost(m)
+        return self._new(pathing.Dijkstra(w, h, walk_cost, _value(dcost)))
+
+    def TCOD_dijkstra_new_using_function(self, w, h, func, userdata, dcost):
+        return self._new(pathing.Dijkstra(w, h, self._function_walk_cost(func, userdata), _value(dcost)))
+
+    def TCOD_dijkstra_compute(self, p, root_x, root_y):
+        self._get(p).compute(_value(root_x), _value(root_y))
+
+    def TCOD_dijkstra_path_set(self, p, x, y):
+        return self._get(p).path_set(_value(x), _value(y))
+
+    def TCOD_dijkstra_get_distance(self, p, x, y):
+        return self._get(p).get_distance(_value(x), _value(y))
+
+    def TCOD_dijkstra_size(self, p):
+        return len(self._get(p).path)
+
+    def TCOD_dijkstra_reverse(self, p):
+        self._get(p).reverse()
+
+    def TCOD_dijkstra_get(self, p, idx, x, y):
+        x._obj.value, y._obj.value = self._get(p).get(_value(idx))
+
+    def TCOD_dijkstra_is_empty(self, p):
+        return not self._get(p).path
+
+    def TCOD_dijkstra_path_walk(self, p, x, y):
+        step = self._get(p).walk()
+        if step is None:
+            return False
+        x._obj.value, y._obj.value = step
+        return True
+
+    def TCOD_dijkstra_delete(self, p):
+        self._delete(p)
+
+# lines are drawn with a TCOD_bresenham_data_t, a list or ctypes array of
+# stepx, stepy, e, deltax, deltay, origx, origy, destx, desty
+
+def _line_init(data, xFrom, yFrom, xTo, yTo):
+    deltax = xTo - xFrom
+    deltay = yTo - yFrom
+    stepx = 1 if deltax > 0 else -1 if deltax < 0 else 0
+    stepy = 1 if deltay > 0 else -1 if deltay < 0 else 0
+    if stepx * deltax > stepy * deltay:
+        e = stepx * deltax
+    else:
+        e = stepy * deltay
+    data[:] = [stepx, stepy, e, deltax * 2, deltay * 2, xFrom, yFrom, xTo, yTo]
+
+def _line_step(data):
+    # TCOD_line_step_mt on a list, returns True at the end of the line
+    stepx, stepy, e, deltax, deltay, origx, origy, destx, desty = data
+    if stepx * deltax > stepy * deltay:
+        if origx == destx:
+            return True
+        origx += stepx
+        e -= stepy * deltay
+        if e < 0:
+            origy += stepy
+            e += stepx * deltax
+    else:
+        if origy == desty:
+            return True
+        origy += stepy
+        e -= stepx * deltax
+        if e < 0:
+            origx += stepx
+            e += stepy * deltay
+    data[2] = e
+    data[5] = origx
+    data[6] = origy
+    return False
+
+# field of view, following libtcod's fov_circular_raycasting.c and
+# fov_recursive_shadowcasting.c
+
+def _cast_ray(m, xo, yo, xd, yd, r2, light_walls):
+    w = m.w
+    n = w * m.h
+    transparent = m.transparent
+    fov = m.fov
+    data = [0] * 9
+    _line_init(data, xo, yo, xd, yd)
+    offset = xo + yo * w
+    inside = False
+    blocked = False
+    if 0 <= offset < n:
+        inside = True
+        fov[offset] = 1
+    end = False
+    curx, cury = xo, yo
+    while not end:
+        end = _line_step(data)
+        if not end:
+            curx, cury = data[5], data[6]
+        offset = curx + cury * w
+        if r2 > 0 and (curx - xo) * (curx - xo) + (cury - yo) * (cury - yo) > r2:
+            return
+        if 0 <= offset < n:
+            inside = True
+            if not blocked and not transparent[offset]:
+                blocked = True
+            elif blocked:
+                return # the cell behind a wall
+            if light_walls or not blocked:
+                fov[offset] = 1
+        elif inside:
+            return # the ray left the map
+
+def _fov_postproc(m, x0, y0, x1, y1, dx, dy):
+    # lights the walls next to lit floor that the rays missed
+    w = m.w
+    n = w * m.h
+    transparent = m.transparent
+    fov = m.fov
+    for cx in range(x0, x1 + 1):
+        for cy in range(y0, y1 + 1):
+            x2 = cx + dx
+            y2 = cy + dy
+            offset = cx + cy * w
+            if 0 <= offset < n and fov[offset] == 1 and transparent[offset]:
+                if x0 <= x2 <= x1:
+                    offset2 = x2 + cy * w
+                    if 0 <= offset2 < n and not transparent[offset2]:
+                        fov[offset2] = 1
+                if y0 <= y2 <= y1:
+                    offset2 = cx + y2 * w
+                    if 0 <= offset2 < n and not transparent[offset2]:
+                        fov[offset2] = 1
+                if x0 <= x2 <= x1 and y0 <= y2 <= y1:
+                    offset2 = x2 + y2 * w
+                    if 0 <= offset2 < n and not transparent[offset2]:
+                        fov[offset2] = 1
+
+def _fov_circular_raycasting(m, px, py, max_radius, light_walls):
+    xmin, ymin, xmax, ymax = 0, 0, m.w, m.h
+    r2 = max_radius * max_radius
+    if max_radius > 0:
+        xmin = max(0, px - max_radius)
+        ymin = max(0, py - max_radius)
+        xmax = min(m.w, px + max_radius + 1)
+        ymax = min(m.h, py + max_radius + 1)
+    # a ray to every cell on the border of the area
+    for xo in range(xmin, xmax):
+        _cast_ray(m, px, py, xo, ymin, r2, light_walls)
+    for yo in range(ymin + 1, ymax):
+        _cast_ray(m, px, py, xmax - 1, yo, r2, light_walls)
+    for xo in range(xmax - 2, -1, -1):
+        _cast_ray(m, px, py, xo, ymax - 1, r2, light_walls)
+    for yo in range(ymax - 2, 0, -1):
+        _cast_ray(m, px, py, xmin, yo, r2, light_walls)
+    if light_walls:
+        _fov_postproc(m, xmin, ymin, px, py, -1, -1)
+        _fov_postproc(m, px, ymin, xmax - 1, py, 1, -1)
+        _fov_postproc(m, xmin, py, px, ymax - 1, -1, 1)
+        _fov_postproc(m, px, py, xmax - 1, ymax - 1, 1, 1)
+
+# transforms of the eight octants
+_OCTANTS = ((1, 0, 0, -1, -1, 0, 0, 1),
+            (0, 1, -1, 0, 0, -1, 1, 0),
+            (0, 1, 1, 0, 0, -1, -1, 0),
+            (1, 0, 0, 1, -1, 0, 0, -1))
+
+def _cast_light(m, cx, cy, row, start, end, radius, r2, xx, xy, yx, yy, light_walls):
+    if start < end:
+        return
+    w, h = m.w, m.h
+    transparent = m.transparent
+    fov = m.fov
+    new_start = 0.0
+    for j in range(row, radius + 1):
+        dx = -j - 1
+        dy = -j
+        blocked = False
+        while dx <= 0:
+            dx += 1
+            X = cx + dx * xx + dy * xy
+            Y = cy + dx * yx + dy * yy
+            if 0 <= X < w and 0 <= Y < h:
+                offset = X + Y * w
+                l_slope = (dx - 0.5) / (dy + 0.5)
+                r_slope = (dx + 0.5) / (dy - 0.5)
+                if start < r_slope:
+                    continue
+                elif end > l_slope:
+                    break
+                if dx * dx + dy * dy <= r2 and (light_walls or transparent[offset]):
+                    fov[offset] = 1
+                if blocked:
+                    if not transparent[offset]:
+                        new_start = r_slope
+                        continue
+                    blocked = False
+                    start = new_start
+                elif not transparent[offset] and j < radius:
+                    blocked = True
+                    _cast_light(m, cx, cy, j + 1, start, l_slope, radius, r2, xx, xy, yx, yy, light_walls)
+                    new_start = r_slope
+        if blocked:
+            break
+
+def _fov_shadowcasting(m, px, py, max_radius, light_walls):
+    if max_radius == 0:
+        rx = max(m.w - px, px)
+        ry = max(m.h - py, py)
+        max_radius = int((rx * rx + ry * ry) ** 0.5) + 1
+    r2 = max_radius * max_radius
+    for oct in range(8):
+        _cast_light(m, px, py, 1, 1.0, 0.0, max_radius, r2,
+                    _OCTANTS[0][oct], _OCTANTS[1][oct], _OCTANTS[2][oct], _OCTANTS[3][oct], light_walls)
+    m.fov[px + py * m.w] = 1
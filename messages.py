@@ -0,0 +1,115 @@
+import collections
+import textwrap
+import threading
+
+try:
+    import queue
+except ImportError: # Python 2
+    import Queue as queue
+
+import libtcodpy as libtcod
+
+class MessageLog:
+    # fixed capacity ring buffer of game messages. repeating the last message
+    # doesn't add a new entry, it bumps its count instead ("The orc growls! x12").
+    # version changes whenever the contents change, so renderers can tell
+    # whether they need to redraw.
+    def __init__(self, capacity, sink=None):
+        self.messages = collections.deque(maxlen=capacity) # [text, color, count]
+        self.version = 0
+        self.sink = sink
+
+    def add(self, text, color=libtcod.white):
+        last = self.messages[-1] if self.messages else None
+        if last is not None and last[0] == text and last[1] == color:
+            last[2] += 1
+        else:
+            self.messages.append([text, color, 1])
+        self.version += 1
+        if self.sink is not None:
+            self.sink.write(text)
+
+    def lines(self, width, count):
+        # the last count lines of the log, word wrapped to width, oldest first
+        result = []
+        for text, color, repeats in reversed(self.messages):
+            if repeats > 1:
+                text = '%s x%d' % (text, repeats)
+            wrapped = textwrap.wrap(text, width) or ['']
+            for line in reversed(wrapped):
+                result.append((line, color))
+                if len(result) == count:
+                    result.reverse()
+                    return result
+        result.reverse()
+        return result
+
+    def close(self):
+        if self.sink is not None:
+            self.sink.close()
+
+class MessagePanel:
+    # draws the message log into its own offscreen console. the console is
+    # only redrawn and blitted when the log changed since the last render.
+    def __init__(self, log, width, height):
+        self.log = log
+        self.width = width
+        self.height = height
+        self.con = libtcod.console_new(width, height)
+        self.drawn_version = None
+
+    def render(self, dest, x, y):
+        if self.drawn_version == self.log.version:
+            return
+        self.drawn_version = self.log.version
+
+        libtcod.console_set_default_background(self.con, libtcod.black)
+        libtcod.console_clear(self.con)
+        row = 0
+        for line, color in self.log.lines(self.width - 2, self.height):
+            libtcod.console_set_default_foreground(self.con, color)
+            libtcod.console_print_ex(self.con, 1, row, libtcod.BKGND_NONE, libtcod.LEFT, line)
+            row += 1
+        libtcod.console_blit(self.con, 0, 0, self.width, self.height, dest, x, y)
+
+    def invalidate(self):
+        # force a redraw, e.g. after something else drew over the panel
+        self.drawn_version = None
+
+class FileSink:
+    # writes messages to a file from a background thread, so the turn loop
+    # never waits on disk i/o
+    def __init__(self, filename):
+        self.queue = queue.Queue()
+        self.file = open(filename, 'a')
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def write(self, text):
+        self.queue.put(text)
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        self.file.close()
+
+    def _run(self):
+        while True:
+            text = self.queue.get()
+            if text is None:
+                break
+            lines = [text]
+            # drain whatever else is waiting so it goes out in one write
+            while True:
+                try:
+                    text = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if text is None:
+                    self.file.write('\n'.join(lines) + '\n')
+                    self.file.flush()
+                    return
+                lines.append(text)
+            self.file.write('\n'.join(lines) + '\n')
+            self.file.flush()
@@ -0,0 +1,107 @@
+import collections
+
+import libtcodpy as libtcod
+
+class PathCache:
+    # remembers computed paths so that monsters asking again for the same
+    # route don't run A* again. paths are computed with the path object
+    # registered for a cost model (a name such as 'walk' or 'fly') and kept
+    # under (origin, destination, cost model, map version).
+    #
+    # when the map changes, tell the cache:
+    #  - tiles_changed(model, xs, ys) for tiles that got more expensive or
+    #    blocked (a door closing, a monster stepping in). only the paths that
+    #    go through those tiles are dropped.
+    #  - map_changed(model) for anything else, e.g. a tile becoming cheaper,
+    #    which can make a shorter path appear anywhere. this moves the model to
+    #    a new map version and drops all of its paths.
+    #
+    # the cache holds at most max_paths paths and max_cells path cells in
+    # total; the least recently used paths go first.
+    def __init__(self, max_paths=1024, max_cells=65536):
+        self.max_paths = max_paths
+        self.max_cells = max_cells
+        self.models = {} # name -> PathBatch
+        self.versions = {} # name -> map version
+        self.entries = collections.OrderedDict() # key -> path cells, None for no path
+        self.by_tile = {} # (model, x, y) -> keys of the paths going through the tile
+        self.cells = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidated = 0
+
+    def add_model(self, model, p):
+        # p is a path from path_new_using_map, _function or _costs
+        self.models[model] = libtcod.PathBatch(p)
+        self.versions.setdefault(model, 0)
+
+    def path(self, model, ox, oy, dx, dy):
+        # the cells from ox, oy (excluded) to dx, dy as a tuple of (x, y), or
+        # None if there is no path
+        key = (ox, oy, dx, dy, model, self.versions[model])
+        entries = self.entries
+        if key in entries:
+            self.hits += 1
+            cells = entries.pop(key)
+            entries[key] = cells # most recently used
+            return cells
+        self.misses += 1
+        batch = self.models[model]
+        if batch.compute(ox, oy, dx, dy):
+            xs, ys = batch.cells(0)
+            cells = tuple(zip(xs, ys))
+        else:
+            cells = None
+        self._add(key, cells)
+        return cells
+
+    def tiles_changed(self, model, xs, ys):
+        for x, y in zip(xs, ys):
+            for key in list(self.by_tile.get((model, x, y), ())):
+                self._remove(key)
+                self.invalidated += 1
+
+    def map_changed(self, model):
+        self.versions[model] += 1
+        for key in [key for key in self.entries if key[4] == model]:
+            self._remove(key)
+            self.invalidated += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.by_tile.clear()
+        self.cells = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / float(lookups) if lookups else 0.0,
+                'paths': len(self.entries),
+                'cells': self.cells,
+                'evictions': self.evictions,
+                'invalidated': self.invalidated}
+
+    def _add(self, key, cells):
+        self.entries[key] = cells
+        if cells:
+            model = key[4]
+            for x, y in cells:
+                self.by_tile.setdefault((model, x, y), set()).add(key)
+            self.cells += len(cells)
+        while self.entries and (len(self.entries) > self.max_paths or self.cells > self.max_cells):
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+
+    def _remove(self, key):
+        cells = self.entries.pop(key)
+        if cells:
+            model = key[4]
+            for x, y in cells:
+                tile = (model, x, y)
+                keys = self.by_tile[tile]
+                keys.discard(key)
+                if not keys:
+                    del self.by_tile[tile]
+            self.cells -= len(cells)
@@ -0,0 +1,74 @@
+import threading
+
+import libtcodpy as libtcod
+
+class Presenter:
+    # double buffered presentation on a background thread. the game draws a
+    # frame into its own console and hands it over with submit(), which only
+    # copies it into the handoff console and returns. the presenter thread
+    # takes the newest handed over frame and calls present(con) on a console
+    # of its own, so slow output never holds up the game.
+    # frames are dropped, not queued: if the game submits faster than they can
+    # be presented, only the latest one is shown.
+    # present must be safe to call from another thread. AnsiTerminal.present_console
+    # is, console_flush is not (SDL wants it on the thread that made the window).
+    def __init__(self, width, height, present):
+        self.width = width
+        self.height = height
+        self.present = present
+        self.handoff = libtcod.console_new(width, height)
+        self.display = libtcod.console_new(width, height)
+
+        self.lock = threading.Lock()
+        self.ready = threading.Condition(self.lock)
+        self.pending = False
+        self.closing = False
+        self.submitted = 0
+        self.presented = 0
+        self.dropped = 0
+        self.error = None
+
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def submit(self, con):
+        # hand over the finished frame in con. never waits for presentation,
+        # only for the presenter to finish copying the previous handoff.
+        if self.error is not None:
+            raise self.error
+        with self.lock:
+            if self.pending:
+                # the previous frame was never shown
+                self.dropped += 1
+            libtcod.console_blit(con, 0, 0, self.width, self.height, self.handoff, 0, 0)
+            self.pending = True
+            self.submitted += 1
+            self.ready.notify()
+
+    def close(self):
+        # present the last frame, if it is still waiting, and stop the thread
+        with self.lock:
+            self.closing = True
+            self.ready.notify()
+        self.thread.join()
+        libtcod.console_delete(self.handoff)
+        libtcod.console_delete(self.display)
+
+    def _run(self):
+        while True:
+            with self.lock:
+                while not self.pending and not self.closing:
+                    self.ready.wait()
+                if not self.pending:
+                    return
+                libtcod.console_blit(self.handoff, 0, 0, self.width, self.height, self.display, 0, 0)
+                self.pending = False
+            # present outside the lock, the game can hand over the next frame meanwhile
+            try:
+                self.present(self.display)
+            except Exception as e:
+                # report it on the game's thread at the next submit
+                self.error = e
+                return
+            self.presented += 1
@@ -0,0 +1,186 @@
+import collections
+import json
+import math
+import time
+
+try:
+    from threading import get_ident
+except ImportError: # Python 2
+    from thread import get_ident
+
+import libtcodpy as libtcod
+
+# the best timer available, time.perf_counter is missing on Python 2
+clock = getattr(time, 'perf_counter', time.time)
+
+class _Span:
+    # times one named phase, used as "with profiler.span('render'):"
+    def __init__(self, samples):
+        self.samples = samples
+        self.frame_total = 0.0
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = clock()
+        return self
+
+    def __exit__(self, *exc):
+        self.frame_total += clock() - self.start
+
+class _NullSpan:
+    # what span() returns while profiling is off
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class _CountingLib:
+    # stands in for libtcodpy's _lib while ffi calls are counted. wrappers are
+    # created on first use of each function and then cached as attributes.
+    # only the calls of the thread that installed it (the game loop) are
+    # counted: other threads, such as the presenter's, would be counted into
+    # whatever frame is open and race on the counters.
+    def __init__(self, lib, profiler):
+        self._real_lib = lib
+        self._profiler = profiler
+        self._thread = get_ident()
+
+    def __getattr__(self, name):
+        func = getattr(self._real_lib, name)
+        if not callable(func):
+            return func
+        call = self._count_calls(name, func)
+        setattr(self, name, call)
+        return call
+
+    def _count_calls(self, name, func):
+        # func wrapped to count its calls under name, also used by libtcodpy
+        # for the function pointers it binds itself
+        profiler = self._profiler
+        by_name = profiler.ffi_by_name
+        by_name.setdefault(name, 0)
+        thread = self._thread
+        def call(*args):
+            if get_ident() == thread:
+                profiler.ffi_frame += 1
+                by_name[name] += 1
+            return func(*args)
+        return call
+
+class FrameProfiler:
+    # per-frame timing of named phases of the main loop. each span's time is
+    # summed over a frame; frame() closes the frame and records one sample per
+    # phase, keeping the last `window` frames for the percentiles.
+    # while disabled, span() hands out a shared do-nothing context manager and
+    # the ffi counting wrapper is not installed, so the cost is a method call.
+    def __init__(self, window=1000, enabled=False):
+        self.window = window
+        self.spans = collections.OrderedDict() # name -> _Span
+        self.frame_samples = collections.deque(maxlen=window)
+        self.ffi_samples = collections.deque(maxlen=window)
+        self.ffi_frame = 0
+        self.ffi_by_name = {}
+        self.frames = 0
+        self.frame_start = None
+        self.overlay = False
+        self.libs = [] # modules whose _lib is wrapped
+        self.enabled = False
+        if enabled:
+            self.enable()
+
+    def enable(self):
+        self.enabled = True
+        self.frame_start = clock()
+        for module in self.libs:
+            if not isinstance(module._lib, _CountingLib):
+                module._lib = _CountingLib(module._lib, self)
+
+    def disable(self):
+        self.enabled = False
+        for module in self.libs:
+            if isinstance(module._lib, _CountingLib):
+                module._lib = module._lib._real_lib
+
+    def count_ffi(self, module):
+        # count the native calls libtcodpy (or any module calling through a
+        # module level _lib) makes while profiling is enabled
+        self.libs.append(module)
+        if self.enabled:
+            module._lib = _CountingLib(module._lib, self)
+
+    def span(self, name):
+        if not self.enabled:
+            return _NULL_SPAN
+        span = self.spans.get(name)
+        if span is None:
+            span = self.spans[name] = _Span(collections.deque(maxlen=self.window))
+        return span
+
+    def frame(self):
+        # call once per frame, after the last span of the frame
+        if not self.enabled:
+            return
+        now = clock()
+        self.frame_samples.append(now - self.frame_start)
+        self.frame_start = now
+        for span in self.spans.values():
+            span.samples.append(span.frame_total)
+            span.frame_total = 0.0
+        self.ffi_samples.append(self.ffi_frame)
+        self.ffi_frame = 0
+        self.frames += 1
+
+    def summary(self):
+        # {name: {'mean', 'p50', 'p95', 'p99', 'max'}} in milliseconds for the
+        # frame and each phase, plus ffi calls per frame
+        result = collections.OrderedDict()
+        result['frame'] = _stats(self.frame_samples, 1000.0)
+        for name, span in self.spans.items():
+            result[name] = _stats(span.samples, 1000.0)
+        result['ffi_calls'] = _stats(self.ffi_samples, 1)
+        return result
+
+    def export_json(self, filename):
+        data = {'frames': self.frames,
+                'window': self.window,
+                'summary': self.summary(),
+                'ffi_by_name': self.ffi_by_name,
+                'samples_ms': dict((name, [t * 1000.0 for t in span.samples])
+                                   for name, span in self.spans.items())}
+        with open(filename, 'w') as f:
+            json.dump(data, f, indent=1)
+
+    def toggle_overlay(self):
+        self.overlay = not self.overlay
+        return self.overlay
+
+    def draw_overlay(self, con, x, y):
+        # print the summary as a small table
+        if not self.overlay or not self.enabled:
+            return
+        lines = ['%-12s %6s %6s %6s' % ('ms', 'p50', 'p95', 'p99')]
+        for name, stats in self.summary().items():
+            if name == 'ffi_calls':
+                name = 'ffi/frame'
+            lines.append('%-12s %6.1f %6.1f %6.1f' % (name[:12], stats['p50'], stats['p95'], stats['p99']))
+        libtcod.console_set_default_foreground(con, libtcod.white)
+        libtcod.console_set_default_background(con, libtcod.black)
+        for i, line in enumerate(lines):
+            libtcod.console_print_ex(con, x, y + i, libtcod.BKGND_SET, libtcod.LEFT, line)
+
+def _stats(samples, scale):
+    if not samples:
+        return {'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0}
+    ordered = sorted(samples)
+    n = len(ordered)
+    def percentile(p):
+        # nearest rank
+        return ordered[max(0, int(math.ceil(p * n / 100.0)) - 1)] * scale
+    return {'mean': sum(ordered) * scale / n,
+            'p50': percentile(50),
+            'p95': percentile(95),
+            'p99': percentile(99),
+            'max': ordered[-1] * scale}
@@ -0,0 +1,159 @@
+import gzip
+import json
+import time
+
+import libtcodpy as libtcod
+
+# a recording is a gzipped file of json lines. the first line is a header
+# ({"version", "seed", "width", "height"}), followed by these records:
+#   ["key", vk, c, lalt, lctrl, shift]   a key read by the game
+#   ["turn", checksum]                   the game state after a turn
+#   ["frame", runs]                      the screen, as changes to the last frame
+# runs is a list of [start, chars, fore, back] for each stretch of
+# consecutive cells that changed, colors packed as 0xRRGGBB ints.
+VERSION = 1
+
+def frame_delta(old, new):
+    # the runs that turn frame old into frame new. frames are (chars, fore,
+    # back) tuples of flat lists, old may be None for the first frame.
+    chars, fore, back = new
+    if old is None:
+        return [[0, list(chars), list(fore), list(back)]]
+    old_chars, old_fore, old_back = old
+    runs = []
+    run = None
+    for i in range(len(chars)):
+        if chars[i] == old_chars[i] and fore[i] == old_fore[i] and back[i] == old_back[i]:
+            run = None
+            continue
+        if run is None:
+            run = [i, [], [], []]
+            runs.append(run)
+        run[1].append(chars[i])
+        run[2].append(fore[i])
+        run[3].append(back[i])
+    return runs
+
+def apply_delta(frame, runs, size):
+    # the frame that follows frame (None for an empty screen) after runs
+    if frame is None:
+        chars, fore, back = [0] * size, [0] * size, [0] * size
+    else:
+        chars, fore, back = [list(plane) for plane in frame]
+    for start, run_chars, run_fore, run_back in runs:
+        end = start + len(run_chars)
+        chars[start:end] = run_chars
+        fore[start:end] = run_fore
+        back[start:end] = run_back
+    return chars, fore, back
+
+class SessionRecorder:
+    # records the keys, per-turn state checksums and optionally the screen
+    # of a game session so it can be replayed with SessionReplay
+    def __init__(self, filename, seed, width, height):
+        self.file = gzip.open(filename, 'wb')
+        self.last_frame = None
+        self._write({'version': VERSION, 'seed': seed, 'width': width, 'height': height})
+
+    def key(self, key):
+        self._write(['key', key.vk, key.c, bool(key.lalt), bool(key.lctrl), bool(key.shift)])
+
+    def turn(self, checksum):
+        self._write(['turn', checksum])
+
+    def frame(self, chars, fore, back):
+        frame = (list(chars), list(fore), list(back))
+        self._write(['frame', frame_delta(self.last_frame, frame)])
+        self.last_frame = frame
+
+    def close(self):
+        self.file.close()
+
+    def _write(self, record):
+        self.file.write((json.dumps(record, separators=(',', ':')) + '\n').encode('utf-8'))
+
+class SessionReplay:
+    # plays back a recording: next_key() hands out the recorded keys in order,
+    # check_turn() and check_frame() compare the replayed game against the
+    # recording. a session that doesn't play out the same is not deterministic.
+    def __init__(self, filename):
+        with gzip.open(filename, 'rb') as f:
+            lines = f.read().decode('utf-8').splitlines()
+        header = json.loads(lines[0])
+        if header.get('version') != VERSION:
+            raise ValueError('SessionReplay: unsupported recording version %r.' % header.get('version'))
+        self.seed = header['seed']
+        self.width = header['width']
+        self.height = header['height']
+
+        self.keys = []
+        self.turns = []
+        self.frames = [] # deltas
+        for line in lines[1:]:
+            record = json.loads(line)
+            if record[0] == 'key':
+                self.keys.append(record[1:])
+            elif record[0] == 'turn':
+                self.turns.append(record[1])
+            elif record[0] == 'frame':
+                self.frames.append(record[1])
+
+        self.next_key_index = 0
+        self.turns_checked = 0
+        self.frames_checked = 0
+        self.recorded_frame = None
+        self.mismatches = [] # (kind, index) of everything that played out differently
+        self.start_time = None
+        self.end_time = None
+
+    def has_frames(self):
+        return bool(self.frames)
+
+    def next_key(self):
+        # the next recorded key, or None once the recording is over
+        if self.start_time is None:
+            self.start_time = time.time()
+        if self.next_key_index >= len(self.keys):
+            self.end_time = time.time()
+            return None
+        vk, c, lalt, lctrl, shift = self.keys[self.next_key_index]
+        self.next_key_index += 1
+        key = libtcod.Key()
+        key.vk = vk
+        key.c = c
+        key.pressed = True
+        key.lalt = lalt
+        key.lctrl = lctrl
+        key.shift = shift
+        return key
+
+    def check_turn(self, checksum):
+        index = self.turns_checked
+        self.turns_checked += 1
+        if index >= len(self.turns) or self.turns[index] != checksum:
+            self.mismatches.append(('turn', index))
+
+    def check_frame(self, chars, fore, back):
+        index = self.frames_checked
+        self.frames_checked += 1
+        if index >= len(self.frames):
+            self.mismatches.append(('frame', index))
+            return
+        self.recorded_frame = apply_delta(self.recorded_frame, self.frames[index], self.width * self.height)
+        if self.recorded_frame != (list(chars), list(fore), list(back)):
+            self.mismatches.append(('frame', index))
+
+    def report(self):
+        end = self.end_time if self.end_time is not None else time.time()
+        seconds = end - self.start_time if self.start_time is not None else 0.0
+        first_mismatch = self.mismatches[0] if self.mismatches else None
+        if first_mismatch is None and self.turns_checked < len(self.turns):
+            # the replay ended early
+            first_mismatch = ('turn', self.turns_checked)
+        return {'turns': self.turns_checked,
+                'recorded_turns': len(self.turns),
+                'frames_checked': self.frames_checked,
+                'seconds': seconds,
+                'turns_per_second': self.turns_checked / seconds if seconds > 0 else 0.0,
+                'deterministic': first_mismatch is None,
+                'first_mismatch': first_mismatch}
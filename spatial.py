@@ -0,0 +1,81 @@
+class SpatialIndex:
+    # buckets objects into a coarse grid so that neighbourhood queries only
+    # look at the few buckets overlapping the query area, and keeps an exact
+    # per-tile index for "what is standing here?" lookups
+    def __init__(self, bucket_size=8):
+        self.bucket_size = bucket_size
+        self.buckets = {}    # (bx, by) -> list of objects
+        self.cells = {}      # (x, y) -> list of objects
+        self.positions = {}  # object -> (x, y) it is currently indexed at
+
+    def add(self, obj):
+        pos = (obj.x, obj.y)
+        self.positions[obj] = pos
+        self.cells.setdefault(pos, []).append(obj)
+        self.buckets.setdefault(self._bucket(obj.x, obj.y), []).append(obj)
+
+    def remove(self, obj):
+        pos = self.positions.pop(obj, None)
+        if pos is None:
+            return
+        self._discard(self.cells, pos, obj)
+        self._discard(self.buckets, self._bucket(pos[0], pos[1]), obj)
+
+    def update(self, obj):
+        # re-index an object after its coordinates changed
+        pos = self.positions.get(obj)
+        if pos is None:
+            self.add(obj)
+            return
+        new_pos = (obj.x, obj.y)
+        if pos == new_pos:
+            return
+        self.positions[obj] = new_pos
+        self._discard(self.cells, pos, obj)
+        self.cells.setdefault(new_pos, []).append(obj)
+
+        old_bucket = self._bucket(pos[0], pos[1])
+        new_bucket = self._bucket(obj.x, obj.y)
+        if old_bucket != new_bucket:
+            self._discard(self.buckets, old_bucket, obj)
+            self.buckets.setdefault(new_bucket, []).append(obj)
+
+    def clear(self):
+        self.buckets.clear()
+        self.cells.clear()
+        self.positions.clear()
+
+    def at(self, x, y):
+        # objects standing exactly on tile (x, y)
+        return self.cells.get((x, y), ())
+
+    def query_rect(self, x1, y1, x2, y2):
+        # objects inside the inclusive rectangle (x1, y1)-(x2, y2)
+        size = self.bucket_size
+        found = []
+        for by in range(y1 // size, y2 // size + 1):
+            for bx in range(x1 // size, x2 // size + 1):
+                bucket = self.buckets.get((bx, by))
+                if not bucket:
+                    continue
+                for obj in bucket:
+                    if x1 <= obj.x <= x2 and y1 <= obj.y <= y2:
+                        found.append(obj)
+        return found
+
+    def query_radius(self, x, y, radius):
+        # objects within euclidean distance radius of (x, y)
+        r2 = radius * radius
+        return [obj for obj in self.query_rect(x - radius, y - radius, x + radius, y + radius)
+                if (obj.x - x) ** 2 + (obj.y - y) ** 2 <= r2]
+
+    def _bucket(self, x, y):
+        return (x // self.bucket_size, y // self.bucket_size)
+
+    def _discard(self, table, key, obj):
+        entries = table.get(key)
+        if entries is None:
+            return
+        entries.remove(obj)
+        if not entries:
+            del table[key]
@@ -0,0 +1,134 @@
+import json
+
+import libtcodpy as libtcod
+
+class AliasTable:
+    # walker/vose alias table for drawing one of n outcomes with integer weights
+    # in constant time. everything is kept in integers: a single random int r
+    # in [0, n * total) picks the column (r // total) and the coin (r % total),
+    # so every draw costs exactly one call into the random number generator.
+    def __init__(self, weights):
+        n = len(weights)
+        total = sum(weights)
+        if n == 0 or total <= 0:
+            raise ValueError('AliasTable: at least one weight must be positive.')
+        if min(weights) < 0:
+            raise ValueError('AliasTable: weights must not be negative.')
+
+        self.n = n
+        self.total = total
+        self.prob = [total] * n
+        self.alias = list(range(n))
+
+        # scale every weight by n so the average column holds exactly total
+        scaled = [w * n for w in weights]
+        small = [i for i in range(n) if scaled[i] < total]
+        large = [i for i in range(n) if scaled[i] >= total]
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] -= total - scaled[s]
+            if scaled[l] < total:
+                small.append(l)
+            else:
+                large.append(l)
+        # whatever is left over is full up to rounding
+        for i in small + large:
+            self.prob[i] = total
+
+    def pick(self, r):
+        # map a random int r in [0, n * total) to an outcome index
+        column, coin = divmod(r, self.total)
+        if coin < self.prob[column]:
+            return column
+        return self.alias[column]
+
+    def sample(self, rnd=0):
+        return self.pick(libtcod.random_get_int(rnd, 0, self.n * self.total - 1))
+
+    def sample_many(self, count, rnd=0):
+        # draw count outcomes at once
+        prob = self.prob
+        alias = self.alias
+        total = self.total
+        result = []
+        for r in libtcod.random_get_ints(rnd, 0, self.n * total - 1, count):
+            column, coin = divmod(r, total)
+            result.append(column if coin < prob[column] else alias[column])
+        return result
+
+class MonsterType:
+    # one entry of a spawn table: what the monster looks like and how often it
+    # shows up. weights is a list of [weight, from_depth] pairs, sorted by
+    # depth: the weight of the last pair whose depth is reached applies.
+    # fighter is a (hp, defense, power) tuple, or None for things that don't fight.
+    def __init__(self, name, char, color, weights, blocks=True, fighter=None):
+        self.name = name
+        self.char = char
+        self.color = color
+        self.weights = sorted(weights, key=lambda pair: pair[1])
+        self.blocks = blocks
+        self.fighter = fighter
+
+    def weight_at(self, depth):
+        weight = 0
+        for value, from_depth in self.weights:
+            if depth < from_depth:
+                break
+            weight = value
+        return weight
+
+class SpawnTable:
+    # a list of monster types with per-depth weights. the alias table for a
+    # given depth is built on first use and cached.
+    def __init__(self, types):
+        self.types = types
+        self.compiled = {}
+
+    def for_depth(self, depth):
+        # returns (types, AliasTable) for the types that can spawn at depth
+        compiled = self.compiled.get(depth)
+        if compiled is None:
+            types = [t for t in self.types if t.weight_at(depth) > 0]
+            if not types:
+                raise ValueError('SpawnTable: nothing can spawn at depth %d.' % depth)
+            compiled = (types, AliasTable([t.weight_at(depth) for t in types]))
+            self.compiled[depth] = compiled
+        return compiled
+
+    def sample(self, depth, rnd=0):
+        types, table = self.for_depth(depth)
+        return types[table.sample(rnd)]
+
+    def sample_many(self, depth, count, rnd=0):
+        # draw count monster types for one level in a single batch
+        types, table = self.for_depth(depth)
+        return [types[i] for i in table.sample_many(count, rnd)]
+
+def _parse_color(value):
+    # colors are given either as the name of a libtcod color or as [r, g, b]
+    if isinstance(value, list):
+        return libtcod.Color(*value)
+    color = getattr(libtcod, value, None)
+    if not isinstance(color, libtcod.Color):
+        raise ValueError('unknown color: %s' % value)
+    return color
+
+def load_spawn_table(filename, section='monsters'):
+    # load a spawn table from a json data file, see data/monsters.json
+    with open(filename) as f:
+        data = json.load(f)
+
+    types = []
+    for entry in data[section]:
+        fighter = None
+        if 'hp' in entry:
+            fighter = (entry['hp'], entry.get('defense', 0), entry.get('power', 0))
+        types.append(MonsterType(entry['name'], entry['char'],
+                                 _parse_color(entry['color']),
+                                 entry['weights'],
+                                 entry.get('blocks', True),
+                                 fighter))
+    return SpawnTable(types)